@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+肖像判定性能基准
+对比 fix_persons_avatars.is_likely_portrait 与旧实现（全分辨率解码 + 多个整幅布尔掩码）
+
+运行方式（在仓库根目录）：
+  python scripts/benchmark_portrait_scoring.py
+  python scripts/benchmark_portrait_scoring.py --images-dir frontend/public/images/full --repeat 3
+
+输出每种实现的 images/sec、峰值内存（tracemalloc，含 numpy 数组；Pillow 解码缓冲不计入）
+以及两种实现判定结果一致的图片数量。
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from fix_persons_avatars import is_likely_portrait
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_IMAGES_DIR = os.path.join(REPO_ROOT, "frontend", "public", "images", "full")
+
+
+def legacy_is_likely_portrait(image_path):
+    """旧实现（保留作对比）：全分辨率转RGB后逐条件构造整幅掩码"""
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            if height > width * 0.8:
+                return True
+            img_array = np.array(img.convert('RGB'))
+            r, g, b = img_array[:, :, 0], img_array[:, :, 1], img_array[:, :, 2]
+            condition1 = (r > g) & (g > b)
+            condition2 = (r > 95) & (g > 40) & (b > 20)
+            condition3 = (np.maximum(np.maximum(r, g), b) - np.minimum(np.minimum(r, g), b)) > 15
+            skin_pixels = np.sum(condition1 & condition2 & condition3)
+            return skin_pixels / (width * height) > 0.05
+    except Exception:
+        return False
+
+
+def list_images(images_dir):
+    return sorted(
+        os.path.join(images_dir, n)
+        for n in os.listdir(images_dir)
+        if n.lower().endswith(('.jpg', '.png', '.jpeg', '.gif'))
+    )
+
+
+def run(fn, paths, repeat):
+    """返回 (结果列表, 耗时秒, 峰值内存字节)"""
+    results = []
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(repeat):
+        current = [fn(p) for p in paths]
+        if i == 0:
+            results = current
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return results, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比新旧肖像判定实现的吞吐与峰值内存。")
+    parser.add_argument("--images-dir", default=DEFAULT_IMAGES_DIR, help="图片目录（默认 frontend/public/images/full）")
+    parser.add_argument("--repeat", type=int, default=1, help="重复轮数（用于稳定计时）")
+    args = parser.parse_args()
+
+    paths = list_images(args.images_dir)
+    if not paths:
+        raise SystemExit(f"目录中没有图片：{args.images_dir}")
+    repeat = max(1, args.repeat)
+
+    reports = {}
+    for name, fn in (("legacy", legacy_is_likely_portrait), ("current", is_likely_portrait)):
+        results, elapsed, peak = run(fn, paths, repeat)
+        reports[name] = results
+        per_sec = len(paths) * repeat / elapsed if elapsed else 0
+        print(f"[benchmark_portrait_scoring] impl={name} images={len(paths)} repeat={repeat} "
+              f"seconds={elapsed:.3f} images_per_sec={per_sec:.1f} peak_mem_kb={peak / 1024:.0f} "
+              f"portraits={sum(results)}")
+
+    diff = [os.path.basename(p) for p, a, b in zip(paths, reports["legacy"], reports["current"]) if a != b]
+    print(f"- agree: {len(paths) - len(diff)}/{len(paths)}")
+    for n in diff:
+        print(f"  - differs: {n}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+人物头像图集（sprite sheet）构建
+
+把所有人物头像裁成同尺寸的正方形小图，按货架（shelf）装箱算法排入一张或几张图集：
+- 图集图片：frontend/public/images/atlas/avatars-<N>.jpg
+- 坐标映射：frontend/public/data/avatar_atlas.json
+  {"tileSize": 64, "atlases": [{"url", "width", "height"}], "persons": {"<人物ID>": {"atlas", "x", "y", "w", "h"}}}
+
+关系图（vis-network）只需加载几张图集，再按坐标从图集中截取头像，而不是每个人物单独请求一张图片。
+多个人物共用同一张头像图片（且裁剪框相同）时只占一个格子。
+裁剪框优先使用 scripts/avatar_crops.json（由 build_avatar_crops.py 按显著性计算或手工调整），
+没有记录时退回固定的居中/偏上裁剪。
+
+运行方式（在仓库根目录）：
+  python scripts/build_avatar_atlas.py
+  python scripts/build_avatar_atlas.py --tile-size 96 --max-side 2048
+"""
+
+import argparse
+import json
+import math
+import os
+
+from PIL import Image
+
+from image_analysis import save_image_atomic
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PUBLIC_DIR = os.path.join(REPO_ROOT, "frontend", "public")
+PERSONS_FILE = os.path.join(PUBLIC_DIR, "data", "persons.json")
+ATLAS_DIR = os.path.join(PUBLIC_DIR, "images", "atlas")
+ATLAS_MAP_FILE = os.path.join(PUBLIC_DIR, "data", "avatar_atlas.json")
+ATLAS_URL_PREFIX = "/images/atlas"
+CROPS_FILE = os.path.join(REPO_ROOT, "scripts", "avatar_crops.json")
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def resolve_avatar(url):
+    """/images/full/xxx.jpg -> 本地文件路径；不是本地图片或文件不存在时返回 None"""
+    if not url or not url.startswith("/images/"):
+        return None
+    path = os.path.join(PUBLIC_DIR, *url.lstrip("/").split("/"))
+    return path if os.path.isfile(path) else None
+
+
+def square_crop_box(width, height):
+    """
+    正方形裁剪框：横图取中间，竖图偏上（画像/照片的脸通常在上部）
+    返回 (left, top, right, bottom)
+    """
+    side = min(width, height)
+    left = (width - side) // 2
+    top = int((height - side) * 0.25) if height > width else (height - side) // 2
+    return (left, top, left + side, top + side)
+
+
+def load_crop_boxes(path):
+    """{人物ID: (avatarUrl, box)}；文件不存在时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    return {
+        person_id: (entry.get("avatarUrl"), tuple(entry["box"]))
+        for person_id, entry in _load_json(path).items()
+        if entry.get("box")
+    }
+
+
+def load_tile(path, tile_size, box=None):
+    """box 为原图坐标下的裁剪框；JPEG draft 缩小解码后按比例换算"""
+    with Image.open(path) as img:
+        orig_w, orig_h = img.size
+        img.draft("RGB", (tile_size, tile_size))
+        img = img.convert("RGB")
+        if box is None:
+            box = square_crop_box(*img.size)
+        else:
+            sx, sy = img.width / orig_w, img.height / orig_h
+            box = (round(box[0] * sx), round(box[1] * sy), round(box[2] * sx), round(box[3] * sy))
+        tile = img.crop(box)
+        return tile.resize((tile_size, tile_size), Image.LANCZOS)
+
+
+class ShelfPacker:
+    """
+    货架装箱：矩形按高度从高到低依次放入当前货架，放不下时开新货架，图集高度不够时开新图集
+    同尺寸头像退化为规则网格；支持不同尺寸的矩形（例如以后加入大图）
+    """
+
+    def __init__(self, width, max_height, padding):
+        self.width = width
+        self.max_height = max_height
+        self.padding = padding
+        self.bins = []  # 每个图集：{'shelves': [[y, 高度, 当前 x]], 'height': 已用高度}
+
+    def _new_bin(self):
+        self.bins.append({"shelves": [], "height": 0})
+        return len(self.bins) - 1
+
+    def add(self, w, h):
+        """返回 (图集序号, x, y)"""
+        pw, ph = w + self.padding, h + self.padding
+        if pw > self.width or ph > self.max_height:
+            raise ValueError(f"矩形 {w}x{h} 超过图集尺寸 {self.width}x{self.max_height}")
+        if not self.bins:
+            self._new_bin()
+        b = self.bins[-1]
+        for shelf in b["shelves"]:
+            y, shelf_h, x = shelf
+            if ph <= shelf_h and x + pw <= self.width:
+                shelf[2] += pw
+                return len(self.bins) - 1, x, y
+        if b["height"] + ph > self.max_height:
+            self._new_bin()
+            b = self.bins[-1]
+        y = b["height"]
+        b["shelves"].append([y, ph, pw])
+        b["height"] += ph
+        return len(self.bins) - 1, 0, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把人物头像打包成图集（sprite sheet）并输出坐标映射。")
+    parser.add_argument("--persons", default=PERSONS_FILE, help="人物数据文件")
+    parser.add_argument("--tile-size", type=int, default=64, help="每个头像格子的边长（像素，默认 64）")
+    parser.add_argument("--padding", type=int, default=2, help="格子间距，避免缩放时相邻头像渗色（默认 2）")
+    parser.add_argument("--max-side", type=int, default=1024, help="单张图集的最大边长（默认 1024）")
+    parser.add_argument("--quality", type=int, default=85, help="图集 JPEG 质量（默认 85）")
+    parser.add_argument("--crops", default=CROPS_FILE, help="裁剪框记录（默认 scripts/avatar_crops.json，不存在时使用固定裁剪）")
+    args = parser.parse_args()
+
+    if args.tile_size < 1 or args.padding < 0:
+        raise SystemExit("--tile-size 需大于 0，--padding 不能为负数")
+    if args.max_side < args.tile_size + args.padding:
+        raise SystemExit(
+            f"--max-side={args.max_side} 放不下一个格子：至少需要 --tile-size + --padding = {args.tile_size + args.padding}"
+        )
+
+    persons = _load_json(args.persons)
+    crop_boxes = load_crop_boxes(args.crops)
+    # 按（头像文件, 裁剪框）分组：同一张图片、同一裁剪只占一个格子
+    by_path = {}
+    skipped = 0
+    for p in persons:
+        person_id = str(p.get("id"))
+        path = resolve_avatar(p.get("avatarUrl"))
+        if path is None:
+            skipped += 1 if p.get("avatarUrl") else 0
+            continue
+        url, box = crop_boxes.get(person_id, (None, None))
+        by_path.setdefault((path, box if url == p.get("avatarUrl") else None), []).append(person_id)
+    if not by_path:
+        raise SystemExit("没有可用的本地头像图片")
+
+    tile, pad = args.tile_size, args.padding
+    # 图集宽度取接近正方形的网格宽度，且不超过 max-side
+    per_row = max(1, min(args.max_side // (tile + pad), math.ceil(math.sqrt(len(by_path)))))
+    packer = ShelfPacker(per_row * (tile + pad), args.max_side, pad)
+
+    placements = []
+    for key in sorted(by_path, key=lambda k: (k[0], k[1] or ())):
+        placements.append((key, *packer.add(tile, tile)))
+
+    sheets = [
+        Image.new("RGB", (packer.width, b["height"]), (255, 255, 255))
+        for b in packer.bins
+    ]
+    mapping = {}
+    failed = []
+    for key, index, x, y in placements:
+        path, box = key
+        try:
+            sheets[index].paste(load_tile(path, tile, box), (x, y))
+        except Exception as e:
+            failed.append((path, f"{type(e).__name__}: {e}"))
+            continue
+        for person_id in by_path[key]:
+            mapping[person_id] = {"atlas": index, "x": x, "y": y, "w": tile, "h": tile}
+
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    atlases = []
+    total_bytes = 0
+    for i, sheet in enumerate(sheets):
+        name = f"avatars-{i}.jpg"
+        out = os.path.join(ATLAS_DIR, name)
+        save_image_atomic(sheet, out, "JPEG", quality=args.quality, optimize=True, progressive=True)
+        total_bytes += os.path.getsize(out)
+        atlases.append({"url": f"{ATLAS_URL_PREFIX}/{name}", "width": sheet.width, "height": sheet.height})
+    # 删除上次构建多出来的图集
+    for name in os.listdir(ATLAS_DIR):
+        if name.startswith("avatars-") and name not in {os.path.basename(a["url"]) for a in atlases}:
+            os.remove(os.path.join(ATLAS_DIR, name))
+
+    _save_json(ATLAS_MAP_FILE, {
+        "tileSize": tile,
+        "atlases": atlases,
+        "persons": dict(sorted(mapping.items(), key=lambda kv: int(kv[0]) if kv[0].isdigit() else kv[0])),
+    })
+
+    print(f"[build_avatar_atlas] persons={len(mapping)} tiles={len(placements) - len(failed)} atlases={len(atlases)} "
+          f"bytes={total_bytes} missing_files={skipped} failed={len(failed)}")
+    print(f"- map: {ATLAS_MAP_FILE}")
+    for path, error in failed:
+        print(f"- failed: {os.path.relpath(path, PUBLIC_DIR)} ({error})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+头像正方形裁剪（构建时）
+
+头像在页面上以小方块/圆形显示，但浏览器下载的是完整的百科图片（常为横幅扫描件）再在客户端缩放。
+本脚本为每个人物的头像计算正方形裁剪框，并输出预先裁好的 64/128/256px 版本：
+  frontend/public/images/avatars/<尺寸>/<人物ID>.jpg
+
+裁剪框选择：在缩小后的图片上计算显著性图（亮度梯度能量 + 肤色加权 + 轻微的中心/上部先验），
+用一维累积和在长边方向上滑动，取显著性总和最大的正方形窗口。
+
+裁剪框记录在 scripts/avatar_crops.json：
+  {"<人物ID>": {"avatarUrl", "sha256", "size": [width, height], "box": [left, top, right, bottom], "manual": false}}
+- 把某条记录的 manual 改为 true 并手工调整 box，重新构建时会保留；
+  图片内容变了但尺寸相同（如重新压缩）时沿用并提示，尺寸变了或 box 超出图片时丢弃手工框、改为自动计算并提示
+- 自动记录在图片内容（sha256）不变时沿用，不重复计算
+build_avatar_atlas.py 会使用这里的裁剪框。
+
+运行方式（在仓库根目录）：
+  python scripts/build_avatar_crops.py
+  python scripts/build_avatar_crops.py --force
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from image_analysis import load_analysis_image, save_image_atomic, skin_mask
+from image_feature_cache import file_sha256
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PUBLIC_DIR = os.path.join(REPO_ROOT, "frontend", "public")
+PERSONS_FILE = os.path.join(PUBLIC_DIR, "data", "persons.json")
+AVATARS_DIR = os.path.join(PUBLIC_DIR, "images", "avatars")
+CROPS_FILE = os.path.join(REPO_ROOT, "scripts", "avatar_crops.json")
+
+OUTPUT_SIZES = [64, 128, 256]
+OUTPUT_QUALITY = 85
+# 显著性中肤色像素的权重（相对归一化后的梯度能量）
+SKIN_WEIGHT = 1.5
+# 沿长边的位置先验：横图偏中间，竖图偏上部（脸通常在上部）
+PRIOR_WEIGHT = 0.15
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def resolve_avatar(url):
+    if not url or not url.startswith("/images/"):
+        return None
+    path = os.path.join(PUBLIC_DIR, *url.lstrip("/").split("/"))
+    return path if os.path.isfile(path) else None
+
+
+def image_size(path):
+    with Image.open(path) as img:
+        return list(img.size)
+
+
+def box_fits(box, size):
+    left, top, right, bottom = box
+    return 0 <= left < right <= size[0] and 0 <= top < bottom <= size[1]
+
+
+def saliency_map(small):
+    """缩小后的 RGB 图 -> 显著性图（float 数组，与图同尺寸）"""
+    gray = np.asarray(small.convert("L"), dtype=np.float32)
+    energy = np.zeros_like(gray)
+    energy[:, 1:] += np.abs(np.diff(gray, axis=1))
+    energy[1:, :] += np.abs(np.diff(gray, axis=0))
+    peak = energy.max()
+    if peak > 0:
+        energy /= peak
+    return energy + SKIN_WEIGHT * skin_mask(small)
+
+
+def best_square(saliency, portrait):
+    """
+    在长边方向滑动边长为短边的正方形窗口，返回窗口起点（分析图坐标）
+    每个位置的得分 = 窗口内显著性总和（一维累积和求得）× 位置先验
+    """
+    h, w = saliency.shape
+    side = min(w, h)
+    profile = saliency.sum(axis=0) if w >= h else saliency.sum(axis=1)
+    n = len(profile) - side + 1
+    if n <= 1:
+        return 0
+    cums = np.concatenate(([0.0], np.cumsum(profile)))
+    window = cums[side:side + n] - cums[:n]
+    pos = np.linspace(0.0, 1.0, n)
+    # 竖图偏好靠上（约 1/4 处），横图偏好居中
+    target = 0.25 if portrait else 0.5
+    prior = 1.0 - PRIOR_WEIGHT * np.abs(pos - target)
+    return int(np.argmax(window * prior))
+
+
+def compute_crop_box(path):
+    """返回原图坐标下的正方形裁剪框 [left, top, right, bottom]"""
+    with Image.open(path) as img:
+        width, height = img.size
+        small = load_analysis_image(img)
+    sw, sh = small.size
+    offset = best_square(saliency_map(small), portrait=height > width)
+    side = min(width, height)
+    if width >= height:
+        left = min(width - side, round(offset * width / sw))
+        return [left, 0, left + side, side]
+    top = min(height - side, round(offset * height / sh))
+    return [0, top, side, top + side]
+
+
+def write_outputs(path, box, person_id):
+    with Image.open(path) as img:
+        crop = img.convert("RGB").crop(tuple(box))
+    for size in OUTPUT_SIZES:
+        out = os.path.join(AVATARS_DIR, str(size), f"{person_id}.jpg")
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        save_image_atomic(crop.resize((size, size), Image.LANCZOS), out, "JPEG", quality=OUTPUT_QUALITY, optimize=True)
+
+
+def outputs_exist(person_id):
+    return all(os.path.exists(os.path.join(AVATARS_DIR, str(s), f"{person_id}.jpg")) for s in OUTPUT_SIZES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按显著性计算头像正方形裁剪框并输出 64/128/256px 头像。")
+    parser.add_argument("--persons", default=PERSONS_FILE, help="人物数据文件")
+    parser.add_argument("--crops", default=CROPS_FILE, help="裁剪框记录（默认 scripts/avatar_crops.json）")
+    parser.add_argument("--force", action="store_true", help="重新计算全部自动裁剪框（manual 记录仍保留）")
+    args = parser.parse_args()
+
+    previous = _load_json(args.crops, {})
+    persons = _load_json(args.persons, [])
+    crops = {}
+    stats = {"computed": 0, "reused": 0, "manual": 0, "written": 0, "missing": 0}
+    warnings = []
+    sha_of_path = {}
+
+    for p in persons:
+        person_id = str(p.get("id"))
+        url = p.get("avatarUrl")
+        path = resolve_avatar(url)
+        prev = previous.get(person_id)
+        if path is None:
+            if prev and prev.get("manual"):
+                crops[person_id] = prev
+            stats["missing"] += 1 if url else 0
+            continue
+        if path not in sha_of_path:
+            sha_of_path[path] = file_sha256(path)
+        sha = sha_of_path[path]
+
+        manual = bool(prev and prev.get("manual") and prev.get("box"))
+        if manual and prev.get("sha256") != sha:
+            # 手工裁剪框绑定在当初的图片上：尺寸不变且仍在图内才沿用，否则改为自动计算
+            size = image_size(path)
+            old_size = prev.get("size")
+            if box_fits(prev["box"], size) and old_size in (None, size):
+                warnings.append(f"id={person_id} 头像图片已变化（尺寸 {size[0]}x{size[1]} 未变），沿用手工裁剪框 {prev['box']}，请确认")
+            else:
+                old = f"{old_size[0]}x{old_size[1]}" if old_size else "未知"
+                warnings.append(f"id={person_id} 头像图片已更换（尺寸 {old} -> {size[0]}x{size[1]}），"
+                                f"手工裁剪框 {prev['box']} 不再适用，已改为自动计算")
+                manual = False
+
+        if manual:
+            entry = dict(prev, avatarUrl=url, sha256=sha)
+            entry.setdefault("size", image_size(path))
+            stats["manual"] += 1
+        elif prev and not prev.get("manual") and not args.force and prev.get("sha256") == sha and prev.get("box"):
+            entry = prev
+            stats["reused"] += 1
+        else:
+            entry = {"avatarUrl": url, "sha256": sha, "size": image_size(path), "box": compute_crop_box(path), "manual": False}
+            stats["computed"] += 1
+
+        # 裁剪框或图片变化、或输出缺失时才重新输出
+        changed = (not prev or prev.get("box") != entry["box"] or prev.get("sha256") != sha)
+        if changed or args.force or not outputs_exist(person_id):
+            write_outputs(path, entry["box"], person_id)
+            stats["written"] += 1
+        crops[person_id] = entry
+
+    _save_json(args.crops, dict(sorted(crops.items(), key=lambda kv: int(kv[0]) if kv[0].isdigit() else kv[0])))
+    print(f"[build_avatar_crops] persons={len(crops)} computed={stats['computed']} reused={stats['reused']} "
+          f"manual={stats['manual']} written={stats['written']} missing_files={stats['missing']}")
+    print(f"- crops: {os.path.abspath(args.crops)}")
+    for w in warnings:
+        print(f"- warning: {w}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+头像占位图（blurhash + LQIP）构建
+
+为 persons.json 中每个本地 avatarUrl 计算：
+- blurhash：约 20~30 个字符的模糊占位编码（前端解码后绘制到 canvas）
+- lqip：16px 以内的极小 JPEG，base64 data URI，可直接作为 <img> / CSS 背景
+- width / height：原图尺寸，前端可提前按比例占位，避免加载时布局跳动
+
+结果写入 frontend/public/data/avatar_placeholders.json（按人物ID索引）。
+blurhash 的 DCT 分量用 NumPy 一次矩阵运算得到；每个条目记录图片内容的 sha256，
+图片未变化时直接沿用上次的结果，相同内容的图片只计算一次。
+
+运行方式（在仓库根目录）：
+  python scripts/build_avatar_placeholders.py
+  python scripts/build_avatar_placeholders.py --components 4x4 --lqip-size 12 --force
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from image_feature_cache import file_sha256
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PUBLIC_DIR = os.path.join(REPO_ROOT, "frontend", "public")
+PERSONS_FILE = os.path.join(PUBLIC_DIR, "data", "persons.json")
+PLACEHOLDERS_FILE = os.path.join(PUBLIC_DIR, "data", "avatar_placeholders.json")
+
+BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+# 计算 blurhash 前先缩小到该边长以内（分量很少，无需更多像素）
+BLURHASH_SAMPLE_SIZE = 32
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _base83(value, length):
+    return "".join(BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _srgb_to_linear(x):
+    x = x / 255.0
+    return np.where(x <= 0.04045, x / 12.92, ((x + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(v):
+    v = min(max(v, 0.0), 1.0)
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash_encode(rgb, x_components=4, y_components=3):
+    """
+    rgb: (高, 宽, 3) 的 uint8 数组
+    所有分量一次算出：factors[j, i, c] = Σ cos(πjy/H)·cos(πix/W)·linear[y, x, c]
+    """
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError("blurhash 分量数需在 1~9 之间")
+    height, width = rgb.shape[:2]
+    linear = _srgb_to_linear(rgb.astype(np.float64))
+
+    basis_x = np.cos(np.pi * np.arange(x_components)[:, None] * np.arange(width)[None, :] / width)
+    basis_y = np.cos(np.pi * np.arange(y_components)[:, None] * np.arange(height)[None, :] / height)
+    factors = np.einsum("jy,yxc,ix->jic", basis_y, linear, basis_x) / (width * height)
+    factors[1:, :, :] *= 2
+    factors[0, 1:, :] *= 2
+
+    dc = factors[0, 0]
+    ac = factors.reshape(-1, 3)[1:]
+
+    parts = [_base83((x_components - 1) + (y_components - 1) * 9, 1)]
+    if len(ac):
+        actual_max = float(np.abs(ac).max())
+        quantised_max = int(max(0, min(82, np.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        parts.append(_base83(quantised_max, 1))
+    else:
+        max_value = 1.0
+        parts.append(_base83(0, 1))
+
+    parts.append(_base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4))
+
+    if len(ac):
+        scaled = np.sign(ac) * np.abs(ac / max_value) ** 0.5
+        quant = np.clip(np.floor(scaled * 9 + 9.5), 0, 18).astype(int)
+        for r, g, b in quant:
+            parts.append(_base83(int(r) * 19 * 19 + int(g) * 19 + int(b), 2))
+    return "".join(parts)
+
+
+def lqip_data_uri(img, size, quality=40):
+    tiny = img.copy()
+    tiny.thumbnail((size, size), Image.BILINEAR)
+    buf = io.BytesIO()
+    tiny.save(buf, "JPEG", quality=quality, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def compute_placeholder(path, x_components, y_components, lqip_size):
+    with Image.open(path) as img:
+        width, height = img.size
+        img.draft("RGB", (BLURHASH_SAMPLE_SIZE * 2, BLURHASH_SAMPLE_SIZE * 2))
+        rgb = img.convert("RGB")
+    small = rgb.copy()
+    small.thumbnail((BLURHASH_SAMPLE_SIZE, BLURHASH_SAMPLE_SIZE), Image.BILINEAR)
+    return {
+        "width": width,
+        "height": height,
+        "blurhash": blurhash_encode(np.asarray(small), x_components, y_components),
+        "lqip": lqip_data_uri(rgb, lqip_size),
+    }
+
+
+def resolve_avatar(url):
+    if not url or not url.startswith("/images/"):
+        return None
+    path = os.path.join(PUBLIC_DIR, *url.lstrip("/").split("/"))
+    return path if os.path.isfile(path) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="为人物头像生成 blurhash / LQIP 占位图索引。")
+    parser.add_argument("--persons", default=PERSONS_FILE, help="人物数据文件")
+    parser.add_argument("--output", default=PLACEHOLDERS_FILE, help="占位图索引输出路径")
+    parser.add_argument("--components", default="4x3", help="blurhash 分量数 XxY（默认 4x3）")
+    parser.add_argument("--lqip-size", type=int, default=16, help="LQIP 最大边长（默认 16）")
+    parser.add_argument("--force", action="store_true", help="忽略已有结果，全部重新计算")
+    args = parser.parse_args()
+
+    try:
+        x_components, y_components = (int(v) for v in args.components.lower().split("x"))
+    except ValueError:
+        raise SystemExit(f"--components 格式应为 XxY，例如 4x3：{args.components}")
+    settings = {"components": f"{x_components}x{y_components}", "lqipSize": args.lqip_size}
+
+    previous = {} if args.force else _load_json(args.output, {})
+    if previous.get("settings") != settings:
+        previous = {}
+    # 按内容哈希索引上次的结果：图片没变就直接复用
+    by_sha = {e["sha256"]: e for e in previous.get("persons", {}).values() if e.get("sha256")}
+
+    persons = _load_json(args.persons, [])
+    entries = {}
+    computed = reused = missing = 0
+    sha_of_path = {}
+    for p in persons:
+        url = p.get("avatarUrl")
+        path = resolve_avatar(url)
+        if path is None:
+            missing += 1 if url else 0
+            continue
+        if path not in sha_of_path:
+            sha_of_path[path] = file_sha256(path)
+        sha = sha_of_path[path]
+        if sha in by_sha:
+            placeholder = {k: by_sha[sha][k] for k in ("width", "height", "blurhash", "lqip")}
+            reused += 1
+        else:
+            try:
+                placeholder = compute_placeholder(path, x_components, y_components, args.lqip_size)
+            except Exception as e:
+                print(f"- failed: {url} ({type(e).__name__}: {e})")
+                continue
+            by_sha[sha] = {"sha256": sha, **placeholder}
+            computed += 1
+        entries[str(p.get("id"))] = {"avatarUrl": url, "sha256": sha, **placeholder}
+
+    _save_json(args.output, {"settings": settings, "persons": entries})
+    lqip_bytes = sum(len(e["lqip"]) for e in entries.values())
+    print(f"[build_avatar_placeholders] persons={len(entries)} computed={computed} reused={reused} "
+          f"missing_files={missing} lqip_bytes={lqip_bytes}")
+    print(f"- output: {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缩略图与响应式尺寸图构建
+
+从 frontend/public/images/full 重新生成：
+- thumbs/small、thumbs/medium：与 ImagesPipeline 的 IMAGES_THUMBS 一致（50x50 / 100x100 以内，JPEG）
+- variants/<宽度>w：响应式图片（按宽度缩小，渐进式 JPEG；原图不够宽时不生成）
+
+手工修复或 fix_persons_avatars.py 分配的头像因此也有缩略图。
+构建清单（scripts/.cache/image_variants_manifest.json）记录每个原图的内容哈希与输出，
+再次运行时只处理内容变化、新增或输出缺失的原图；原图删除后其输出一并删除。多进程并行。
+
+运行方式（在仓库根目录）：
+  python scripts/build_image_variants.py
+  python scripts/build_image_variants.py --force --workers 8
+"""
+
+import argparse
+import json
+import os
+import time
+
+from PIL import Image
+
+from image_analysis import parallel_map, save_image_atomic
+from image_feature_cache import IMAGE_EXTS, file_sha256
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMAGES_ROOT = os.path.join(REPO_ROOT, "frontend", "public", "images")
+SOURCE_DIR = os.path.join(IMAGES_ROOT, "full")
+DEFAULT_MANIFEST = os.path.join(REPO_ROOT, "scripts", ".cache", "image_variants_manifest.json")
+
+# 与爬虫 settings.py 中的 IMAGES_THUMBS 保持一致
+THUMBS = {
+    "small": (50, 50),
+    "medium": (100, 100),
+}
+THUMB_QUALITY = 75
+
+# 响应式宽度（前端 srcset 使用）
+VARIANT_WIDTHS = [160, 320, 640]
+VARIANT_QUALITY = 82
+
+
+def output_specs():
+    """[(相对 images 根目录的输出目录, 最大尺寸, 质量, 是否渐进式, 是否只在原图更大时生成)]"""
+    specs = [(f"thumbs/{name}", size, THUMB_QUALITY, False, False) for name, size in THUMBS.items()]
+    specs += [(f"variants/{w}w", (w, w * 4), VARIANT_QUALITY, True, True) for w in VARIANT_WIDTHS]
+    return specs
+
+
+def config_signature():
+    """输出配置变化时需要全部重建"""
+    return json.dumps(output_specs(), sort_keys=True)
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def output_name(source_name):
+    return f"{os.path.splitext(source_name)[0]}.jpg"
+
+
+def _to_rgb(img):
+    """与 ImagesPipeline 一致：带透明通道的图片铺白底后转 RGB"""
+    if img.mode == "P":
+        img = img.convert("RGBA")
+    if img.mode in ("RGBA", "LA"):
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    img.load()
+    return img
+
+
+def build_one(task):
+    """
+    为一个原图生成全部输出（在子进程中执行，原图只解码一次）
+    task: (原图路径, 原图文件名)；返回 {'outputs': [相对路径], 'error': str|None}
+    """
+    path, name = task
+    outputs = []
+    try:
+        with Image.open(path) as img:
+            width = img.size[0]
+            # JPEG 在解码阶段按 1/2、1/4、1/8 缩小，但保证两边都不小于最大输出宽度
+            img.draft("RGB", (max(VARIANT_WIDTHS), max(VARIANT_WIDTHS)))
+            rgb = _to_rgb(img)
+            for out_dir, size, quality, progressive, only_if_larger in output_specs():
+                if only_if_larger and width <= size[0]:
+                    continue
+                thumb = rgb.copy()
+                thumb.thumbnail(size, Image.LANCZOS)
+                rel = f"{out_dir}/{output_name(name)}"
+                dst = os.path.join(IMAGES_ROOT, *rel.split("/"))
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                # 临时文件 + os.replace：中断时不留半截文件，也不会穿过 image_store 的符号链接改写共享对象
+                save_image_atomic(thumb, dst, "JPEG", quality=quality, optimize=progressive, progressive=progressive)
+                outputs.append(rel)
+    except Exception as e:
+        return {"outputs": outputs, "error": f"{type(e).__name__}: {e}"}
+    return {"outputs": sorted(outputs), "error": None}
+
+
+def remove_outputs(rels):
+    for rel in rels:
+        path = os.path.join(IMAGES_ROOT, *rel.split("/"))
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从 images/full 增量并行生成缩略图与响应式尺寸图。")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="构建清单路径（默认 scripts/.cache/image_variants_manifest.json）")
+    parser.add_argument("--force", action="store_true", help="忽略清单，全部重建")
+    parser.add_argument("--workers", type=int, help="进程数（默认 CPU 核数）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = _load_json(args.manifest, {})
+    if args.force or manifest.get("config") != config_signature():
+        entries = {}
+    else:
+        entries = manifest.get("sources", {})
+
+    sources = sorted(n for n in os.listdir(SOURCE_DIR) if n.lower().endswith(IMAGE_EXTS))
+    todo = []
+    for name in sources:
+        path = os.path.join(SOURCE_DIR, name)
+        st = os.stat(path)
+        prev = entries.get(name)
+        # 大小与修改时间未变时沿用记录的哈希，避免每次都读全文件
+        if prev and prev.get("size") == st.st_size and prev.get("mtime_ns") == st.st_mtime_ns:
+            sha = prev["sha256"]
+        else:
+            sha = file_sha256(path)
+        outputs_ok = prev and all(
+            os.path.exists(os.path.join(IMAGES_ROOT, *rel.split("/"))) for rel in prev.get("outputs", [])
+        )
+        if prev and prev.get("sha256") == sha and outputs_ok and not prev.get("error"):
+            prev.update(size=st.st_size, mtime_ns=st.st_mtime_ns)
+            continue
+        entries[name] = {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        todo.append(name)
+
+    # 原图已删除：删除其输出
+    source_set = set(sources)
+    removed = [n for n in entries if n not in source_set]
+    for name in removed:
+        remove_outputs(entries.pop(name).get("outputs", []))
+
+    errors = []
+    written = 0
+    tasks = [(os.path.join(SOURCE_DIR, n), n) for n in todo]
+    for name, result in zip(todo, parallel_map(build_one, tasks, args.workers)):
+        entries[name]["outputs"] = result["outputs"]
+        entries[name]["error"] = result["error"]
+        written += len(result["outputs"])
+        if result["error"]:
+            errors.append((name, result["error"]))
+
+    _save_json(args.manifest, {"config": config_signature(), "sources": dict(sorted(entries.items()))})
+    elapsed = time.perf_counter() - start
+    print(f"[build_image_variants] sources={len(sources)} rebuilt={len(todo)} skipped={len(sources) - len(todo)} "
+          f"removed={len(removed)} outputs_written={written} errors={len(errors)} seconds={elapsed:.2f}")
+    for name, error in errors:
+        print(f"- error: {name} ({error})")
+
+
+if __name__ == "__main__":
+    main()
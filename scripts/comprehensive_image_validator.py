@@ -7,9 +7,10 @@
 2. 检查图片文件可访问性和完整性
 3. 验证图片命名规则和URL路径
 4. 生成完整的验证报告
-5. 自动修复常见问题
+5. 自动修复常见问题（加 --no-fix 只验证、不修改数据）
 """
 
+import argparse
 import os
 import json
 import hashlib
@@ -18,9 +19,16 @@ from pathlib import Path
 from typing import Dict, List, Tuple, Any
 from datetime import datetime
 
+from image_feature_cache import DEFAULT_CACHE_PATH, cached_analyze_images
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
 class HistoricalImageValidator:
-    def __init__(self):
-        self.base_dir = Path("d:/MyFile/Coder/HistoricalThreads")
+    def __init__(self, workers=None, cache_path=DEFAULT_CACHE_PATH, base_dir=None):
+        self.base_dir = Path(base_dir) if base_dir else REPO_ROOT
         self.frontend_dir = self.base_dir / "frontend"
         self.data_dir = self.frontend_dir / "public" / "data"
         self.images_dir = self.frontend_dir / "public" / "images" / "full"
@@ -29,6 +37,18 @@ class HistoricalImageValidator:
         self.events_file = self.data_dir / "events.json"
         self.validation_report_file = self.base_dir / "scripts" / "comprehensive_validation_report.json"
         
+        # 图片分析结果（文件名 -> image_analysis.analyze_image 结果），每次运行只分析一次
+        self.workers = workers
+        self.cache_path = cache_path
+        self.image_analysis = None
+        
+        # 内存快照：数据集各读一次、图片目录扫描一次，所有检查都基于快照上的索引
+        self.snapshot_loaded = False
+        self.persons_data = None
+        self.events_data = None
+        self.image_entries: Dict[str, Dict[str, int]] = {}
+        self.image_files: List[str] = []
+        
         self.stats = {
             "total_persons": 0,
             "total_events": 0,
@@ -36,25 +56,76 @@ class HistoricalImageValidator:
             "persons_with_avatars": 0,
             "events_with_images": 0,
             "missing_avatars": [],
-            "missing_event_images": [],
+            # 事件没有配图很常见，只作覆盖率信息，不算问题、不计入质量分数
+            "events_without_images": [],
             "invalid_images": [],
             "duplicate_names": [],
             "orphaned_images": [],
             "fixed_issues": []
         }
 
-    def get_image_files(self) -> List[str]:
-        """获取所有图片文件列表"""
+    def _load_dataset(self, path: Path, label: str):
+        """读取一个数据集；失败时返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            print(f"✅ 成功加载 {len(data)} 个{label}记录")
+            return data
+        except Exception as e:
+            print(f"❌ 加载{label}数据失败: {e}")
+            return None
+
+    def _scan_images(self) -> None:
+        """用 os.scandir 扫描一次图片目录，记录每个文件的大小和修改时间"""
+        self.image_entries = {}
         if not self.images_dir.exists():
             print(f"❌ 图片目录不存在: {self.images_dir}")
-            return []
-        
-        image_files = []
-        for file in self.images_dir.iterdir():
-            if file.is_file() and file.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-                image_files.append(file.name)
-        
-        return sorted(image_files)
+        else:
+            with os.scandir(self.images_dir) as it:
+                for entry in it:
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTS:
+                        st = entry.stat()
+                        self.image_entries[entry.name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        self.image_files = sorted(self.image_entries)
+
+    def load_snapshot(self) -> None:
+        """建立内存快照（只做一次）"""
+        if self.snapshot_loaded:
+            return
+        self.persons_data = self._load_dataset(self.persons_file, "人物")
+        if self.events_file.exists():
+            self.events_data = self._load_dataset(self.events_file, "事件")
+        self._scan_images()
+        self.stats["total_images"] = len(self.image_files)
+        self.snapshot_loaded = True
+
+    def get_image_files(self) -> List[str]:
+        """获取所有图片文件列表（来自快照）"""
+        self.load_snapshot()
+        return self.image_files
+
+    def get_image_analysis(self) -> Dict[str, Dict[str, Any]]:
+        """并行解码并分析图片目录中的所有图片（每次运行只做一次；未变化的图片读特征缓存）"""
+        if self.image_analysis is None:
+            paths = [str(self.images_dir / name) for name in self.get_image_files()]
+            results = cached_analyze_images(paths, workers=self.workers, cache_path=self.cache_path)
+            self.image_analysis = {os.path.basename(path): r for path, r in results.items()}
+            print(f"✅ 已分析 {len(self.image_analysis)} 个图片文件")
+        return self.image_analysis
+
+    def check_image_decodable(self, image_filename: str) -> bool:
+        """图片能否正常解码（使用本次运行的分析结果）"""
+        result = self.get_image_analysis().get(image_filename)
+        return result is None or result["decodable"]
+
+    def check_image_reference(self, url: str) -> str:
+        """检查图片引用，返回问题描述；没有问题返回空字符串"""
+        image_filename = os.path.basename(url)
+        if image_filename not in self.image_entries:
+            return "图片文件不存在"
+        if not self.check_image_decodable(image_filename):
+            return "图片文件无法解码"
+        return ""
 
     def generate_person_hash(self, name: str) -> str:
         """为人物生成一致的哈希值"""
@@ -64,28 +135,23 @@ class HistoricalImageValidator:
         """验证人物数据完整性和图片对应关系"""
         print("🔍 开始验证人物数据...")
         
-        try:
-            with open(self.persons_file, 'r', encoding='utf-8') as f:
-                persons_data = json.load(f)
-            print(f"✅ 成功加载 {len(persons_data)} 个人物记录")
-        except Exception as e:
-            print(f"❌ 加载人物数据失败: {e}")
+        self.load_snapshot()
+        if self.persons_data is None:
             return False
+        persons_data = self.persons_data
         
         self.stats["total_persons"] = len(persons_data)
         
         # 检查重复姓名
-        names = [p.get('name', '') for p in persons_data if p.get('name', '').strip()]
-        name_counts = {}
-        for name in names:
-            name_counts[name] = name_counts.get(name, 0) + 1
+        name_counts: Dict[str, int] = {}
+        for p in persons_data:
+            name = p.get('name', '')
+            if name.strip():
+                name_counts[name] = name_counts.get(name, 0) + 1
         
         self.stats["duplicate_names"] = [name for name, count in name_counts.items() if count > 1]
         
         # 验证每个人的头像
-        image_files = self.get_image_files()
-        self.stats["total_images"] = len(image_files)
-        
         for person in persons_data:
             person_name = person.get('name', '')
             avatar_url = person.get('avatarUrl')
@@ -98,19 +164,17 @@ class HistoricalImageValidator:
                     "name": person_name,
                     "reason": "缺少头像URL"
                 })
+                continue
+            
+            reason = self.check_image_reference(avatar_url)
+            if reason:
+                self.stats["invalid_images"].append({
+                    "name": person_name,
+                    "avatar_url": avatar_url,
+                    "reason": reason
+                })
             else:
-                # 检查图片文件是否存在
-                image_filename = os.path.basename(avatar_url)
-                image_path = self.images_dir / image_filename
-                
-                if not image_path.exists():
-                    self.stats["invalid_images"].append({
-                        "name": person_name,
-                        "avatar_url": avatar_url,
-                        "reason": "图片文件不存在"
-                    })
-                else:
-                    self.stats["persons_with_avatars"] += 1
+                self.stats["persons_with_avatars"] += 1
         
         return True
 
@@ -118,45 +182,37 @@ class HistoricalImageValidator:
         """验证事件数据"""
         print("🔍 开始验证事件数据...")
         
+        self.load_snapshot()
         if not self.events_file.exists():
             print("⚠️  事件数据文件不存在，跳过事件验证")
             return True
-        
-        try:
-            with open(self.events_file, 'r', encoding='utf-8') as f:
-                events_data = json.load(f)
-            print(f"✅ 成功加载 {len(events_data)} 个事件记录")
-        except Exception as e:
-            print(f"❌ 加载事件数据失败: {e}")
+        if self.events_data is None:
             return False
+        events_data = self.events_data
         
         self.stats["total_events"] = len(events_data)
         
         for event in events_data:
-            event_name = event.get('name', '')
+            # 事件数据使用 title 字段（兼容旧的 name）
+            event_name = event.get('title') or event.get('name') or ''
             image_url = event.get('imageUrl')
             
             if not event_name.strip():
                 continue
             
             if not image_url:
-                self.stats["missing_event_images"].append({
+                self.stats["events_without_images"].append(event_name)
+                continue
+            
+            reason = self.check_image_reference(image_url)
+            if reason:
+                self.stats["invalid_images"].append({
                     "name": event_name,
-                    "reason": "缺少图片URL"
+                    "image_url": image_url,
+                    "reason": f"事件{reason}"
                 })
             else:
-                # 检查事件图片文件是否存在
-                image_filename = os.path.basename(image_url)
-                image_path = self.images_dir / image_filename
-                
-                if not image_path.exists():
-                    self.stats["invalid_images"].append({
-                        "name": event_name,
-                        "image_url": image_url,
-                        "reason": "事件图片文件不存在"
-                    })
-                else:
-                    self.stats["events_with_images"] += 1
+                self.stats["events_with_images"] += 1
         
         return True
 
@@ -164,37 +220,22 @@ class HistoricalImageValidator:
         """查找孤立的图片文件"""
         print("🔍 查找孤立图片文件...")
         
-        image_files = set(self.get_image_files())
+        self.load_snapshot()
         used_images = set()
         
-        # 收集所有被使用的人物头像
-        try:
-            with open(self.persons_file, 'r', encoding='utf-8') as f:
-                persons_data = json.load(f)
-            
-            for person in persons_data:
-                avatar_url = person.get('avatarUrl')
-                if avatar_url:
-                    used_images.add(os.path.basename(avatar_url))
-        except:
-            pass
-        
-        # 收集所有被使用的事件图片
-        if self.events_file.exists():
-            try:
-                with open(self.events_file, 'r', encoding='utf-8') as f:
-                    events_data = json.load(f)
-                
-                for event in events_data:
-                    image_url = event.get('imageUrl')
-                    if image_url:
-                        used_images.add(os.path.basename(image_url))
-            except:
-                pass
+        # 收集所有被使用的人物头像和事件图片
+        for person in self.persons_data or []:
+            avatar_url = person.get('avatarUrl')
+            if avatar_url:
+                used_images.add(os.path.basename(avatar_url))
+        for event in self.events_data or []:
+            image_url = event.get('imageUrl')
+            if image_url:
+                used_images.add(os.path.basename(image_url))
         
         # 找出孤立图片
-        orphaned = image_files - used_images
-        self.stats["orphaned_images"] = list(orphaned)
+        orphaned = [name for name in self.image_files if name not in used_images]
+        self.stats["orphaned_images"] = orphaned
         print(f"📊 发现 {len(orphaned)} 个孤立图片文件")
 
     def auto_fix_common_issues(self) -> bool:
@@ -208,9 +249,7 @@ class HistoricalImageValidator:
             print(f"正在为 {len(self.stats['missing_avatars'])} 个人物分配头像...")
             
             try:
-                with open(self.persons_file, 'r', encoding='utf-8') as f:
-                    persons_data = json.load(f)
-                
+                persons_data = self.persons_data
                 image_files = self.get_image_files()
                 if not image_files:
                     print("❌ 没有可用的图片文件进行分配")
@@ -263,18 +302,18 @@ class HistoricalImageValidator:
                 "persons_with_avatars": self.stats["persons_with_avatars"],
                 "events_with_images": self.stats["events_with_images"],
                 "avatar_coverage": f"{(self.stats['persons_with_avatars'] / max(1, self.stats['total_persons']) * 100):.1f}%",
+                "events_without_images": len(self.stats["events_without_images"]),
                 "data_quality_score": self.calculate_quality_score()
             },
             "issues_found": {
                 "missing_avatars": len(self.stats["missing_avatars"]),
-                "missing_event_images": len(self.stats["missing_event_images"]),
                 "invalid_images": len(self.stats["invalid_images"]),
                 "duplicate_names": len(self.stats["duplicate_names"]),
                 "orphaned_images": len(self.stats["orphaned_images"])
             },
             "details": {
                 "missing_avatars": self.stats["missing_avatars"],
-                "missing_event_images": self.stats["missing_event_images"],
+                "events_without_images": self.stats["events_without_images"],
                 "invalid_images": self.stats["invalid_images"],
                 "duplicate_names": self.stats["duplicate_names"],
                 "orphaned_images": self.stats["orphaned_images"]
@@ -298,7 +337,6 @@ class HistoricalImageValidator:
         
         issues = (
             len(self.stats["missing_avatars"]) +
-            len(self.stats["missing_event_images"]) +
             len(self.stats["invalid_images"]) +
             len(self.stats["duplicate_names"])
         )
@@ -344,11 +382,11 @@ class HistoricalImageValidator:
         print(f"总图片数量: {self.stats['total_images']}")
         print(f"有人物头像: {self.stats['persons_with_avatars']}")
         print(f"有事件图片: {self.stats['events_with_images']}")
+        print(f"无事件图片: {len(self.stats['events_without_images'])}（不计入质量分数）")
         print(f"数据质量分数: {self.calculate_quality_score()}/100")
         
         print(f"\n🔍 问题统计:")
         print(f"缺少头像: {len(self.stats['missing_avatars'])}")
-        print(f"缺少事件图片: {len(self.stats['missing_event_images'])}")
         print(f"无效图片: {len(self.stats['invalid_images'])}")
         print(f"重复姓名: {len(self.stats['duplicate_names'])}")
         print(f"孤立图片: {len(self.stats['orphaned_images'])}")
@@ -360,11 +398,14 @@ class HistoricalImageValidator:
         
         print("\n" + "="*60)
 
-    def run_full_validation(self) -> bool:
-        """运行完整验证流程"""
+    def run_full_validation(self, fix: bool = True) -> bool:
+        """运行完整验证流程；fix=False 时只验证，不自动修复、不写回数据文件"""
         print("🚀 开始历史数据图片综合验证...")
         print(f"工作目录: {self.base_dir}")
         
+        # 0. 建立内存快照：数据集各读一次、图片目录扫描一次
+        self.load_snapshot()
+        
         # 1. 验证人物数据
         if not self.validate_persons_data():
             return False
@@ -376,8 +417,9 @@ class HistoricalImageValidator:
         # 3. 查找孤立图片
         self.find_orphaned_images()
         
-        # 4. 自动修复常见问题
-        self.auto_fix_common_issues()
+        # 4. 自动修复常见问题（会改写 persons.json，--no-fix 跳过）
+        if fix:
+            self.auto_fix_common_issues()
         
         # 5. 生成综合报告
         self.generate_comprehensive_report()
@@ -389,8 +431,17 @@ class HistoricalImageValidator:
 
 def main():
     """主函数"""
-    validator = HistoricalImageValidator()
-    success = validator.run_full_validation()
+    parser = argparse.ArgumentParser(description="验证人物/事件图片与数据的对应关系并生成报告。")
+    parser.add_argument("--workers", type=int, help="图片分析进程数（默认 CPU 核数，1 表示串行）")
+    parser.add_argument("--no-cache", action="store_true", help="不读写图片特征缓存（scripts/.cache/image_features.sqlite3）")
+    parser.add_argument("--no-fix", action="store_true", help="只验证、不修改数据（默认会为缺少头像的人物分配头像并写回 persons.json）")
+    args = parser.parse_args()
+    
+    validator = HistoricalImageValidator(
+        workers=args.workers,
+        cache_path=None if args.no_cache else DEFAULT_CACHE_PATH,
+    )
+    success = validator.run_full_validation(fix=not args.no_fix)
     
     if success:
         print("\n✅ 历史数据图片验证完成！")
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+离线端到端爬取基准：spider -> ImagesPipeline -> HistoricalCrawlerPipeline
+
+运行方式（在仓库根目录）：
+  python scripts/crawler/historical_crawler/crawl_bench.py --fixtures fixtures --scale 10000 --concurrency 32
+
+流程：
+- 启动本地 fixture_server（可配置延迟/错误率），不访问外网
+- 在临时目录中生成 persons/events/sources.json：fixture 词条按 --scale 克隆（孔子__1、孔子__2 ...），
+  人物/事件的归类参考 frontend/public/data 中的 persons.json / events.json
+- 用 PersonSpider / EventSpider（base_url 指向 fixture 服务器）完整跑一遍管道，图片与数据都写到临时目录
+- 报告 items/sec、写入字节数以及服务器侧请求/错误统计
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+from fixture_server import FixtureServer
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+DATA_DIR = os.path.join(REPO_ROOT, "frontend", "public", "data")
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def classify_fixtures(names):
+    """按仓库现有数据把 fixture 词条分为人物 / 事件；都不在时默认按人物处理"""
+    person_names = {p.get("name") for p in read_json(os.path.join(DATA_DIR, "persons.json")) if isinstance(p, dict)}
+    event_titles = {e.get("title") for e in read_json(os.path.join(DATA_DIR, "events.json")) if isinstance(e, dict)}
+    persons, events = [], []
+    for n in names:
+        if n in event_titles and n not in person_names:
+            events.append(n)
+        else:
+            persons.append(n)
+    return persons, events
+
+
+def clone_names(bases, total):
+    """把 bases 轮流克隆到 total 个：第一轮用原名，之后为 name__N"""
+    out = []
+    i = 0
+    while len(out) < total and bases:
+        base = bases[i % len(bases)]
+        k = i // len(bases)
+        out.append(base if k == 0 else f"{base}__{k}")
+        i += 1
+    return out
+
+
+def dir_size(path):
+    total = 0
+    files = 0
+    for dirpath, _, filenames in os.walk(path):
+        for n in filenames:
+            total += os.path.getsize(os.path.join(dirpath, n))
+            files += 1
+    return total, files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线端到端爬取基准（fixture 服务器 + 完整 item 管道）。")
+    parser.add_argument("--fixtures", required=True, help="fixture 根目录（见 fixture_server.py 的目录结构）")
+    parser.add_argument("--scale", type=int, default=0, help="克隆到的实体总数（默认 0 表示每个 fixture 只跑一次）")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发请求数（基准时不使用 DOWNLOAD_DELAY）")
+    parser.add_argument("--latency-ms", type=float, default=0, help="fixture 服务器平均延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fixture 服务器返回 503 的概率")
+    parser.add_argument("--work-dir", help="输出目录（默认临时目录，结束后删除）")
+    parser.add_argument("--keep", action="store_true", help="保留输出目录便于检查")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.fixtures, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    bases = server.page_names()
+    if not bases:
+        raise SystemExit(f"fixture 目录中没有页面：{os.path.join(server.root, 'baike.baidu.com', 'item')}")
+    server.start_background()
+
+    work_dir = os.path.abspath(args.work_dir) if args.work_dir else tempfile.mkdtemp(prefix="crawl_bench_")
+    data_dir = os.path.join(work_dir, "data")
+    images_dir = os.path.join(work_dir, "images")
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(images_dir, exist_ok=True)
+
+    base_persons, base_events = classify_fixtures(bases)
+    total = max(args.scale, len(bases))
+    n_persons = round(total * len(base_persons) / len(bases))
+    persons = clone_names(base_persons, n_persons)
+    events = clone_names(base_events, total - n_persons)
+
+    # 安全增量模式只更新已存在条目，因此预先生成对应的数据集
+    write_json(os.path.join(data_dir, "persons.json"), [{"id": i + 1, "name": n} for i, n in enumerate(persons)])
+    write_json(os.path.join(data_dir, "events.json"), [{"id": i + 1, "title": n} for i, n in enumerate(events)])
+    write_json(os.path.join(data_dir, "sources.json"), [])
+    names_files = {}
+    for kind, names in (("person", persons), ("event", events)):
+        if names:
+            path = os.path.join(work_dir, f"{kind}_names.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(names))
+            names_files[kind] = path
+
+    # Scrapy 项目目录（确保 get_project_settings 能读取 scrapy.cfg）
+    os.chdir(os.path.abspath(os.path.dirname(__file__)))
+    settings = get_project_settings()
+    settings.set("IMAGES_STORE", images_dir)
+    settings.set("HISTORICAL_CRAWLER_DATA_DIR", data_dir)
+    settings.set("HISTORICAL_CRAWLER_SELECTOR_STATS", None)
+    settings.set("DOWNLOAD_DELAY", 0)
+    settings.set("CONCURRENT_REQUESTS", args.concurrency)
+    settings.set("CONCURRENT_REQUESTS_PER_DOMAIN", args.concurrency)
+    settings.set("LOG_LEVEL", "WARNING")
+
+    counts = {"items": 0}
+
+    def on_item(item, response, spider):
+        counts["items"] += 1
+
+    process = CrawlerProcess(settings)
+    for kind, path in names_files.items():
+        crawler = process.create_crawler(kind)
+        crawler.signals.connect(on_item, signal=signals.item_scraped)
+        process.crawl(crawler, names_file=path, base_url=server.base_url)
+
+    start = time.perf_counter()
+    process.start()
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+
+    image_bytes, image_files = dir_size(images_dir)
+    data_bytes, _ = dir_size(data_dir)
+    print(
+        f"[crawl_bench] entities={len(persons) + len(events)} persons={len(persons)} events={len(events)} "
+        f"items={counts['items']} seconds={elapsed:.2f} items_per_sec={counts['items'] / elapsed if elapsed else 0:.2f}"
+    )
+    print(f"- images: files={image_files} bytes={image_bytes}")
+    print(f"- data: bytes={data_bytes}")
+    print(f"- server: requests={server.stats['requests']} errors={server.stats['errors']} bytes={server.stats['bytes']}")
+
+    if args.keep or args.work_dir:
+        print(f"- work_dir: {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
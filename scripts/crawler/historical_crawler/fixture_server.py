@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+本地 fixture HTTP 服务器：离线提供已保存的百科词条页面和图片
+
+目录结构（与线上路径一一对应）：
+  <root>/baike.baidu.com/item/孔子.html          -> GET /item/孔子
+  <root>/bkimg.cdn.bcebos.com/pic/xxx.jpg        -> GET /bkimg.cdn.bcebos.com/pic/xxx.jpg
+
+- 页面中指向图片 CDN 的绝对地址会被改写到本服务器，保证整条爬取链路不出网
+- 词条名带 `__N` 后缀（如 /item/孔子__17）时返回基础词条的克隆：<title>/<h1>、指向词条自身的 /item/ 链接
+  和 PAGE_DATA 的词条名字段替换为克隆名（正文中碰巧包含词条名的文字不动，“禹”这类短名也不会误伤），
+  图片地址追加 ?clone=N，使每个克隆的图片URL（以及 ImagesPipeline 的落盘文件）互不相同
+- 支持配置延迟（--latency-ms）与错误率（--error-rate，返回 503），图片支持 Range 请求
+
+单独运行：
+  python scripts/crawler/historical_crawler/fixture_server.py --root fixtures --port 8765
+"""
+
+import argparse
+import json
+import mimetypes
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+
+PAGE_HOST = 'baike.baidu.com'
+IMAGE_HOSTS = ['bkimg.cdn.bcebos.com', 'baikebcs.bdimg.com']
+
+CLONE_RE = re.compile(r'^(.+)__(\d+)$')
+IMAGE_URL_RE = re.compile(r'(?:https?:)?//(' + '|'.join(re.escape(h) for h in IMAGE_HOSTS) + r')(/[^"\'\s)?#]*)')
+RANGE_RE = re.compile(r'bytes=(\d+)-(\d*)')
+TITLE_TAG_RE = re.compile(r'(<(title|h1)\b[^>]*>)(.*?)(</\2\s*>)', re.S | re.I)
+
+
+def clone_page(html, base, name):
+    """把基础词条页面改写为克隆词条：只改标题标签、自身链接和 PAGE_DATA 的词条名字段"""
+    html = TITLE_TAG_RE.sub(lambda m: m.group(1) + m.group(3).replace(base, name) + m.group(4), html)
+    for old, new in ((base, name), (quote(base), quote(name))):
+        html = re.sub(r'(/item/)' + re.escape(old) + r'(?=["\'?#/])', lambda m: m.group(1) + new, html)
+    # PAGE_DATA 中的 "lemmaTitle"/"title" 字段（可能是原文，也可能是 \uXXXX 转义）
+    for old, new in ((base, name), (json.dumps(base)[1:-1], json.dumps(name)[1:-1])):
+        html = re.sub(r'("(?:lemmaTitle|title)"\s*:\s*")' + re.escape(old) + '"', lambda m: m.group(1) + new + '"', html)
+    return html
+
+
+def split_clone(name):
+    """孔子__17 -> ('孔子', 17)；非克隆名返回 (name, 0)"""
+    m = CLONE_RE.match(name)
+    if m:
+        return m.group(1), int(m.group(2))
+    return name, 0
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = 'HistoricalFixture/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        server = self.server
+        if server.latency > 0:
+            time.sleep(server.latency * (0.5 + random.random()))
+        if server.error_rate > 0 and random.random() < server.error_rate:
+            self._send(503, b'fixture error', 'text/plain')
+            return
+
+        path = unquote(urlsplit(self.path).path)
+        if path.startswith('/item/'):
+            self._serve_page(path[len('/item/'):])
+            return
+        parts = path.lstrip('/').split('/', 1)
+        if len(parts) == 2 and parts[0] in IMAGE_HOSTS:
+            self._serve_file(os.path.join(server.root, parts[0], *parts[1].split('/')))
+            return
+        self._send(404, b'not found', 'text/plain')
+
+    def _serve_page(self, name):
+        server = self.server
+        base, clone = split_clone(name)
+        html = server.load_page(base)
+        if html is None:
+            self._send(404, b'not found', 'text/plain')
+            return
+
+        suffix = f'?clone={clone}' if clone else ''
+
+        def rewrite(m):
+            return f'http://{server.address}/{m.group(1)}{m.group(2)}{suffix}'
+
+        html = IMAGE_URL_RE.sub(rewrite, html)
+        if clone:
+            html = clone_page(html, base, name)
+        self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def _serve_file(self, file_path):
+        file_path = os.path.normpath(file_path)
+        if not file_path.startswith(self.server.root) or not os.path.isfile(file_path):
+            self._send(404, b'not found', 'text/plain')
+            return
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        content_type = mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+
+        m = RANGE_RE.match(self.headers.get('Range') or '')
+        if m:
+            start = int(m.group(1))
+            end = int(m.group(2)) if m.group(2) else len(data) - 1
+            end = min(end, len(data) - 1)
+            if start <= end:
+                self._send(206, data[start:end + 1], content_type,
+                           {'Content-Range': f'bytes {start}-{end}/{len(data)}'})
+                return
+        self._send(200, data, content_type)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count(status, len(body))
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, root, host='127.0.0.1', port=0, latency_ms=0, error_rate=0.0, verbose=False):
+        super().__init__((host, port), FixtureHandler)
+        self.root = os.path.abspath(root)
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self.address = f'{host}:{self.server_address[1]}'
+        self.base_url = f'http://{self.address}'
+        self._pages = {}
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'bytes': 0}
+
+    def page_names(self):
+        page_dir = os.path.join(self.root, PAGE_HOST, 'item')
+        if not os.path.isdir(page_dir):
+            return []
+        return sorted(os.path.splitext(n)[0] for n in os.listdir(page_dir) if n.endswith('.html'))
+
+    def load_page(self, name):
+        with self._lock:
+            if name not in self._pages:
+                path = os.path.join(self.root, PAGE_HOST, 'item', f'{name}.html')
+                html = None
+                if os.path.isfile(path):
+                    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                        html = f.read()
+                self._pages[name] = html
+            return self._pages[name]
+
+    def count(self, status, nbytes):
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += nbytes
+            if status >= 500:
+                self.stats['errors'] += 1
+
+    def start_background(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 fixture 服务器：按线上路径提供已保存的百科页面与图片。")
+    parser.add_argument('--root', required=True, help='fixture 根目录（含 baike.baidu.com/item/*.html 与图片 CDN 目录）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0, help='平均响应延迟（毫秒，实际在 0.5~1.5 倍之间抖动）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回 503 的概率（0~1）')
+    parser.add_argument('--verbose', action='store_true', help='打印访问日志')
+    args = parser.parse_args()
+
+    server = FixtureServer(args.root, args.host, args.port, args.latency_ms, args.error_rate, args.verbose)
+    print(f"[fixture_server] serving {server.root} at {server.base_url} pages={len(server.page_names())}")
+    print(f"- 爬虫参数：-a base_url={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+候选图片探测与评分
+
+只下载图片的前几 KB（Range 请求），从文件头解析出格式与尺寸，
+再按“是否适合做人物头像”打分，用于在完整下载前挑出唯一的头像候选。
+"""
+
+from PIL import ImageFile
+
+
+# 头像适合的格式加分（GIF 多为图标/动图，PNG 多为示意图/截图）
+FORMAT_SCORES = {
+    'JPEG': 1.0,
+    'WEBP': 0.8,
+    'PNG': 0.3,
+    'GIF': -1.0,
+}
+
+# 小于该边长的图片基本是图标/占位图
+MIN_SIDE = 80
+# 超过该边长不再加分（头像最终只显示成小图）
+GOOD_SIDE = 400
+
+
+def probe_image(data):
+    """
+    从图片开头的若干字节中解析格式与尺寸
+    返回 {'format', 'width', 'height'}；头部不完整或无法识别时返回 None
+    """
+    if not data:
+        return None
+    parser = ImageFile.Parser()
+    try:
+        parser.feed(data)
+    except Exception:
+        return None
+    image = parser.image
+    if image is None:
+        return None
+    width, height = image.size
+    if not width or not height:
+        return None
+    return {'format': image.format, 'width': width, 'height': height}
+
+
+def score_candidate(info):
+    """
+    头像适合度评分，越高越好；无法探测的候选返回 None
+    1. 尺寸：过小直接淘汰，边长越接近 GOOD_SIDE 分越高
+    2. 比例：竖图/方图更可能是肖像（与 fix_persons_avatars 的 height > width * 0.8 一致）
+    3. 格式：JPEG 优先
+    """
+    if not info:
+        return None
+    width, height = info['width'], info['height']
+    short_side = min(width, height)
+    if short_side < MIN_SIDE:
+        return -10.0
+
+    score = min(short_side, GOOD_SIDE) / GOOD_SIDE * 2.0
+
+    aspect = height / width
+    if aspect >= 0.8:
+        # 1.0 ~ 1.6 的竖图最像证件照/画像，过长的竖幅（卷轴、长图）略减分
+        score += 2.0 if aspect <= 1.6 else 1.0
+    else:
+        score -= (0.8 - aspect) * 3.0
+
+    score += FORMAT_SCORES.get(info.get('format'), 0.0)
+    return score
+
+
+def pick_best(candidates):
+    """
+    candidates: [(url, info_or_None), ...]，按页面中的原始优先级排列
+    返回得分最高的 url；全部无法探测时返回 None。得分相同时保留原始优先级。
+    """
+    best_url = None
+    best_score = None
+    for url, info in candidates:
+        score = score_candidate(info)
+        if score is None:
+            continue
+        if best_score is None or score > best_score:
+            best_url, best_score = url, score
+    return best_url
@@ -18,6 +18,7 @@ class HistoricalPersonItem(scrapy.Item):
     # 图片信息
     image_urls = scrapy.Field()  # 图片URL列表
     images = scrapy.Field()      # 下载后的图片信息
+    imageSources = scrapy.Field()  # 图片URL -> 产出该图片的页面容器选择器
     avatarUrl = scrapy.Field()   # 头像相对路径
 
     # 来源/参考资料（增量补全用）
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+百度百科内嵌页面数据（window.PAGE_DATA）解析
+
+新版百科词条页在 <script> 中内嵌了整份词条 JSON（标题、信息框 card、摘要、图册、参考资料），
+与爬虫从 DOM 里逐项 XPath 提取的是同一份数据。这里用子串定位 + json 的 raw_decode 一次解析，
+解析失败或缺少某个字段时返回 None / 空值，由爬虫回退到 DOM 提取。
+"""
+
+import json
+import re
+
+
+PAGE_DATA_MARKERS = ('window.PAGE_DATA', 'PAGE_DATA=')
+
+# 百科图片地址校验（人物/事件爬虫共用）
+VALID_IMAGE_DOMAINS = ['baike.baidu.com', 'bkimg.cdn.bcebos.com', 'baikebcs.bdimg.com']
+INVALID_URL_PATTERNS = ['new.png', 'edit.png', 'star.png', 'lock.png', 'flag.png', 'icon', 'logo']
+
+TAG_RE = re.compile(r'<[^>]+>')
+SPACE_RE = re.compile(r'\s+')
+
+_decoder = json.JSONDecoder()
+
+
+def find_page_data(html):
+    """定位并解析内嵌 JSON；找不到或解析失败返回 None"""
+    if not html:
+        return None
+    for marker in PAGE_DATA_MARKERS:
+        pos = html.find(marker)
+        if pos < 0:
+            continue
+        start = html.find('{', pos + len(marker))
+        # 标记与 JSON 之间只应有 “=” 和空白
+        if start < 0 or html[pos + len(marker):start].strip(' \t\r\n=') != '':
+            continue
+        try:
+            data, _ = _decoder.raw_decode(html, start)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def _collect_text(node):
+    """递归收集 card 数据里的 text 字段（结构形如 data: [{text: [{text: '...'}]}]）"""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, list):
+        return ''.join(_collect_text(x) for x in node)
+    if isinstance(node, dict):
+        if 'text' in node:
+            return _collect_text(node['text'])
+        if 'data' in node:
+            return _collect_text(node['data'])
+    return ''
+
+
+def _clean(text):
+    return SPACE_RE.sub(' ', TAG_RE.sub('', text or '')).strip()
+
+
+def _basic_info(data):
+    card = data.get('card')
+    if isinstance(card, dict):
+        rows = []
+        for side in ('left', 'right'):
+            if isinstance(card.get(side), list):
+                rows.extend(card[side])
+    elif isinstance(card, list):
+        rows = card
+    else:
+        rows = []
+
+    info = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        key = _clean(str(row.get('title') or row.get('name') or '')).replace('：', '')
+        value = _clean(_collect_text(row.get('data')))
+        if key and value and key not in info:
+            info[key] = value
+    return info
+
+
+def _summary(data):
+    for key in ('abstractPlain', 'summary', 'abstract', 'abstractHtml'):
+        value = data.get(key)
+        if isinstance(value, str) and value.strip():
+            return _clean(value)
+        if isinstance(value, list):
+            text = _clean(_collect_text(value))
+            if text:
+                return text
+    return ''
+
+
+def _image_urls(data):
+    """图册/摘要图中的图片地址（保持页面顺序，去重）"""
+    urls = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key in ('url', 'src', 'origSrc'):
+                value = node.get(key)
+                if isinstance(value, str) and value:
+                    urls.append(value if not value.startswith('//') else f'https:{value}')
+            for value in node.values():
+                if isinstance(value, (dict, list)):
+                    walk(value)
+        elif isinstance(node, list):
+            for x in node:
+                walk(x)
+
+    for key in ('abstractAlbum', 'albums', 'album'):
+        if key in data:
+            walk(data[key])
+
+    seen = set()
+    out = []
+    for url in urls:
+        if url.startswith('http') and url not in seen:
+            seen.add(url)
+            out.append(url)
+    return out
+
+
+def normalize_img_url(img):
+    """规范化并校验单个图片URL（补全协议相对地址，过滤图标/非百科域名/SVG），无效返回 None"""
+    if img and (img.startswith('http') or img.startswith('//')):
+        full_url = img if img.startswith('http') else f'https:{img}'
+        # 检查是否是有效图片
+        # 优化：检查URL是否包含图片扩展名，不要求必须在结尾
+        has_valid_extension = any(f'.{ext}' in full_url.lower() for ext in ['jpg', 'png', 'jpeg', 'gif'])
+        is_not_svg = '.svg' not in full_url.lower()
+        has_valid_domain = any(domain in full_url for domain in VALID_IMAGE_DOMAINS)
+        is_not_invalid_pattern = not any(pattern in full_url.lower() for pattern in INVALID_URL_PATTERNS)
+
+        if has_valid_domain and (has_valid_extension or '.bcebos.com' in full_url) and is_not_svg and is_not_invalid_pattern:
+            return full_url
+    return None
+
+
+def _references(data):
+    refs = data.get('reference') or data.get('references') or []
+    out = []
+    if not isinstance(refs, list):
+        return out
+    for r in refs:
+        if not isinstance(r, dict):
+            continue
+        title = _clean(str(r.get('title') or r.get('name') or ''))
+        url = str(r.get('url') or '').strip()
+        if title and url:
+            out.append((title, url))
+    return out
+
+
+def extract_page_data(html):
+    """
+    返回统一结构：
+    {'title', 'basic_info', 'summary', 'image_urls', 'references'}，references 为 [(title, url)]
+    页面没有内嵌数据时返回 None
+    """
+    data = find_page_data(html)
+    if data is None:
+        return None
+    return {
+        'title': _clean(str(data.get('lemmaTitle') or data.get('title') or '')),
+        'basic_info': _basic_info(data),
+        'summary': _summary(data),
+        'image_urls': _image_urls(data),
+        'references': _references(data),
+    }
@@ -7,7 +7,106 @@ import json
 import os
 import pathlib
 import re
+import scrapy
 from itemadapter import ItemAdapter
+from scrapy.http.request import NO_CALLBACK
+from scrapy.pipelines.files import FSFilesStore
+from scrapy.pipelines.images import ImagesPipeline
+from scrapy.utils.defer import deferred_from_coro, maybe_deferred_to_future
+from twisted.internet.defer import DeferredList
+
+from historical_crawler.image_probe import pick_best, probe_image
+from historical_crawler.items import HistoricalPersonItem
+
+
+class ImageProbePipeline:
+    """
+    下载前的头像候选探测（需排在 ImagesPipeline 之前）
+    对每个候选 URL 只请求前 probe_bytes 字节，解析格式/尺寸并打分，
+    把 image_urls 收敛为得分最高的一张，ImagesPipeline 只完整下载这一张。
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(
+            enabled=crawler.settings.getbool('HISTORICAL_CRAWLER_PROBE_IMAGES', True),
+            probe_bytes=crawler.settings.getint('HISTORICAL_CRAWLER_PROBE_BYTES', 16384),
+        )
+        pipeline.crawler = crawler
+        return pipeline
+
+    def __init__(self, enabled=True, probe_bytes=16384):
+        self.enabled = enabled
+        self.probe_bytes = probe_bytes
+        self.crawler = None
+
+    def _download(self, request):
+        engine = self.crawler.engine
+        if hasattr(engine, 'download_async'):
+            return deferred_from_coro(engine.download_async(request))
+        return engine.download(request)
+
+    async def process_item(self, item):
+        # Scrapy 2.13 起 process_item 不再传入 spider（旧签名已弃用），从 crawler 取
+        spider = self.crawler.spider
+        if not self.enabled or not isinstance(item, HistoricalPersonItem):
+            return item
+        adapter = ItemAdapter(item)
+        urls = adapter.get('image_urls') or []
+        if len(urls) < 2:
+            return item
+
+        requests = [
+            scrapy.Request(
+                url,
+                headers={'Range': f'bytes=0-{self.probe_bytes - 1}'},
+                callback=NO_CALLBACK,
+                dont_filter=True,
+            )
+            for url in urls
+        ]
+        results = await maybe_deferred_to_future(
+            DeferredList([self._download(r) for r in requests], consumeErrors=True)
+        )
+
+        candidates = []
+        for url, (ok, response) in zip(urls, results):
+            info = None
+            # 不支持 Range 的服务器会返回 200 + 完整内容，同样可以解析
+            if ok and response.status in (200, 206):
+                info = probe_image(response.body[:self.probe_bytes])
+            candidates.append((url, info))
+
+        best = pick_best(candidates)
+        if best is None:
+            # 全部探测失败：保持原样，交给 ImagesPipeline 按原顺序下载
+            spider.logger.debug(f"头像候选探测失败，保留全部 {len(urls)} 张: {adapter.get('name')}")
+            return item
+
+        adapter['image_urls'] = [best]
+        spider.logger.debug(f"头像候选探测: {adapter.get('name')} -> {best}（{len(urls)} 选 1）")
+        return item
+
+
+class AtomicFSFilesStore(FSFilesStore):
+    """
+    本地图片存储：先写临时文件再 os.replace
+    图片目录经 scripts/image_store.py 迁移后，公开路径是指向只读存储对象的符号链接，
+    直接 write_bytes 会穿过链接（或因只读失败）；替换路径本身则只影响这一个文件。
+    """
+
+    def persist_file(self, path, buf, info, meta=None, headers=None):
+        absolute_path = self._get_filesystem_path(path)
+        self._mkdir(absolute_path.parent, info)
+        tmp = absolute_path.with_name(absolute_path.name + '.tmp')
+        tmp.write_bytes(buf.getvalue())
+        os.replace(tmp, absolute_path)
+
+
+class AtomicImagesPipeline(ImagesPipeline):
+    """ImagesPipeline，本地路径改用 AtomicFSFilesStore 写入"""
+
+    STORE_SCHEMES = {**ImagesPipeline.STORE_SCHEMES, '': AtomicFSFilesStore, 'file': AtomicFSFilesStore}
 
 
 class HistoricalCrawlerPipeline:
@@ -16,12 +115,15 @@ class HistoricalCrawlerPipeline:
         return cls(
             append_new=crawler.settings.getbool('HISTORICAL_CRAWLER_APPEND_NEW', False),
             enrich_sources=crawler.settings.getbool('HISTORICAL_CRAWLER_ENRICH_SOURCES', True),
+            data_dir=crawler.settings.get('HISTORICAL_CRAWLER_DATA_DIR', "../../../frontend/public/data"),
+            images_dir=crawler.settings.get('IMAGES_STORE', "../../../frontend/public/images"),
         )
 
-    def __init__(self, append_new=False, enrich_sources=True):
+    def __init__(self, append_new=False, enrich_sources=True,
+                 data_dir="../../../frontend/public/data", images_dir="../../../frontend/public/images"):
         # 定义输出文件路径
-        self.data_dir = "../../../frontend/public/data"
-        self.images_dir = "../../../frontend/public/images"
+        self.data_dir = data_dir
+        self.images_dir = images_dir
         self.append_new = append_new
         self.enrich_sources = enrich_sources
         
@@ -142,14 +244,14 @@ class HistoricalCrawlerPipeline:
         
         if 'name' in adapter.keys():
             # 处理人物数据
-            self._process_person_item(item, adapter)
+            self._process_person_item(item, adapter, spider)
         elif 'title' in adapter.keys():
             # 处理事件数据
             self._process_event_item(item, adapter)
         
         return item
 
-    def _process_person_item(self, item, adapter):
+    def _process_person_item(self, item, adapter, spider):
         """处理人物数据"""
         person_name = adapter['name']
         
@@ -162,12 +264,20 @@ class HistoricalCrawlerPipeline:
                 # 转换为相对路径 - 保留full子目录
                 relative_path = f"/images/{image_path}"
                 adapter['avatarUrl'] = relative_path
+                # 记录头像来自哪个页面容器，供爬虫调整容器提取顺序；
+                # 不参与排序的来源（如内嵌 PAGE_DATA）由 SelectorStats 忽略
+                container = (adapter.get('imageSources') or {}).get(first_image.get('url'))
+                selector_stats = getattr(spider, 'selector_stats', None)
+                if container and selector_stats is not None:
+                    selector_stats.record_hit(container)
         
         # 移除内部使用的字段
         if 'image_urls' in adapter:
             del adapter['image_urls']
         if 'images' in adapter:
             del adapter['images']
+        if 'imageSources' in adapter:
+            del adapter['imageSources']
 
         idx = self.person_index.get(person_name)
         if idx is None:
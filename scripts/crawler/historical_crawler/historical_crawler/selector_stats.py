@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+图片候选容器命中率统计
+
+记录百度百科各个图片容器（信息框、概述图、通用 picture/image 选择器等）
+“产出候选图片”的次数与“其图片最终成为 avatarUrl”的次数，并持久化到 JSON。
+PersonSpider 按命中率对容器重新排序，命中率高的容器优先提取。
+只统计 default_order 中的容器；内嵌 PAGE_DATA 等不参与排序的来源不记录（也不从旧文件中读入）。
+页面有 PAGE_DATA 图片时不会执行容器选择器，因此统计（和排序）只反映没有内嵌数据、走 DOM 提取的页面。
+"""
+
+import json
+import os
+
+
+class SelectorStats:
+    def __init__(self, default_order, path=None):
+        # default_order: 容器 key 的默认优先级（无统计数据时保持原有顺序）
+        self.default_order = list(default_order)
+        self.path = path
+        self.stats = {}
+        self.dirty = False
+        if path:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if not isinstance(data, dict):
+            return
+        for key, v in data.items():
+            if key in self.default_order and isinstance(v, dict):
+                self.stats[key] = {
+                    'candidates': int(v.get('candidates') or 0),
+                    'hits': int(v.get('hits') or 0),
+                }
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _entry(self, key):
+        return self.stats.setdefault(key, {'candidates': 0, 'hits': 0})
+
+    def record_candidates(self, key):
+        """容器在某个页面产出了至少一张候选图片"""
+        if key not in self.default_order:
+            return
+        self._entry(key)['candidates'] += 1
+        self.dirty = True
+
+    def record_hit(self, key):
+        """容器产出的图片成为了 avatarUrl"""
+        if key not in self.default_order:
+            return
+        self._entry(key)['hits'] += 1
+        self.dirty = True
+
+    def hit_rate(self, key):
+        # 拉普拉斯平滑：样本很少时不会让单次命中把容器顶到最前
+        v = self.stats.get(key) or {}
+        return (v.get('hits', 0) + 1) / (v.get('candidates', 0) + 2)
+
+    def ordered(self):
+        """按命中率从高到低返回容器 key；命中率相同则保持默认优先级"""
+        rank = {key: i for i, key in enumerate(self.default_order)}
+        return sorted(self.default_order, key=lambda key: (-self.hit_rate(key), rank[key]))
@@ -7,6 +7,8 @@
 #     https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #     https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+
 BOT_NAME = "historical_crawler"
 
 SPIDER_MODULES = ["historical_crawler.spiders"]
@@ -62,7 +64,8 @@ DOWNLOAD_DELAY = 1
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
-    "scrapy.pipelines.images.ImagesPipeline": 1,
+    "historical_crawler.pipelines.ImageProbePipeline": 0,
+    "historical_crawler.pipelines.AtomicImagesPipeline": 1,
     "historical_crawler.pipelines.HistoricalCrawlerPipeline": 300,
 }
 
@@ -104,8 +107,21 @@ IMAGES_RESULT_FIELD = "images"
 FEED_EXPORT_ENCODING = "utf-8"
 
 # ===== 项目自定义：安全增量模式 =====
+# persons/events/sources.json 所在目录（离线基准测试时会指向临时目录）
+HISTORICAL_CRAWLER_DATA_DIR = "../../../frontend/public/data"
+
 # 默认不允许追加新人物/事件（避免写坏 frontend/public/data 的既有结构）
 HISTORICAL_CRAWLER_APPEND_NEW = False
 
 # 默认启用 sources/参考资料补全（写 sources.json 并回填 sourceId）
-HISTORICAL_CRAWLER_ENRICH_SOURCES = True
\ No newline at end of file
+HISTORICAL_CRAWLER_ENRICH_SOURCES = True
+
+# 图片容器命中率统计文件（记录哪个容器产出了最终的 avatarUrl，用于调整提取顺序）
+# 按本文件位置定位到 scripts/.cache/（不随启动目录变化，且不进版本库）
+HISTORICAL_CRAWLER_SELECTOR_STATS = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", ".cache", "selector_stats.json")
+)
+
+# 下载前探测头像候选：每张只取前 N 字节解析尺寸/格式，只完整下载得分最高的一张
+HISTORICAL_CRAWLER_PROBE_IMAGES = True
+HISTORICAL_CRAWLER_PROBE_BYTES = 16384
@@ -5,6 +5,7 @@ import os
 import hashlib
 import json
 from historical_crawler.items import HistoricalEventItem
+from historical_crawler.page_data import extract_page_data, normalize_img_url
 from urllib.parse import urljoin, urlparse
 
 
@@ -16,14 +17,21 @@ class EventSpider(scrapy.Spider):
 
     def __init__(self, *args, **kwargs):
         super(EventSpider, self).__init__(*args, **kwargs)
+        # 是否优先解析页面内嵌的 PAGE_DATA（-a use_page_data=0 关闭，仅走 DOM 提取）
+        self.use_page_data = str(kwargs.get('use_page_data', '1')).lower() not in ('0', 'false', 'no')
+        # 百科站点前缀：默认线上百度百科，离线基准测试时指向本地 fixture 服务器
+        self.base_url = (kwargs.get('base_url') or 'https://baike.baidu.com').rstrip('/')
+        if kwargs.get('base_url'):
+            self.allowed_domains = self.allowed_domains + [urlparse(self.base_url).hostname]
+            self.start_urls = [url.replace('https://baike.baidu.com', self.base_url) for url in self.start_urls]
         # 从命令行获取要爬取的事件列表
         if kwargs.get('names'):
-            self.start_urls = [f"https://baike.baidu.com/item/{event}" for event in kwargs.get('names').split(',')]
+            self.start_urls = [f"{self.base_url}/item/{event}" for event in kwargs.get('names').split(',')]
         elif kwargs.get('names_file'):
             names_file = kwargs.get('names_file')
             names = self._load_names_file(names_file)
             if names:
-                self.start_urls = [f"https://baike.baidu.com/item/{event}" for event in names]
+                self.start_urls = [f"{self.base_url}/item/{event}" for event in names]
 
     def _load_names_file(self, file_path):
         """从文件读取事件列表：支持 .txt（一行一个）或 .json（数组或含 title 字段对象数组）"""
@@ -60,7 +68,7 @@ class EventSpider(scrapy.Spider):
         item['pageUrl'] = response.url
         item['references'] = []
         
-        if 'baike.baidu.com' in response.url:
+        if 'baike.baidu.com' in response.url or response.url.startswith(self.base_url):
             # 从百度百科爬取
             item = self.parse_baidu_baike(response, item)
         elif 'zh.wikipedia.org' in response.url:
@@ -70,21 +78,23 @@ class EventSpider(scrapy.Spider):
         yield item
 
     def parse_baidu_baike(self, response, item):
-        """解析百度百科页面"""
+        """解析百度百科页面（优先使用内嵌的 PAGE_DATA，缺失的字段再回退到 DOM 提取）"""
+        page_data = extract_page_data(response.text) if self.use_page_data else None
         
         # 提取标题
-        item['title'] = response.css('h1::text').get(default='').strip()
+        item['title'] = (page_data and page_data['title']) or response.css('h1::text').get(default='').strip()
         item['pageUrl'] = response.url
         
         # 提取基本信息
-        basic_info = {}
+        basic_info = dict(page_data['basic_info']) if page_data else {}
         
         # 新的百度百科结构
-        for info_item in response.css('.basicInfo_M3XoO .itemName_hpSfh'):
-            key = info_item.xpath('string(.)').get().strip() if info_item.xpath('string(.)').get() else ''
-            value = info_item.xpath('following-sibling::div[1]').xpath('string(.)').get().strip() if info_item.xpath('following-sibling::div[1]').xpath('string(.)').get() else ''
-            if key and value:
-                basic_info[key] = value
+        if not basic_info:
+            for info_item in response.css('.basicInfo_M3XoO .itemName_hpSfh'):
+                key = info_item.xpath('string(.)').get().strip() if info_item.xpath('string(.)').get() else ''
+                value = info_item.xpath('following-sibling::div[1]').xpath('string(.)').get().strip() if info_item.xpath('following-sibling::div[1]').xpath('string(.)').get() else ''
+                if key and value:
+                    basic_info[key] = value
         
         # 如果新结构没找到，尝试备用选择器
         if not basic_info:
@@ -104,16 +114,17 @@ class EventSpider(scrapy.Spider):
             item['location'] = basic_info.get('发生地点') or basic_info.get('地点')
         
         # 提取简介
-        summary_elements = response.css('[class*="summary"]')
-        summary = ''
+        summary = page_data['summary'] if page_data else ''
         
-        if summary_elements:
-            # 找到第一个较长的内容作为简介
-            for elem in summary_elements:
-                text = elem.xpath('string(.)').get().strip()
-                if len(text) > 200 and '百度百科' not in text and '免责声明' not in text:
-                    summary = text
-                    break
+        if not summary:
+            summary_elements = response.css('[class*="summary"]')
+            if summary_elements:
+                # 找到第一个较长的内容作为简介
+                for elem in summary_elements:
+                    text = elem.xpath('string(.)').get().strip()
+                    if len(text) > 200 and '百度百科' not in text and '免责声明' not in text:
+                        summary = text
+                        break
         
         # 如果新选择器没找到，尝试原始选择器
         if not summary:
@@ -122,7 +133,7 @@ class EventSpider(scrapy.Spider):
         item['description'] = summary
 
         # 提取参考资料/参考文献
-        item['references'] = self.extract_baidu_references(response)
+        item['references'] = self.extract_baidu_references(response, embedded=page_data and page_data['references'])
         
         # 提取相关人物
         # 从基本信息中提取相关人物
@@ -132,11 +143,11 @@ class EventSpider(scrapy.Spider):
             persons = re.split(r'[、,;，；]', persons_str)
             item['persons'] = [person.strip() for person in persons if person.strip()]
         
-        # 提取图片
-        image_urls = []
+        # 提取图片（内嵌数据中的摘要图/图册优先，与人物爬虫同样过滤图标和非百科域名）
+        image_urls = [url for url in map(normalize_img_url, page_data['image_urls']) if url] if page_data else []
         
         # 提取内容中的图片
-        for img in response.css('.main-content img::attr(src)').getall():
+        for img in ([] if image_urls else response.css('.main-content img::attr(src)').getall()):
             if img.startswith('http'):
                 image_urls.append(img)
             elif img.startswith('//'):
@@ -209,8 +220,11 @@ class EventSpider(scrapy.Spider):
         
         return item
 
-    def extract_baidu_references(self, response, limit=30):
-        """尽量从百度百科页面底部提取参考资料链接（鲁棒处理不同结构）"""
+    def extract_baidu_references(self, response, limit=30, embedded=None):
+        """
+        尽量从百度百科页面底部提取参考资料链接（鲁棒处理不同结构）
+        embedded: 内嵌 PAGE_DATA 中的 [(title, url)]，过滤后非空则不再扫描 DOM
+        """
         refs = []
 
         bad_url_patterns = [
@@ -254,6 +268,13 @@ class EventSpider(scrapy.Spider):
 
         seen = set()
 
+        for title, href in embedded or []:
+            add_ref(title, href)
+            if len(refs) >= limit:
+                return refs
+        if refs:
+            return refs
+
         containers = response.xpath('//*[contains(@class,"lemma-reference") or contains(@id,"reference") or contains(@class,"reference")]')
         for c in containers:
             for a in c.xpath('.//a[@href]'):
@@ -5,25 +5,67 @@ import os
 import hashlib
 import json
 from historical_crawler.items import HistoricalPersonItem
+from historical_crawler.page_data import extract_page_data, normalize_img_url
+from historical_crawler.selector_stats import SelectorStats
 from urllib.parse import urljoin, urlparse
 
 
+# 来自内嵌 PAGE_DATA 的图片在 imageSources 中使用的容器名（不在 IMAGE_CONTAINERS 中，SelectorStats 不统计）
+PAGE_DATA_CONTAINER = 'PAGE_DATA'
+
+
 class PersonSpider(scrapy.Spider):
     name = "person"
     allowed_domains = ["baike.baidu.com", "zh.wikipedia.org", "bkimg.cdn.bcebos.com", "baikebcs.bdimg.com"]
     # 示例起始URL，可以通过命令行参数传入更多
     start_urls = ["https://baike.baidu.com/item/孔子"]
 
+    # 百度百科图片容器（默认优先级从高到低）
+    # 1. 信息框中的图片（最可能是人物肖像）
+    # 2. 主要图片区域
+    # 3. 通用图片选择器（不再尝试所有div中的图片，避免获取无关图片）
+    # 实际提取顺序由 SelectorStats 的历史命中率决定
+    IMAGE_CONTAINERS = [
+        '.basicInfo_M3XoO img',
+        '.lemmaInfoCite_A8V2k img',
+        '.lemmaPicture_A8U_G img',
+        '.J-lemma-content-single-image img',
+        '.summary-pic img',
+        '.lemma-picture img',
+        '[class*="picture"] img',
+        '[class*="image"] img',
+        '[class*="summary"] img',
+    ]
+    # 每个人物最多保留的候选图片数
+    MAX_IMAGES = 3
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super(PersonSpider, cls).from_crawler(crawler, *args, **kwargs)
+        stats_path = crawler.settings.get('HISTORICAL_CRAWLER_SELECTOR_STATS')
+        if stats_path:
+            spider.selector_stats = SelectorStats(cls.IMAGE_CONTAINERS, stats_path)
+        return spider
+
     def __init__(self, *args, **kwargs):
         super(PersonSpider, self).__init__(*args, **kwargs)
+        # 默认仅在内存中统计；通过 crawler 启动时由 from_crawler 替换为持久化版本
+        self.selector_stats = SelectorStats(self.IMAGE_CONTAINERS)
+        # 是否优先解析页面内嵌的 PAGE_DATA（-a use_page_data=0 关闭，仅走 DOM 提取）
+        self.use_page_data = str(kwargs.get('use_page_data', '1')).lower() not in ('0', 'false', 'no')
+        # 百科站点前缀：默认线上百度百科，离线基准测试时指向本地 fixture 服务器
+        self.base_url = (kwargs.get('base_url') or 'https://baike.baidu.com').rstrip('/')
+        if kwargs.get('base_url'):
+            self.allowed_domains = self.allowed_domains + [urlparse(self.base_url).hostname]
+            self.start_urls = [url.replace('https://baike.baidu.com', self.base_url) for url in self.start_urls]
         # 从命令行获取要爬取的人物列表
         if kwargs.get('names'):
-            self.start_urls = [f"https://baike.baidu.com/item/{person}" for person in kwargs.get('names').split(',')]
+            self.start_urls = [f"{self.base_url}/item/{person}" for person in kwargs.get('names').split(',')]
         elif kwargs.get('names_file'):
             names_file = kwargs.get('names_file')
             names = self._load_names_file(names_file)
             if names:
-                self.start_urls = [f"https://baike.baidu.com/item/{person}" for person in names]
+                self.start_urls = [f"{self.base_url}/item/{person}" for person in names]
 
     def _load_names_file(self, file_path):
         """从文件读取人物列表：支持 .txt（一行一个）或 .json（数组或含 name 字段对象数组）"""
@@ -57,11 +99,12 @@ class PersonSpider(scrapy.Spider):
         item['dynasty'] = None
         item['description'] = ''
         item['image_urls'] = []
+        item['imageSources'] = {}
         item['avatarUrl'] = None
         item['pageUrl'] = response.url
         item['references'] = []
         
-        if 'baike.baidu.com' in response.url:
+        if 'baike.baidu.com' in response.url or response.url.startswith(self.base_url):
             # 从百度百科爬取
             item = self.parse_baidu_baike(response, item)
         elif 'zh.wikipedia.org' in response.url:
@@ -71,21 +114,23 @@ class PersonSpider(scrapy.Spider):
         yield item
 
     def parse_baidu_baike(self, response, item):
-        """解析百度百科页面"""
+        """解析百度百科页面（优先使用内嵌的 PAGE_DATA，缺失的字段再回退到 DOM 提取）"""
+        page_data = extract_page_data(response.text) if self.use_page_data else None
         
         # 提取名称
-        item['name'] = response.css('h1::text').get(default='').strip()
+        item['name'] = (page_data and page_data['title']) or response.css('h1::text').get(default='').strip()
         item['pageUrl'] = response.url
         
         # 提取基本信息
-        basic_info = {}
+        basic_info = dict(page_data['basic_info']) if page_data else {}
         
         # 新的百度百科结构
-        for info_item in response.css('.basicInfo_M3XoO .itemName_hpSfh'):
-            key = info_item.xpath('string(.)').get().strip() if info_item.xpath('string(.)').get() else ''
-            value = info_item.xpath('following-sibling::div[1]').xpath('string(.)').get().strip() if info_item.xpath('following-sibling::div[1]').xpath('string(.)').get() else ''
-            if key and value:
-                basic_info[key] = value
+        if not basic_info:
+            for info_item in response.css('.basicInfo_M3XoO .itemName_hpSfh'):
+                key = info_item.xpath('string(.)').get().strip() if info_item.xpath('string(.)').get() else ''
+                value = info_item.xpath('following-sibling::div[1]').xpath('string(.)').get().strip() if info_item.xpath('following-sibling::div[1]').xpath('string(.)').get() else ''
+                if key and value:
+                    basic_info[key] = value
         
         # 如果新结构没找到，尝试备用选择器
         if not basic_info:
@@ -109,22 +154,26 @@ class PersonSpider(scrapy.Spider):
             item['dynasty'] = basic_info.get('所处时代') or basic_info.get('朝代')
         else:
             # 如果没有明确的朝代信息，尝试从简介中提取
-            intro_text = response.css('.lemma-summary').xpath('string(.)').get(default='').strip()
+            if page_data and page_data['summary']:
+                intro_text = page_data['summary']
+            else:
+                intro_text = response.css('.lemma-summary').xpath('string(.)').get(default='').strip()
             dynasty_match = re.search(r'([\u4e00-\u9fa5]+)[朝代国]', intro_text)
             if dynasty_match:
                 item['dynasty'] = dynasty_match.group(1) + '朝'
         
         # 提取简介
-        summary_elements = response.css('[class*="summary"]')
-        summary = ''
-        
-        if summary_elements:
-            # 找到第一个较长的内容作为简介
-            for elem in summary_elements:
-                text = elem.xpath('string(.)').get().strip()
-                if len(text) > 200 and '百度百科' not in text and '免责声明' not in text:
-                    summary = text
-                    break
+        summary = page_data['summary'] if page_data else ''
+        
+        if not summary:
+            summary_elements = response.css('[class*="summary"]')
+            if summary_elements:
+                # 找到第一个较长的内容作为简介
+                for elem in summary_elements:
+                    text = elem.xpath('string(.)').get().strip()
+                    if len(text) > 200 and '百度百科' not in text and '免责声明' not in text:
+                        summary = text
+                        break
         
         # 如果新选择器没找到，尝试原始选择器
         if not summary:
@@ -133,16 +182,13 @@ class PersonSpider(scrapy.Spider):
         item['description'] = summary
 
         # 提取参考资料/参考文献
-        item['references'] = self.extract_baidu_references(response)
+        item['references'] = self.extract_baidu_references(response, embedded=page_data and page_data['references'])
         
         # 提取图片
         image_urls = []
-        valid_image_domains = ['baike.baidu.com', 'bkimg.cdn.bcebos.com', 'baikebcs.bdimg.com']
-        invalid_url_patterns = ['new.png', 'edit.png', 'star.png', 'lock.png', 'flag.png', 'icon', 'logo']
         
         # 辅助函数：提取图片URL，支持懒加载
         def extract_img_urls(selector):
-            urls = []
             # 先尝试提取src属性
             src_urls = selector.css('::attr(src)').getall()
             # 再尝试提取data-src属性（懒加载图片）
@@ -151,48 +197,39 @@ class PersonSpider(scrapy.Spider):
             data_original_urls = selector.css('::attr(data-original)').getall()
             # 合并URL列表
             all_urls = src_urls + data_src_urls + data_original_urls
-            
-            for img in all_urls:
-                if img and (img.startswith('http') or img.startswith('//')):
-                    full_url = img if img.startswith('http') else f'https:{img}'
-                    # 检查是否是有效图片
-                    # 优化：检查URL是否包含图片扩展名，不要求必须在结尾
-                    has_valid_extension = any(f'.{ext}' in full_url.lower() for ext in ['jpg', 'png', 'jpeg', 'gif'])
-                    is_not_svg = '.svg' not in full_url.lower()
-                    has_valid_domain = any(domain in full_url for domain in valid_image_domains)
-                    is_not_invalid_pattern = not any(pattern in full_url.lower() for pattern in invalid_url_patterns)
-                    
-                    if has_valid_domain and (has_valid_extension or '.bcebos.com' in full_url) and is_not_svg and is_not_invalid_pattern:
-                        urls.append(full_url)
-            return urls
-        
-        # 尝试提取主要图片容器，优先级从高到低
-        # 1. 信息框中的图片（最可能是人物肖像）
-        # 2. 主要图片区域
-        # 3. 通用图片选择器
-        image_containers = [
-            # 信息框中的图片（最可能是人物肖像）
-            response.css('.basicInfo_M3XoO img'),
-            response.css('.lemmaInfoCite_A8V2k img'),
-            # 主要图片区域
-            response.css('.lemmaPicture_A8U_G img'),
-            response.css('.J-lemma-content-single-image img'),
-            response.css('.summary-pic img'),
-            response.css('.lemma-picture img'),
-            # 通用图片选择器
-            response.css('[class*="picture"] img'),
-            response.css('[class*="image"] img'),
-            response.css('[class*="summary"] img')
-            # 不再尝试所有div中的图片，避免获取无关图片
-        ]
-        
-        # 提取所有容器中的图片
-        for container in image_containers:
-            container_images = extract_img_urls(container)
-            image_urls.extend(container_images)
+            return [url for url in map(normalize_img_url, all_urls) if url]
+        
+        image_sources = {}
+        
+        # 内嵌数据中的摘要图/图册（顺序与页面一致）
+        if page_data:
+            for url in map(normalize_img_url, page_data['image_urls']):
+                if url and url not in image_sources:
+                    image_sources[url] = PAGE_DATA_CONTAINER
+                    image_urls.append(url)
+                    if len(image_urls) >= self.MAX_IMAGES:
+                        break
+        
+        # 按历史命中率依次提取各容器中的图片，凑够 MAX_IMAGES 张即停止，
+        # 后面的容器不再执行选择器（PAGE_DATA 已给出图片时整段跳过，命中率统计只来自这条回退路径）
+        if not image_urls:
+            for container in self.selector_stats.ordered():
+                found = False
+                for url in extract_img_urls(response.css(container)):
+                    # 通用选择器与前面的容器会重叠，重复的URL不再占用名额
+                    if url in image_sources:
+                        continue
+                    image_sources[url] = container
+                    image_urls.append(url)
+                    found = True
+                    if len(image_urls) >= self.MAX_IMAGES:
+                        break
+                if found:
+                    self.selector_stats.record_candidates(container)
+                if len(image_urls) >= self.MAX_IMAGES:
+                    break
         
-        # 只保留前3张图片
-        image_urls = image_urls[:3]
+        item['imageSources'] = image_sources
         item['image_urls'] = image_urls
         
         return item
@@ -242,8 +279,11 @@ class PersonSpider(scrapy.Spider):
         
         return item
 
-    def extract_baidu_references(self, response, limit=30):
-        """尽量从百度百科页面底部提取参考资料链接（鲁棒处理不同结构）"""
+    def extract_baidu_references(self, response, limit=30, embedded=None):
+        """
+        尽量从百度百科页面底部提取参考资料链接（鲁棒处理不同结构）
+        embedded: 内嵌 PAGE_DATA 中的 [(title, url)]，过滤后非空则不再扫描 DOM
+        """
         refs = []
 
         bad_url_patterns = [
@@ -290,6 +330,14 @@ class PersonSpider(scrapy.Spider):
 
         seen = set()
 
+        # 0) 内嵌数据中的参考资料（同样经过过滤规则）
+        for title, href in embedded or []:
+            add_ref(title, href)
+            if len(refs) >= limit:
+                return refs
+        if refs:
+            return refs
+
         # 1) 常见 reference 容器
         containers = response.xpath('//*[contains(@class,"lemma-reference") or contains(@id,"reference") or contains(@class,"reference")]')
         for c in containers:
@@ -344,4 +392,5 @@ class PersonSpider(scrapy.Spider):
 
     def closed(self, reason):
         """爬虫关闭时执行"""
+        self.selector_stats.save()
         self.logger.info(f'爬虫关闭，原因: {reason}')
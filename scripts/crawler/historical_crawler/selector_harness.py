@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+选择器回归与吞吐测试：用生产爬虫的 parse 方法离线解析已保存的词条页面
+
+运行方式（在仓库根目录）：
+  python scripts/crawler/historical_crawler/selector_harness.py --pages saved_pages/person --spider person
+  python scripts/crawler/historical_crawler/selector_harness.py --pages saved_pages/person --spider person ^
+      --baseline harness_person.json --threshold 0.05
+
+功能：
+- 读取目录下的 .html 页面（文件名即词条名，例如 孔子.html），构造 HtmlResponse 交给爬虫 parse
+- 统计各字段的提取覆盖率（name / years / summary / images / references）和 pages/sec
+- 指定 --baseline 时与基线报告比较，任一字段覆盖率下降超过 --threshold 则退出码为 2，可作为门禁
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from urllib.parse import quote
+
+from scrapy.http import HtmlResponse
+
+from historical_crawler.spiders.event_spider import EventSpider
+from historical_crawler.spiders.person_spider import PersonSpider
+
+
+SPIDERS = {
+    'person': PersonSpider,
+    'event': EventSpider,
+}
+
+FIELDS = ['name', 'years', 'summary', 'images', 'references']
+
+CANONICAL_RE = re.compile(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"', re.I)
+
+
+def page_url(html, file_name, base_url):
+    """优先使用页面自带的 canonical 链接，否则按文件名拼出百科词条URL"""
+    m = CANONICAL_RE.search(html[:20000])
+    if m:
+        url = m.group(1)
+        return f'https:{url}' if url.startswith('//') else url
+    name = os.path.splitext(file_name)[0]
+    return f"{base_url.rstrip('/')}/item/{quote(name)}"
+
+
+def load_pages(pages_dir, base_url):
+    pages = []
+    for file_name in sorted(os.listdir(pages_dir)):
+        if not file_name.lower().endswith(('.html', '.htm')):
+            continue
+        with open(os.path.join(pages_dir, file_name), 'rb') as f:
+            body = f.read()
+        url = page_url(body.decode('utf-8', errors='ignore'), file_name, base_url)
+        pages.append((file_name, url, body))
+    return pages
+
+
+def field_hits(item):
+    """把爬虫产出的 item 映射为各字段“是否提取到”"""
+    name = item.get('name') if 'name' in item.fields else item.get('title')
+    if 'year' in item.fields:
+        years = item.get('year') is not None
+    else:
+        years = item.get('birthYear') is not None or item.get('deathYear') is not None
+    return {
+        'name': bool((name or '').strip()),
+        'years': years,
+        'summary': bool((item.get('description') or '').strip()),
+        'images': bool(item.get('image_urls')),
+        'references': bool(item.get('references')),
+    }
+
+
+def run(spider, pages, repeat):
+    hits = {f: 0 for f in FIELDS}
+    misses = {f: [] for f in FIELDS}
+    errors = []
+
+    start = time.perf_counter()
+    for round_idx in range(repeat):
+        for file_name, url, body in pages:
+            response = HtmlResponse(url=url, body=body, encoding='utf-8')
+            try:
+                items = list(spider.parse(response))
+            except Exception as e:
+                if round_idx == 0:
+                    errors.append({'page': file_name, 'error': repr(e)})
+                continue
+            if round_idx or not items:
+                continue
+            for f, ok in field_hits(items[0]).items():
+                if ok:
+                    hits[f] += 1
+                else:
+                    misses[f].append(file_name)
+    elapsed = time.perf_counter() - start
+
+    total = len(pages)
+    parsed = total * repeat
+    return {
+        'pages': total,
+        'repeat': repeat,
+        'seconds': round(elapsed, 4),
+        'pagesPerSec': round(parsed / elapsed, 2) if elapsed > 0 else None,
+        'coverage': {f: round(hits[f] / total, 4) if total else 0.0 for f in FIELDS},
+        'hits': hits,
+        'misses': misses,
+        'errors': errors,
+    }
+
+
+def compare(report, baseline, threshold, max_slowdown):
+    """返回回归问题列表（空列表表示通过）"""
+    problems = []
+    base_cov = baseline.get('coverage') or {}
+    for f in FIELDS:
+        if f not in base_cov:
+            continue
+        drop = base_cov[f] - report['coverage'][f]
+        if drop > threshold:
+            problems.append(f"{f} 覆盖率下降 {base_cov[f]:.2%} -> {report['coverage'][f]:.2%}")
+    base_speed = baseline.get('pagesPerSec')
+    if max_slowdown is not None and base_speed and report['pagesPerSec']:
+        if report['pagesPerSec'] < base_speed * (1 - max_slowdown):
+            problems.append(f"吞吐下降 {base_speed} -> {report['pagesPerSec']} pages/sec")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用生产爬虫解析已保存页面，统计字段覆盖率与吞吐（可作为回归门禁）。")
+    parser.add_argument('--pages', required=True, help='已保存页面目录（*.html，文件名为词条名）')
+    parser.add_argument('--spider', choices=sorted(SPIDERS.keys()), default='person', help='使用哪个爬虫的 parse（默认 person）')
+    parser.add_argument('--base-url', default='https://baike.baidu.com', help='页面无 canonical 链接时拼接词条URL的站点前缀')
+    parser.add_argument('--repeat', type=int, default=1, help='重复解析轮数（用于稳定吞吐数据）')
+    parser.add_argument('--report', help='把本次报告写入 JSON 文件（可作为下次的 --baseline）')
+    parser.add_argument('--baseline', help='基线报告 JSON；与之比较覆盖率')
+    parser.add_argument('--threshold', type=float, default=0.02, help='允许的覆盖率下降幅度（默认 0.02 即 2 个百分点）')
+    parser.add_argument('--max-slowdown', type=float, help='允许的吞吐下降比例（例如 0.3）；不传则不检查吞吐')
+    parser.add_argument('--no-page-data', action='store_true', help='关闭内嵌 PAGE_DATA 快速路径，只走 DOM 提取')
+    parser.add_argument('--compare-dom', action='store_true', help='额外用纯 DOM 提取再跑一遍，输出 PAGE_DATA 快速路径的加速比')
+    args = parser.parse_args()
+
+    pages = load_pages(os.path.abspath(args.pages), args.base_url)
+    if not pages:
+        raise SystemExit(f"目录中没有 .html 页面：{args.pages}")
+
+    use_page_data = '0' if args.no_page_data else '1'
+    spider = SPIDERS[args.spider](use_page_data=use_page_data)
+    report = run(spider, pages, max(1, args.repeat))
+    report['spider'] = args.spider
+    report['pageData'] = not args.no_page_data
+
+    print(f"[selector_harness] spider={args.spider} page_data={report['pageData']} pages={report['pages']} repeat={report['repeat']} "
+          f"seconds={report['seconds']} pages_per_sec={report['pagesPerSec']} errors={len(report['errors'])}")
+    for f in FIELDS:
+        print(f"- {f}: {report['hits'][f]}/{report['pages']} ({report['coverage'][f]:.1%})")
+
+    if args.compare_dom and not args.no_page_data:
+        dom_report = run(SPIDERS[args.spider](use_page_data='0'), pages, max(1, args.repeat))
+        speedup = report['pagesPerSec'] / dom_report['pagesPerSec'] if dom_report['pagesPerSec'] else None
+        report['domOnly'] = {k: dom_report[k] for k in ('seconds', 'pagesPerSec', 'coverage')}
+        print(f"[selector_harness] dom_only pages_per_sec={dom_report['pagesPerSec']} "
+              f"speedup={speedup:.2f}x" if speedup else "[selector_harness] dom_only pages_per_sec=n/a")
+        for f in FIELDS:
+            print(f"- {f}: {dom_report['hits'][f]}/{dom_report['pages']} ({dom_report['coverage'][f]:.1%})")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[selector_harness] report={os.path.abspath(args.report)}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.threshold, args.max_slowdown)
+        if problems:
+            print("Regressions:")
+            for p in problems:
+                print("-", p)
+            raise SystemExit(2)
+        print(f"[selector_harness] 与基线比较通过 baseline={os.path.abspath(args.baseline)}")
+
+
+if __name__ == '__main__':
+    main()
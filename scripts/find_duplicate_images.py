@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近似重复图片查找
+对 images/full 与 images/thumbs 下所有图片计算感知哈希（读取图片特征缓存），
+用多索引哈希表按汉明距离查找候选（64 位分成 distance+1 段，至少一段相同才比较），
+再用并查集合并为重复簇，不做全量两两比较。
+
+- 同名文件（full/xxx.jpg 与 thumbs/small/xxx.jpg）是 ImagesPipeline 生成的缩略图，只标注为衍生图，不算重复
+- 报告不同来源图片之间的重复簇，以及被分配到同一张脸（同一簇）的不同人物
+
+运行方式（在仓库根目录）：
+  python scripts/find_duplicate_images.py
+  python scripts/find_duplicate_images.py --distance 4 --report scripts/reports/duplicate_images.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from image_feature_cache import DEFAULT_CACHE_PATH, IMAGE_EXTS, cached_analyze_images
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMAGES_ROOT = os.path.join(REPO_ROOT, "frontend", "public", "images")
+PERSONS_FILE = os.path.join(REPO_ROOT, "frontend", "public", "data", "persons.json")
+DEFAULT_DIRS = ["full", "thumbs"]
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+# numpy < 2.0 没有 bitwise_count，用逐字节查表代替
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(arr):
+    """uint64 数组逐元素的 1 的个数"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(arr)
+    arr = np.ascontiguousarray(arr, dtype=np.uint64)
+    return _POPCOUNT8[arr.view(np.uint8)].reshape(arr.shape + (8,)).sum(axis=-1)
+
+
+def segment_bounds(distance, bits=64):
+    """
+    多索引哈希的分段：把 64 位分成 distance + 1 段
+    由抽屉原理，汉明距离 <= distance 的两个哈希至少有一段完全相同
+    """
+    n = min(distance + 1, bits)
+    bounds = []
+    start = 0
+    for i in range(n):
+        width = bits // n + (1 if i < bits % n else 0)
+        bounds.append((start, width))
+        start += width
+    return bounds
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[rb] = ra
+
+
+# 同一分段桶内的候选数不超过该值时一次性算整块距离矩阵，否则逐行计算
+BLOCK_SIZE = 1024
+
+
+def _match_bucket(values, idx, distance, uf):
+    """桶内候选两两比较（numpy 向量化），距离不超过 distance 的合并到同一簇"""
+    v = values[idx]
+    m = len(idx)
+    if m <= BLOCK_SIZE:
+        d = popcount64(v[:, None] ^ v[None, :])
+        rows, cols = np.nonzero(np.triu(d <= distance, 1))
+        for a, b in zip(rows.tolist(), cols.tolist()):
+            uf.union(int(idx[a]), int(idx[b]))
+        return
+    for i in range(m - 1):
+        hits = np.nonzero(popcount64(v[i + 1:] ^ v[i]) <= distance)[0]
+        for j in hits.tolist():
+            uf.union(int(idx[i]), int(idx[i + 1 + j]))
+
+
+def list_images(dirs):
+    """递归列出图片，返回 [(相对 images 根目录的路径, 绝对路径)]"""
+    out = []
+    for d in dirs:
+        base = os.path.join(IMAGES_ROOT, d)
+        for dirpath, _, filenames in os.walk(base):
+            for n in sorted(filenames):
+                if n.lower().endswith(IMAGE_EXTS):
+                    path = os.path.join(dirpath, n)
+                    out.append((os.path.relpath(path, IMAGES_ROOT).replace(os.sep, "/"), path))
+    return out
+
+
+def role_of(rel):
+    """full/xxx.jpg -> 'full'；thumbs/small/xxx.jpg -> 'thumb:small'"""
+    parts = rel.split("/")
+    if parts[0] == "thumbs" and len(parts) > 2:
+        return f"thumb:{parts[1]}"
+    return parts[0]
+
+
+def find_clusters(hashes, distance):
+    """
+    hashes: {rel: phash_int}；返回多成员簇列表（每簇为排序后的 rel 列表）
+    多索引哈希：每一段按值分桶，只比较至少一段相同的候选，避免全量两两比较
+    """
+    keys = list(hashes)
+    if not keys:
+        return []
+    values = np.array([hashes[k] for k in keys], dtype=np.uint64)
+    uf = UnionFind(len(keys))
+
+    for start, width in segment_bounds(distance):
+        seg = (values >> np.uint64(start)) & np.uint64((1 << width) - 1)
+        order = np.argsort(seg, kind="stable")
+        sorted_seg = seg[order]
+        # 相同段值的连续区间即一个桶
+        breaks = np.nonzero(np.diff(sorted_seg))[0] + 1
+        for bucket in np.split(order, breaks):
+            if len(bucket) > 1:
+                _match_bucket(values, bucket, distance, uf)
+
+    groups = {}
+    for i, k in enumerate(keys):
+        groups.setdefault(uf.find(i), []).append(k)
+    return [sorted(g) for g in groups.values() if len(g) > 1]
+
+
+def avatar_index(persons):
+    """images 根目录相对路径 -> 使用它做头像的人物名列表"""
+    index = {}
+    for p in persons:
+        url = p.get("avatarUrl") or ""
+        if url.startswith("/images/"):
+            index.setdefault(url[len("/images/"):], []).append(p.get("name", ""))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用感知哈希 + 多索引哈希表查找近似重复图片。")
+    parser.add_argument("--dir", action="append", help="images 下的子目录，可重复（默认 full 与 thumbs）")
+    parser.add_argument("--distance", type=int, default=6, help="视为重复的最大汉明距离（64 位哈希，默认 6）")
+    parser.add_argument("--persons", default=PERSONS_FILE, help="人物数据文件，用于找出共用同一张脸的人物")
+    parser.add_argument("--report", help="把结果写入 JSON 文件")
+    parser.add_argument("--workers", type=int, help="分析进程数（默认 CPU 核数）")
+    parser.add_argument("--no-cache", action="store_true", help="不读写图片特征缓存")
+    parser.add_argument("--limit", type=int, default=20, help="最多打印多少个簇（默认 20）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    images = list_images(args.dir or DEFAULT_DIRS)
+    if not images:
+        raise SystemExit(f"没有找到图片：{IMAGES_ROOT}")
+    features = cached_analyze_images(
+        [path for _, path in images],
+        workers=args.workers,
+        cache_path=None if args.no_cache else DEFAULT_CACHE_PATH,
+        phash=True,
+    )
+
+    hashes = {}
+    undecodable = []
+    for rel, path in images:
+        phash = features[path].get("phash")
+        if phash:
+            hashes[rel] = int(phash, 16)
+        else:
+            undecodable.append(rel)
+
+    clusters = find_clusters(hashes, args.distance)
+    by_avatar = avatar_index(_load_json(args.persons)) if os.path.exists(args.persons) else {}
+
+    abs_of = dict(images)
+    duplicate_clusters = []
+    derived = 0
+    for members in clusters:
+        sources = sorted({os.path.basename(rel) for rel in members})
+        if len(sources) == 1:
+            # 只有同名的原图与缩略图：ImagesPipeline 的衍生图
+            derived += 1
+            continue
+        full_names = {os.path.basename(rel) for rel in members if role_of(rel) == "full"}
+        persons = sorted({name for rel in members for name in by_avatar.get(rel, [])})
+        duplicate_clusters.append({
+            "sources": len(sources),
+            "bytes": sum(features[abs_of[rel]]["bytes"] or 0 for rel in members),
+            "persons": persons,
+            "members": [
+                {
+                    "path": rel,
+                    "role": role_of(rel),
+                    "derived": role_of(rel) != "full" and os.path.basename(rel) in full_names,
+                    "distance": bin(hashes[rel] ^ hashes[members[0]]).count("1"),
+                    "persons": by_avatar.get(rel, []),
+                }
+                for rel in members
+            ],
+        })
+    duplicate_clusters.sort(key=lambda c: (-len(c["persons"]), -c["sources"], c["members"][0]["path"]))
+    shared = [c for c in duplicate_clusters if len(c["persons"]) > 1]
+    elapsed = time.perf_counter() - start
+
+    print(f"[find_duplicate_images] images={len(images)} hashed={len(hashes)} undecodable={len(undecodable)} "
+          f"distance={args.distance} clusters={len(duplicate_clusters)} derived_thumb_groups={derived} "
+          f"shared_face_clusters={len(shared)} seconds={elapsed:.3f}")
+    for c in duplicate_clusters[:max(0, args.limit)]:
+        who = f" persons={','.join(c['persons'])}" if c["persons"] else ""
+        print(f"- sources={c['sources']}{who}")
+        for m in c["members"]:
+            if not m["derived"]:
+                print(f"  - {m['path']} (d={m['distance']})")
+
+    if args.report:
+        _save_json(args.report, {
+            "distance": args.distance,
+            "images": len(images),
+            "undecodable": undecodable,
+            "clusters": duplicate_clusters,
+        })
+        print(f"[find_duplicate_images] report={os.path.abspath(args.report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,79 +5,51 @@
 为缺少头像的人物分配现有图片或生成新的头像
 """
 
+import argparse
 import json
 import os
 import hashlib
 import random
 from pathlib import Path
-from PIL import Image
-import numpy as np
+
+from image_analysis import is_portrait_image
+from image_feature_cache import DEFAULT_CACHE_PATH, cached_analyze_images
 
 def get_person_hash(person_name):
     """为人物生成稳定的哈希值"""
     return hashlib.sha1(person_name.encode('utf-8')).hexdigest()[:40]
 
-def is_likely_portrait(image_path):
+def is_likely_portrait(image_path, analysis=None):
     """
     判断图片是否可能是人物肖像
-    基于简单的图像特征分析：
-    1. 检查图片尺寸比例（竖图更可能是肖像）
-    2. 检查颜色分布（是否有肤色区域）
+    基于简单的图像特征分析（见 image_analysis.is_portrait_image）：
+    1. 检查图片尺寸比例（竖图更可能是肖像，直接返回，不解码像素）
+    2. 检查颜色分布（是否有肤色区域，在缩小后的图片上估计）
+    analysis 为本次运行的批量分析结果时直接复用，不再重复解码
     """
-    try:
-        with Image.open(image_path) as img:
-            # 获取图片尺寸
-            width, height = img.size
-            
-            # 检查比例：竖图更可能是肖像
-            if height > width * 0.8:
-                return True
-            
-            # 转换为RGB
-            img_rgb = img.convert('RGB')
-            img_array = np.array(img_rgb)
-            
-            # 计算肤色像素比例
-            # 简单的肤色范围定义 (基于YCbCr颜色空间的简化)
-            r, g, b = img_array[:,:,0], img_array[:,:,1], img_array[:,:,2]
-            
-            # 肤色检测条件
-            # R > G > B
-            condition1 = (r > g) & (g > b)
-            # R > 95, G > 40, B > 20
-            condition2 = (r > 95) & (g > 40) & (b > 20)
-            # 最大RGB - 最小RGB > 15
-            condition3 = (np.maximum(np.maximum(r, g), b) - np.minimum(np.minimum(r, g), b)) > 15
-            
-            # 计算满足条件的像素比例
-            skin_pixels = np.sum(condition1 & condition2 & condition3)
-            total_pixels = width * height
-            skin_ratio = skin_pixels / total_pixels
-            
-            # 如果肤色像素比例大于5%，认为可能是肖像
-            if skin_ratio > 0.05:
-                return True
-            
-            return False
-    except Exception as e:
-        # 如果图片无法打开或处理，返回False
-        return False
+    if analysis is not None and image_path in analysis:
+        return analysis[image_path]['is_portrait']
+    return is_portrait_image(image_path)
 
-def get_image_files(image_dir, filter_portraits=True):
+def list_image_paths(image_dir):
+    """列出目录下的图片文件路径"""
+    if not os.path.exists(image_dir):
+        return []
+    return sorted(
+        os.path.join(image_dir, file)
+        for file in os.listdir(image_dir)
+        if file.endswith(('.jpg', '.png', '.jpeg', '.gif'))
+    )
+
+def get_image_files(image_dir, filter_portraits=True, analysis=None):
     """获取所有图片文件"""
     image_files = []
-    if os.path.exists(image_dir):
-        for file in os.listdir(image_dir):
-            if file.endswith(('.jpg', '.png', '.jpeg', '.gif')):
-                if filter_portraits:
-                    full_path = os.path.join(image_dir, file)
-                    if is_likely_portrait(full_path):
-                        image_files.append(file)
-                else:
-                    image_files.append(file)
+    for full_path in list_image_paths(image_dir):
+        if not filter_portraits or is_likely_portrait(full_path, analysis):
+            image_files.append(os.path.basename(full_path))
     return sorted(image_files)
 
-def assign_avatars_to_persons():
+def assign_avatars_to_persons(workers=None, cache_path=DEFAULT_CACHE_PATH):
     """为人物分配头像"""
     
     # 文件路径
@@ -93,8 +65,16 @@ def assign_avatars_to_persons():
         print(f"❌ 加载人物数据失败: {e}")
         return
     
+    # 目录中的图片和现有头像一起并行分析，每张图片只解码一次；未变化的图片直接读特征缓存
+    avatar_paths = [
+        os.path.join(images_dir, p['avatarUrl'].split('/')[-1])
+        for p in persons_data if p.get('avatarUrl')
+    ]
+    analysis = cached_analyze_images(list_image_paths(images_dir) + avatar_paths, workers=workers, cache_path=cache_path)
+    print(f"✅ 已分析 {len(analysis)} 个图片文件")
+    
     # 获取所有图片文件（过滤肖像）
-    image_files = get_image_files(images_dir, filter_portraits=True)
+    image_files = get_image_files(images_dir, filter_portraits=True, analysis=analysis)
     print(f"✅ 找到 {len(image_files)} 个可能是人物肖像的图片文件")
     
     # 检查现有头像是否是肖像，如果不是则移除
@@ -104,7 +84,7 @@ def assign_avatars_to_persons():
         if person.get('avatarUrl'):
             avatar_filename = person['avatarUrl'].split('/')[-1]
             avatar_path = os.path.join(images_dir, avatar_filename)
-            if not is_likely_portrait(avatar_path):
+            if not is_likely_portrait(avatar_path, analysis):
                 # 移除非肖像头像
                 del person['avatarUrl']
                 persons_with_invalid_avatars.append(person['name'])
@@ -203,11 +183,16 @@ def create_person_image_mapping():
         print(f"❌ 保存映射失败: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="为缺少头像的人物分配肖像图片。")
+    parser.add_argument("--workers", type=int, help="图片分析进程数（默认 CPU 核数，1 表示串行）")
+    parser.add_argument("--no-cache", action="store_true", help="不读写图片特征缓存（scripts/.cache/image_features.sqlite3）")
+    args = parser.parse_args()
+    
     print("🎭 历史人物头像修复工具")
     print("="*50)
     
     # 修复头像
-    assign_avatars_to_persons()
+    assign_avatars_to_persons(workers=args.workers, cache_path=None if args.no_cache else DEFAULT_CACHE_PATH)
     
     # 创建映射
     print("\n📋 创建人物图片映射...")
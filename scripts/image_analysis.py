@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片分析引擎
+每张图片只打开、解码一次，得到尺寸、格式、能否解码、肤色比例、是否像肖像等特征，
+供头像修复（fix_persons_avatars.py）和图片验证（comprehensive_image_validator.py）共用。
+感知哈希只有去重（find_duplicate_images.py）需要，按 phash=True 单独开启；
+只判断是否像肖像时用 is_portrait_image，竖图/方图读完文件头即返回，不解码像素。
+批量分析使用进程池，按块（chunksize）分发任务以减少进程间通信开销。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+from PIL import Image
+
+
+# 肤色分析前先把图片缩小到该边长以内（比例只需估计，无需全分辨率）
+ANALYSIS_SIZE = 128
+# 肤色像素比例超过该值认为可能是肖像
+SKIN_RATIO_THRESHOLD = 0.05
+# 任务数少于该值时直接在当前进程计算，避免进程池启动开销
+MIN_PARALLEL_ITEMS = 16
+
+# 感知哈希：灰度缩到 32x32 做二维 DCT，取左上 8x8 低频系数与中位数比较得到 64 位
+PHASH_SIZE = 8
+PHASH_DCT_SIZE = 32
+_n = np.arange(PHASH_DCT_SIZE)
+# DCT-II 基矩阵的前 PHASH_SIZE 行（只需要低频部分）
+_PHASH_DCT = np.cos(np.pi * (2 * _n[None, :] + 1) * np.arange(PHASH_SIZE)[:, None] / (2 * PHASH_DCT_SIZE))
+del _n
+
+
+def load_analysis_image(img, size=ANALYSIS_SIZE):
+    """
+    把已打开的图片缩小到分析尺寸并转为RGB
+    JPEG 先用 draft 模式在解码阶段按 1/2、1/4、1/8 缩小，其余格式解码后再 thumbnail
+    """
+    img.draft('RGB', (size, size))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.thumbnail((size, size))
+    return img
+
+
+def skin_mask(img_rgb):
+    """
+    肤色像素掩码（简单的RGB规则）：
+    1. R > G > B
+    2. R > 95, G > 40, B > 20
+    3. 最大RGB - 最小RGB > 15；在 R > G > B 时即 R - B > 15
+    各条件依次原地合并到同一个 bool 掩码上，只额外分配一个临时掩码和一个 uint8 差值数组
+    """
+    r, g, b = (np.asarray(band) for band in img_rgb.split())
+    mask = np.greater(r, g)
+    tmp = np.empty_like(mask)
+    np.logical_and(mask, np.greater(g, b, out=tmp), out=mask)
+    np.logical_and(mask, np.greater(r, 95, out=tmp), out=mask)
+    np.logical_and(mask, np.greater(g, 40, out=tmp), out=mask)
+    np.logical_and(mask, np.greater(b, 20, out=tmp), out=mask)
+    # mask 为真处 R > B，uint8 减法不会回绕；其余位置的回绕结果会被 mask 过滤
+    diff = np.subtract(r, b)
+    np.logical_and(mask, np.greater(diff, 15, out=tmp), out=mask)
+    return mask
+
+
+def skin_ratio(img_rgb):
+    """肤色像素比例"""
+    mask = skin_mask(img_rgb)
+    if not mask.size:
+        return 0.0
+    return np.count_nonzero(mask) / mask.size
+
+
+def perceptual_hash(img):
+    """DCT 感知哈希，返回 16 位十六进制字符串；视觉上相同的图片（不同尺寸/压缩）汉明距离很小"""
+    gray = img.convert('L').resize((PHASH_DCT_SIZE, PHASH_DCT_SIZE), Image.BILINEAR)
+    pixels = np.asarray(gray, dtype=np.float64)
+    coeffs = _PHASH_DCT @ pixels @ _PHASH_DCT.T
+    bits = (coeffs > np.median(coeffs)).ravel()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f'{value:0{PHASH_SIZE * PHASH_SIZE // 4}x}'
+
+
+def hamming_distance(hash_a, hash_b):
+    """两个十六进制感知哈希之间的汉明距离"""
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+def is_portrait_shape(width, height):
+    """竖图/方图更可能是肖像"""
+    return height > width * 0.8
+
+
+def is_portrait_image(path):
+    """
+    只判断是否像肖像（头像筛选用）：先看尺寸比例，竖图/方图直接返回，不解码像素；
+    横图才缩小解码估计肤色比例。无法打开或解码时返回 False
+    """
+    try:
+        with Image.open(path) as img:
+            if is_portrait_shape(*img.size):
+                return True
+            return bool(skin_ratio(load_analysis_image(img)) > SKIN_RATIO_THRESHOLD)
+    except Exception:
+        return False
+
+
+def analyze_image(path, phash=False):
+    """
+    分析单张图片（只解码一次），返回：
+    {'path', 'bytes', 'width', 'height', 'format', 'decodable', 'skin_ratio', 'phash', 'is_portrait', 'error'}
+    文件不存在或无法解码时 decodable=False、is_portrait=False，错误信息写入 error
+    phash=False 时不计算感知哈希（phash 为 None）
+    """
+    result = {
+        'path': path,
+        'bytes': None,
+        'width': None,
+        'height': None,
+        'format': None,
+        'decodable': False,
+        'skin_ratio': None,
+        'phash': None,
+        'is_portrait': False,
+        'error': None,
+    }
+    try:
+        result['bytes'] = os.path.getsize(path)
+        with Image.open(path) as img:
+            result['width'], result['height'] = img.size
+            result['format'] = img.format
+            small = load_analysis_image(img)
+            ratio = skin_ratio(small)
+            hash_value = perceptual_hash(small) if phash else None
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+        return result
+
+    result['decodable'] = True
+    result['skin_ratio'] = round(float(ratio), 4)
+    result['phash'] = hash_value
+    result['is_portrait'] = bool(is_portrait_shape(result['width'], result['height']) or ratio > SKIN_RATIO_THRESHOLD)
+    return result
+
+
+def save_image_atomic(img, path, format=None, **params):
+    """
+    先写临时文件再 os.replace：替换的是路径本身，不会穿过符号链接改写 image_store 中的共享对象，
+    写到一半中断也不会留下半截图片
+    """
+    tmp = f"{path}.tmp"
+    try:
+        img.save(tmp, format or Image.registered_extensions().get(os.path.splitext(path)[1].lower()), **params)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def default_workers():
+    return max(1, os.cpu_count() or 1)
+
+
+def parallel_map(fn, items, workers=None, chunksize=None):
+    """
+    用进程池按块并行执行 fn（fn 必须是模块级函数或其 partial，便于在子进程中导入），结果顺序与 items 一致
+    workers=1 或任务很少时直接串行执行
+    """
+    items = list(items)
+    workers = workers or default_workers()
+    if workers <= 1 or len(items) < MIN_PARALLEL_ITEMS:
+        return [fn(x) for x in items]
+    workers = min(workers, len(items))
+    if not chunksize:
+        # 每个进程约分到 4 块：块越大通信越少，块越小负载越均衡
+        chunksize = max(1, len(items) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items, chunksize=chunksize))
+
+
+def analyze_images(paths, workers=None, chunksize=None, phash=False):
+    """批量分析图片，返回 {path: 分析结果}；重复路径只分析一次"""
+    unique = list(dict.fromkeys(paths))
+    fn = partial(analyze_image, phash=True) if phash else analyze_image
+    return {r['path']: r for r in parallel_map(fn, unique, workers, chunksize)}
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片特征持久化缓存（SQLite）
+
+- files 表：path -> (mtime_ns, size, sha256)，路径、修改时间、大小都没变时直接信任记录的内容哈希
+- features 表：sha256 -> 尺寸、格式、肤色比例、感知哈希、能否解码、字节数
+  感知哈希只在调用方要求时（phash=True，去重脚本）计算；已有特征但缺哈希的图片届时补算
+- 特征按内容哈希存储：文件改名/复制不会重复解码，内容变化时自动重新分析
+- FEATURE_VERSION 改变（分析算法变化）时旧特征自动失效
+
+目录未变化时重跑只需要 stat + 一次查询。
+头像修复、图片验证、去重等脚本通过 cached_analyze_images 读取特征。
+
+运行方式（在仓库根目录，预热/刷新缓存）：
+  python scripts/image_feature_cache.py
+  python scripts/image_feature_cache.py --dir frontend/public/images/full --dir frontend/public/images/thumbs/small --prune
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from functools import partial
+
+from image_analysis import (
+    SKIN_RATIO_THRESHOLD,
+    analyze_image,
+    analyze_images,
+    is_portrait_shape,
+    parallel_map,
+)
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CACHE_PATH = os.path.join(REPO_ROOT, "scripts", ".cache", "image_features.sqlite3")
+DEFAULT_IMAGES_DIR = os.path.join(REPO_ROOT, "frontend", "public", "images", "full")
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# 分析算法（缩放尺寸、感知哈希等）变化时递增，使旧特征失效
+FEATURE_VERSION = 1
+
+FEATURE_COLUMNS = ('width', 'height', 'format', 'skin_ratio', 'phash', 'decodable', 'bytes', 'error')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS features (
+    sha256 TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    width INTEGER,
+    height INTEGER,
+    format TEXT,
+    skin_ratio REAL,
+    phash TEXT,
+    decodable INTEGER NOT NULL,
+    bytes INTEGER,
+    error TEXT
+);
+"""
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class ImageFeatureCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+        self.stats = {'files': 0, 'stat_hits': 0, 'hashed': 0, 'analyzed': 0, 'missing': 0}
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load_files(self):
+        return {row[0]: row[1:] for row in self.conn.execute("SELECT path, mtime_ns, size, sha256 FROM files")}
+
+    def _load_features(self, hashes):
+        out = {}
+        hashes = list(hashes)
+        # SQLite 单条语句的参数个数有上限，分批查询
+        for i in range(0, len(hashes), 500):
+            batch = hashes[i:i + 500]
+            marks = ','.join('?' * len(batch))
+            rows = self.conn.execute(
+                f"SELECT sha256, {', '.join(FEATURE_COLUMNS)} FROM features WHERE version = ? AND sha256 IN ({marks})",
+                [FEATURE_VERSION, *batch],
+            )
+            for row in rows:
+                out[row[0]] = dict(zip(FEATURE_COLUMNS, row[1:]))
+        return out
+
+    def get_features(self, paths, workers=None, phash=False):
+        """
+        返回 {path: 特征}，结构与 image_analysis.analyze_image 一致并附带 sha256
+        stat 与记录不符的文件重新计算内容哈希；内容哈希没有特征的文件才解码分析
+        phash=True 时可解码但还没有感知哈希的特征也重新分析
+        """
+        paths = list(dict.fromkeys(paths))
+        known_files = self._load_files()
+        results = {}
+        stat_of = {}
+        sha_of = {}
+        pending = []
+
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                self.stats['missing'] += 1
+                results[path] = self._missing(path, e)
+                continue
+            key = _cache_key(path)
+            stat_of[path] = (st.st_mtime_ns, st.st_size)
+            rec = known_files.get(key)
+            if rec and rec[0] == st.st_mtime_ns and rec[1] == st.st_size:
+                sha_of[path] = rec[2]
+                self.stats['stat_hits'] += 1
+            else:
+                pending.append(path)
+
+        # stat 未命中（新文件或修改过）：并行计算内容哈希
+        if pending:
+            new_files = []
+            for path, sha in zip(pending, parallel_map(file_sha256, pending, workers)):
+                sha_of[path] = sha
+                mtime_ns, size = stat_of[path]
+                new_files.append((_cache_key(path), mtime_ns, size, sha))
+            self.stats['hashed'] += len(pending)
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", new_files)
+
+        # 只有内容哈希没有（当前版本）特征的文件才解码分析；相同内容只分析一份
+        features = self._load_features(set(sha_of.values()))
+        to_analyze = {}
+        for path, sha in sha_of.items():
+            feat = features.get(sha)
+            stale = feat is None or (phash and feat['decodable'] and not feat['phash'])
+            if stale and sha not in to_analyze:
+                to_analyze[sha] = path
+        if to_analyze:
+            rows = []
+            fn = partial(analyze_image, phash=True) if phash else analyze_image
+            for sha, analysis in zip(to_analyze, parallel_map(fn, list(to_analyze.values()), workers)):
+                feat = {c: analysis[c] for c in FEATURE_COLUMNS}
+                features[sha] = feat
+                rows.append((sha, FEATURE_VERSION, *(feat[c] for c in FEATURE_COLUMNS)))
+            self.stats['analyzed'] += len(rows)
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO features VALUES ({','.join('?' * (2 + len(FEATURE_COLUMNS)))})",
+                    rows,
+                )
+
+        for path, sha in sha_of.items():
+            results[path] = self._to_result(path, sha, features[sha])
+        self.stats['files'] += len(paths)
+        return {p: results[p] for p in paths}
+
+    def prune(self):
+        """
+        删除磁盘上已不存在的文件记录，以及不再被任何文件引用的特征
+        缓存由多个脚本、多个目录共用，只按文件是否存在判断，不依赖本次扫描了哪些目录
+        """
+        stale = [(p,) for p in self._load_files() if not os.path.exists(p)]
+        with self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", stale)
+            self.conn.execute("DELETE FROM features WHERE sha256 NOT IN (SELECT sha256 FROM files)")
+        return len(stale)
+
+    @staticmethod
+    def _to_result(path, sha, feat):
+        result = {'path': path, 'sha256': sha, **feat}
+        result['decodable'] = bool(feat['decodable'])
+        result['is_portrait'] = bool(
+            result['decodable']
+            and (is_portrait_shape(feat['width'], feat['height']) or (feat['skin_ratio'] or 0) > SKIN_RATIO_THRESHOLD)
+        )
+        return result
+
+    @staticmethod
+    def _missing(path, error):
+        result = {'path': path, 'sha256': None, **{c: None for c in FEATURE_COLUMNS}}
+        result.update(decodable=False, is_portrait=False, error=f"{type(error).__name__}: {error}")
+        return result
+
+
+def cached_analyze_images(paths, workers=None, cache_path=DEFAULT_CACHE_PATH, phash=False):
+    """analyze_images 的缓存版本；cache_path 为 None 时不使用缓存"""
+    if cache_path is None:
+        return analyze_images(paths, workers=workers, phash=phash)
+    with ImageFeatureCache(cache_path) as cache:
+        return cache.get_features(paths, workers=workers, phash=phash)
+
+
+def list_images(image_dir):
+    if not os.path.isdir(image_dir):
+        return []
+    return sorted(
+        os.path.join(image_dir, n)
+        for n in os.listdir(image_dir)
+        if n.lower().endswith(IMAGE_EXTS)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预热/刷新图片特征缓存（SQLite，按内容哈希存储）。")
+    parser.add_argument("--dir", action="append", help="图片目录，可重复（默认 frontend/public/images/full）")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="缓存文件路径（默认 scripts/.cache/image_features.sqlite3）")
+    parser.add_argument("--workers", type=int, help="分析进程数（默认 CPU 核数）")
+    parser.add_argument("--prune", action="store_true", help="删除磁盘上已不存在的文件记录和无引用的特征（不限于本次 --dir）")
+    args = parser.parse_args()
+
+    dirs = args.dir or [DEFAULT_IMAGES_DIR]
+    paths = [p for d in dirs for p in list_images(os.path.abspath(d))]
+
+    start = time.perf_counter()
+    with ImageFeatureCache(args.cache) as cache:
+        results = cache.get_features(paths, workers=args.workers)
+        pruned = cache.prune() if args.prune else 0
+        stats = cache.stats
+    elapsed = time.perf_counter() - start
+
+    undecodable = sum(1 for r in results.values() if not r['decodable'])
+    print(f"[image_feature_cache] files={stats['files']} stat_hits={stats['stat_hits']} hashed={stats['hashed']} "
+          f"analyzed={stats['analyzed']} undecodable={undecodable} pruned={pruned} seconds={elapsed:.3f}")
+    print(f"- cache: {os.path.abspath(args.cache)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片垃圾回收（按引用计数）
+
+1. 引用索引：遍历 frontend/public/data 下所有 *.json 中的全部字符串，以及 frontend/src、index.html 中的字面量，
+   收集所有 /images/... 引用（不限于 avatarUrl / imageUrl，也不只按文件名匹配）
+2. 衍生图：thumbs/small、thumbs/medium、variants/<宽度>w 中的文件由 full 中的同名原图生成（ImagesPipeline /
+   build_image_variants.py），原图被引用时衍生图一并保留
+3. 其余引用计数为 0 的图片即为孤立图片；默认只报告（dry run），--quarantine 时移动到隔离目录，
+   并写入 gc_manifest.json，可用 --restore 恢复
+
+运行方式（在仓库根目录）：
+  python scripts/image_gc.py
+  python scripts/image_gc.py --quarantine ../images_quarantine
+  python scripts/image_gc.py --restore ../images_quarantine
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FRONTEND_DIR = os.path.join(REPO_ROOT, "frontend")
+DATA_DIR = os.path.join(FRONTEND_DIR, "public", "data")
+IMAGES_ROOT = os.path.join(FRONTEND_DIR, "public", "images")
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+SOURCE_EXTS = ('.ts', '.tsx', '.js', '.jsx', '.vue', '.html', '.css')
+
+# 衍生图目录（相对 images 根目录，支持通配）：文件名与 full 中的原图相同
+DERIVED_DIRS = ["thumbs/small", "thumbs/medium", "variants/*"]
+ORIGINAL_DIR = "full"
+
+# 构建产物目录（相对 images 根目录）：不按引用计数回收
+# avatars/ 为 build_avatar_crops.py 按人物ID输出的裁剪头像，前端按约定路径访问
+SKIP_DIRS = ["avatars"]
+
+MANIFEST_NAME = "gc_manifest.json"
+IMAGE_REF_RE = re.compile(r'/images/([^"\'`\s)?#]+)')
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _iter_strings(node):
+    if isinstance(node, str):
+        yield node
+    elif isinstance(node, dict):
+        for v in node.values():
+            yield from _iter_strings(v)
+    elif isinstance(node, list):
+        for v in node:
+            yield from _iter_strings(v)
+
+
+def build_reference_index(data_dir=DATA_DIR, frontend_dir=FRONTEND_DIR):
+    """
+    返回 (refs, by_source)：
+    refs: {相对 images 根目录的路径: 引用次数}
+    by_source: {来源文件: 引用次数}
+    """
+    refs = {}
+    by_source = {}
+
+    def add(text, source):
+        for m in IMAGE_REF_RE.finditer(text):
+            rel = m.group(1)
+            refs[rel] = refs.get(rel, 0) + 1
+            by_source[source] = by_source.get(source, 0) + 1
+
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(".json"):
+            continue
+        source = f"data/{name}"
+        with open(os.path.join(data_dir, name), "r", encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+        try:
+            strings = list(_iter_strings(json.loads(text)))
+        except ValueError:
+            # 无法解析的数据文件按原始文本扫描（宁可多保留，不可误删）
+            print(f"⚠️  {source} 不是合法 JSON，按原始文本扫描引用")
+            strings = [text]
+        for s in strings:
+            if "/images/" in s:
+                add(s, source)
+
+    src_roots = [os.path.join(frontend_dir, "src"), os.path.join(frontend_dir, "index.html")]
+    for root in src_roots:
+        if os.path.isfile(root):
+            files = [root]
+        else:
+            files = [os.path.join(d, n) for d, _, ns in os.walk(root) for n in ns if n.endswith(SOURCE_EXTS)]
+        for path in files:
+            with open(path, "r", encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+            if "/images/" in text:
+                add(text, os.path.relpath(path, frontend_dir).replace(os.sep, "/"))
+    return refs, by_source
+
+
+def list_images(images_root=IMAGES_ROOT):
+    """返回 {相对路径: 字节数}（不含 SKIP_DIRS）"""
+    out = {}
+    for dirpath, dirnames, filenames in os.walk(images_root):
+        if os.path.abspath(dirpath) == os.path.abspath(images_root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for n in filenames:
+            if n.lower().endswith(IMAGE_EXTS):
+                path = os.path.join(dirpath, n)
+                out[os.path.relpath(path, images_root).replace(os.sep, "/")] = os.path.getsize(path)
+    return out
+
+
+def original_of(rel):
+    """衍生图对应的原图相对路径；不是衍生图返回 None"""
+    parent, _, name = rel.rpartition("/")
+    if any(fnmatch.fnmatchcase(parent, d) for d in DERIVED_DIRS):
+        return f"{ORIGINAL_DIR}/{name}"
+    return None
+
+
+def compute_orphans(images, refs):
+    """引用计数为 0 的图片（衍生图继承原图的引用）"""
+    orphans = []
+    for rel in sorted(images):
+        if refs.get(rel):
+            continue
+        original = original_of(rel)
+        if original and refs.get(original):
+            continue
+        orphans.append(rel)
+    return orphans
+
+
+def quarantine(orphans, quarantine_dir, images_root=IMAGES_ROOT):
+    """把孤立图片按原相对路径移动到隔离目录，并追加记录到 gc_manifest.json"""
+    os.makedirs(quarantine_dir, exist_ok=True)
+    manifest_path = os.path.join(quarantine_dir, MANIFEST_NAME)
+    manifest = _load_json(manifest_path) if os.path.exists(manifest_path) else {"files": []}
+    moved_at = datetime.now().isoformat()
+    for rel in orphans:
+        dst = os.path.join(quarantine_dir, *rel.split("/"))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        shutil.move(os.path.join(images_root, *rel.split("/")), dst)
+        manifest["files"].append({"path": rel, "movedAt": moved_at})
+    _save_json(manifest_path, manifest)
+
+
+def restore(quarantine_dir, images_root=IMAGES_ROOT):
+    manifest_path = os.path.join(quarantine_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        raise SystemExit(f"隔离目录中没有 {MANIFEST_NAME}：{quarantine_dir}")
+    manifest = _load_json(manifest_path)
+    restored = 0
+    remaining = []
+    for item in manifest["files"]:
+        src = os.path.join(quarantine_dir, *item["path"].split("/"))
+        dst = os.path.join(images_root, *item["path"].split("/"))
+        if os.path.exists(src) and not os.path.exists(dst):
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.move(src, dst)
+            restored += 1
+        elif os.path.exists(src):
+            remaining.append(item)
+    manifest["files"] = remaining
+    _save_json(manifest_path, manifest)
+    return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按引用计数回收未被任何数据/代码引用的图片（默认只报告）。")
+    parser.add_argument("--quarantine", help="把孤立图片移动到该目录（保留相对路径，可用 --restore 恢复）")
+    parser.add_argument("--restore", help="从隔离目录恢复之前移走的图片")
+    parser.add_argument("--report", help="把引用索引与孤立列表写入 JSON 文件")
+    args = parser.parse_args()
+
+    if args.restore:
+        restored = restore(os.path.abspath(args.restore))
+        print(f"[image_gc] restored={restored} from={os.path.abspath(args.restore)}")
+        return
+
+    refs, by_source = build_reference_index()
+    images = list_images()
+    orphans = compute_orphans(images, refs)
+    missing = sorted(rel for rel in refs if rel not in images)
+    orphan_bytes = sum(images[rel] for rel in orphans)
+
+    print(f"[image_gc] images={len(images)} referenced={len(images) - len(orphans)} orphans={len(orphans)} "
+          f"orphan_bytes={orphan_bytes} dangling_refs={len(missing)} mode={'quarantine' if args.quarantine else 'dry-run'}")
+    for source, count in sorted(by_source.items()):
+        print(f"- refs: {source}={count}")
+    for rel in missing:
+        print(f"- dangling: /images/{rel}")
+
+    if args.report:
+        _save_json(args.report, {
+            "references": dict(sorted(refs.items())),
+            "bySource": by_source,
+            "orphans": orphans,
+            "orphanBytes": orphan_bytes,
+            "dangling": missing,
+        })
+        print(f"[image_gc] report={os.path.abspath(args.report)}")
+
+    if args.quarantine and orphans:
+        quarantine(orphans, os.path.abspath(args.quarantine))
+        print(f"[image_gc] moved={len(orphans)} to={os.path.abspath(args.quarantine)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容寻址图片存储
+
+frontend/image_store/<sha256 前两位>/<sha256>.<ext> 保存每份内容唯一的一份实体文件（在 public/ 之外，不会被打包进前端），
+原有的公开路径（full/、persons/、thumbs/ ...）改为指向它的相对符号链接。
+内容相同、名字不同的图片因此只占一份磁盘空间。
+运行时先探测能否创建符号链接（Windows 未开启开发者模式时不能），不能则改用硬链接，
+硬链接也不行（如跨分区）时退回普通复制（可以正常使用，但不再节省空间）。
+
+- migrate：把现有目录转换为存储 + 链接；数据文件中图片字段（avatarUrl 等）里指向重复图片的引用
+  改写为同一内容的规范路径（优先 full/，其次 persons/，其余按路径排序），改写后多余的路径可由 image_gc.py 回收
+- report：统计存储对象、链接数以及按 inode 去重后节省的磁盘空间；--gc 删除不再被任何公开路径使用的存储对象
+
+存储对象设为只读。写图片的工具必须“写临时文件再 os.replace”替换链接本身，
+不能就地写入（否则会穿过链接改掉存储对象以及所有共享它的路径）：
+recompress_images.py、build_image_variants.py、build_avatar_crops.py、build_avatar_atlas.py（image_analysis.save_image_atomic）
+与爬虫的 AtomicImagesPipeline 均按此方式写入。
+
+运行方式（在仓库根目录）：
+  python scripts/image_store.py migrate --dry-run
+  python scripts/image_store.py migrate
+  python scripts/image_store.py report
+  python scripts/image_store.py report --gc
+"""
+
+import argparse
+import filecmp
+import json
+import os
+import shutil
+import stat
+
+from image_analysis import parallel_map
+from image_feature_cache import IMAGE_EXTS, file_sha256
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DATA_DIR = os.path.join(REPO_ROOT, "frontend", "public", "data")
+IMAGES_ROOT = os.path.join(REPO_ROOT, "frontend", "public", "images")
+STORE_DIR = os.path.join(REPO_ROOT, "frontend", "image_store")
+
+# 重复内容选规范路径时的目录优先级（越靠前越优先）
+CANONICAL_PREFIXES = ["full/", "persons/"]
+# 数据文件中保存图片路径的字段（值为字符串或字符串列表）；其余字段即使含有相同文本也不改写
+IMAGE_PATH_FIELDS = {"avatarUrl", "imageUrl", "imageUrls", "images", "thumbnailUrl"}
+
+
+def store_path_for(sha, ext):
+    return os.path.join(STORE_DIR, sha[:2], f"{sha}{ext.lower()}")
+
+
+def list_public_images(images_root=IMAGES_ROOT):
+    """返回 {相对 images 根目录的路径: 绝对路径}"""
+    out = {}
+    for dirpath, _, filenames in os.walk(images_root):
+        for n in filenames:
+            if n.lower().endswith(IMAGE_EXTS):
+                path = os.path.join(dirpath, n)
+                out[os.path.relpath(path, images_root).replace(os.sep, "/")] = path
+    return out
+
+
+def canonical_key(rel):
+    for i, prefix in enumerate(CANONICAL_PREFIXES):
+        if rel.startswith(prefix):
+            return (i, rel)
+    return (len(CANONICAL_PREFIXES), rel)
+
+
+def disk_usage(paths):
+    """按 (设备, inode) 去重后的实际占用字节数，以及不去重的逻辑字节数"""
+    seen = set()
+    physical = 0
+    logical = 0
+    for path in paths:
+        st = os.stat(path)
+        logical += st.st_size
+        key = (st.st_dev, st.st_ino)
+        if key not in seen:
+            seen.add(key)
+            physical += st.st_size
+    return physical, logical
+
+
+def detect_link_mode(store_dir=STORE_DIR, images_root=IMAGES_ROOT):
+    """
+    实际创建一次测试链接，返回可用的方式："symlink"、"hardlink" 或 "copy"
+    （Windows 未授权时不能建符号链接，存储与公开目录跨分区时不能建硬链接）
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    target = os.path.join(store_dir, ".link-probe")
+    probe = os.path.join(images_root, ".link-probe")
+    if os.path.lexists(probe):
+        os.remove(probe)
+    with open(target, "wb"):
+        pass
+    try:
+        for mode, make in (("symlink", lambda: os.symlink(os.path.relpath(target, images_root), probe)),
+                           ("hardlink", lambda: os.link(target, probe))):
+            try:
+                make()
+            except (OSError, NotImplementedError):
+                continue
+            os.remove(probe)
+            return mode
+        return "copy"
+    finally:
+        os.remove(target)
+
+
+def _link(store_path, public_path, mode="symlink"):
+    """原子地把公开路径替换为指向存储对象的相对符号链接（或硬链接、复制件）"""
+    tmp = f"{public_path}.store-tmp"
+    if os.path.lexists(tmp):
+        os.remove(tmp)
+    if mode == "symlink":
+        os.symlink(os.path.relpath(store_path, os.path.dirname(public_path)), tmp)
+    elif mode == "hardlink":
+        os.link(store_path, tmp)
+    else:
+        shutil.copyfile(store_path, tmp)
+    os.replace(tmp, public_path)
+
+
+def _already_linked(store_path, public_path, mode="symlink"):
+    """公开路径已是存储对象本身（符号链接/硬链接）；只能复制时内容相同即可"""
+    if not os.path.exists(store_path):
+        return False
+    if os.path.samefile(store_path, public_path):
+        return True
+    return mode == "copy" and filecmp.cmp(store_path, public_path, shallow=False)
+
+
+def _add_object(src, store_path):
+    """复制一份内容到存储并设为只读（不与公开文件共享 inode，之后公开文件被替换为链接）"""
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    tmp = f"{store_path}.tmp"
+    shutil.copy2(src, tmp)
+    os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    os.replace(tmp, store_path)
+
+
+def _rewrite_image_fields(node, renames):
+    """递归改写 IMAGE_PATH_FIELDS 中的 /images/<旧路径>，返回替换次数"""
+    count = 0
+    if isinstance(node, list):
+        for item in node:
+            count += _rewrite_image_fields(item, renames)
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            if key in IMAGE_PATH_FIELDS:
+                values = value if isinstance(value, list) else [value]
+                for i, v in enumerate(values):
+                    if isinstance(v, str) and v.startswith("/images/") and v[len("/images/"):] in renames:
+                        values[i] = "/images/" + renames[v[len("/images/"):]]
+                        count += 1
+                if not isinstance(value, list):
+                    node[key] = values[0]
+            count += _rewrite_image_fields(value, renames)
+    return count
+
+
+def rewrite_references(renames, data_dir=DATA_DIR, dry_run=False):
+    """
+    把数据文件图片字段（IMAGE_PATH_FIELDS）中的 /images/<旧路径> 改写为 /images/<规范路径>
+    只有发生改写的文件才重新写出（indent=2、ensure_ascii=False，保留原有的结尾换行）；
+    无法解析的 JSON 跳过。返回 {数据文件: 替换次数}
+    """
+    changed = {}
+    if not renames:
+        return changed
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(data_dir, name)
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            print(f"- rewrite: 跳过无法解析的 data/{name}（{e}）")
+            continue
+        count = _rewrite_image_fields(data, renames)
+        if count:
+            changed[name] = count
+            if not dry_run:
+                tmp = f"{path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(data, ensure_ascii=False, indent=2) + ("\n" if text.endswith("\n") else ""))
+                os.replace(tmp, path)
+    return changed
+
+
+def migrate(dry_run=False, rewrite=True, workers=None):
+    images = list_public_images()
+    rels = sorted(images)
+    before_physical, logical = disk_usage(images[r] for r in rels)
+
+    groups = {}
+    for rel, sha in zip(rels, parallel_map(file_sha256, [images[r] for r in rels], workers)):
+        groups.setdefault(sha, []).append(rel)
+
+    mode = "symlink" if dry_run else detect_link_mode()
+    renames = {}
+    linked = 0
+    for sha, members in groups.items():
+        members.sort(key=canonical_key)
+        canonical = members[0]
+        for rel in members[1:]:
+            renames[rel] = canonical
+        store_path = store_path_for(sha, os.path.splitext(canonical)[1])
+        if dry_run:
+            continue
+        if not os.path.exists(store_path):
+            _add_object(images[canonical], store_path)
+        for rel in members:
+            if not _already_linked(store_path, images[rel], mode):
+                _link(store_path, images[rel], mode)
+                linked += 1
+
+    changed = rewrite_references(renames, dry_run=dry_run) if rewrite else {}
+
+    if dry_run:
+        # 预估：每组内容只保留一份
+        after_physical = sum(os.path.getsize(images[m[0]]) for m in groups.values())
+    else:
+        # 按 inode 去重后的公开文件占用，加上没有与公开路径共享 inode 的存储对象（复制模式下即全部对象）
+        after_physical = disk_usage(images[r] for r in rels)[0] + sum(
+            os.path.getsize(p) for p in _unused_objects(images, _list_objects(), by_content=False))
+
+    print(f"[image_store] files={len(rels)} unique={len(groups)} duplicates={len(renames)} linked={linked}"
+          f"{'' if dry_run else f' link_mode={mode}'}{' dry_run=True' if dry_run else ''}")
+    print(f"- bytes: logical={logical} before={before_physical} after={after_physical} "
+          f"saved={before_physical - after_physical}")
+    if mode == "copy":
+        print("- 当前环境无法创建符号链接或硬链接，公开路径保持为普通文件，存储对象只是额外副本，不节省空间")
+    for name, count in changed.items():
+        print(f"- rewrite: data/{name} references={count}")
+
+
+def _list_objects():
+    objects = []
+    if os.path.isdir(STORE_DIR):
+        for dirpath, _, filenames in os.walk(STORE_DIR):
+            objects.extend(os.path.join(dirpath, n) for n in filenames if not n.startswith("."))
+    return objects
+
+
+def _unused_objects(images, objects, by_content=True):
+    """
+    没有任何公开路径使用的存储对象：不与公开文件共享 inode（符号链接/硬链接），
+    且 by_content=True 时也没有同内容的公开复制件（复制模式）
+    """
+    linked = {(st.st_dev, st.st_ino) for st in map(os.stat, images.values())}
+    unused = []
+    for obj in objects:
+        st = os.stat(obj)
+        if (st.st_dev, st.st_ino) not in linked:
+            unused.append(obj)
+    if not by_content or not unused:
+        return unused
+    # 只对与候选对象大小相同的公开文件计算哈希
+    sizes = {os.path.getsize(obj) for obj in unused}
+    shas = {file_sha256(p) for p in images.values() if os.path.getsize(p) in sizes}
+    return [obj for obj in unused if os.path.splitext(os.path.basename(obj))[0] not in shas]
+
+
+def report(gc=False):
+    images = list_public_images()
+    objects = _list_objects()
+    unused = _unused_objects(images, objects)
+
+    physical, logical = disk_usage(list(images.values()))
+    print(f"[image_store] files={len(images)} objects={len(objects)} unused_objects={len(unused)} "
+          f"logical_bytes={logical} physical_bytes={physical} saved={logical - physical}"
+          f"{f' removed={len(unused)}' if gc else ''}")
+    for obj in unused:
+        print(f"- unused: {os.path.relpath(obj, STORE_DIR).replace(os.sep, '/')}")
+        if gc:
+            # 存储对象是只读的，Windows 上需先去掉只读属性才能删除
+            os.chmod(obj, stat.S_IRUSR | stat.S_IWUSR)
+            os.remove(obj)
+            shard = os.path.dirname(obj)
+            if not os.listdir(shard):
+                os.rmdir(shard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内容寻址图片存储：按 SHA-256 去重，公开路径改为符号链接。")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_migrate = sub.add_parser("migrate", help="把现有图片目录转换为存储 + 链接")
+    p_migrate.add_argument("--dry-run", action="store_true", help="只统计重复与可节省空间，不修改文件")
+    p_migrate.add_argument("--no-rewrite", action="store_true", help="不改写数据文件中的重复引用")
+    p_migrate.add_argument("--workers", type=int, help="计算哈希的进程数（默认 CPU 核数）")
+
+    p_report = sub.add_parser("report", help="统计存储对象与节省的磁盘空间")
+    p_report.add_argument("--gc", action="store_true", help="删除不再被任何公开路径使用的存储对象")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate(dry_run=args.dry_run, rewrite=not args.no_rewrite, workers=args.workers)
+    else:
+        report(gc=args.gc)
+
+
+if __name__ == "__main__":
+    main()
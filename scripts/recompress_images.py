@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片重压缩（按 SSIM 搜索最低可接受质量）
+
+对每张 JPEG 在 [--min-quality, --max-quality] 区间二分搜索编码质量，
+取 SSIM（NumPy 计算，基于缩小后的亮度通道）不低于 --threshold 的最低质量重新编码：
+- 去除 EXIF / ICC 等元数据（编码前先按 EXIF 方向旋转像素，否则去掉方向标记后图片会横着显示）
+- 输出渐进式 JPEG（并开启霍夫曼表优化）
+- 只有节省比例达到 --min-savings 时才替换原文件；原图是基线（非渐进式）JPEG 时只要不变大也替换，
+  保证重压后的目录统一为渐进式；多进程并行
+- 已重压过的文件（内容哈希与 scripts/.cache/recompress_manifest.json 中记录一致）直接跳过，避免反复重压造成代际损失
+非 JPEG 文件跳过（转换格式会改变文件名与引用）。替换后可运行 build_image_variants.py 更新缩略图。
+
+运行方式（在仓库根目录）：
+  python scripts/recompress_images.py --dry-run
+  python scripts/recompress_images.py --threshold 0.985 --report scripts/reports/recompress.json
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from image_analysis import parallel_map
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_DIR = os.path.join(REPO_ROOT, "frontend", "public", "images", "full")
+DEFAULT_MANIFEST = os.path.join(REPO_ROOT, "scripts", ".cache", "recompress_manifest.json")
+
+# SSIM 在该边长以内的亮度图上计算；缩得过小（如 256）会掩盖块效应，几乎所有图片都落到最低质量
+SSIM_SIZE = 512
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def luma(img, size=SSIM_SIZE):
+    """缩小后的亮度通道（float64 数组）"""
+    gray = img.convert("L")
+    gray.thumbnail((size, size), Image.BILINEAR)
+    return np.asarray(gray, dtype=np.float64)
+
+
+def _box_mean(x, win):
+    """win x win 窗口均值（积分图实现，只保留完整窗口）"""
+    s = np.cumsum(np.cumsum(np.pad(x, ((1, 0), (1, 0))), axis=0), axis=1)
+    total = s[win:, win:] - s[:-win, win:] - s[win:, :-win] + s[:-win, :-win]
+    return total / (win * win)
+
+
+def ssim(a, b, win=SSIM_WINDOW):
+    """两张同尺寸灰度图的平均 SSIM（均匀窗口）"""
+    if a.shape != b.shape:
+        raise ValueError(f"尺寸不一致：{a.shape} vs {b.shape}")
+    if min(a.shape) < win:
+        win = max(1, min(a.shape))
+    mu_a = _box_mean(a, win)
+    mu_b = _box_mean(b, win)
+    var_a = _box_mean(a * a, win) - mu_a * mu_a
+    var_b = _box_mean(b * b, win) - mu_b * mu_b
+    cov = _box_mean(a * b, win) - mu_a * mu_b
+    num = (2 * mu_a * mu_b + SSIM_C1) * (2 * cov + SSIM_C2)
+    den = (mu_a * mu_a + mu_b * mu_b + SSIM_C1) * (var_a + var_b + SSIM_C2)
+    return float(np.mean(num / den))
+
+
+def encode(img, quality):
+    buf = io.BytesIO()
+    # 不传 exif / icc_profile 即去除元数据
+    img.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def search_quality(img, reference, threshold, min_quality, max_quality, ssim_size=SSIM_SIZE):
+    """
+    二分搜索满足 SSIM >= threshold 的最低质量
+    返回 (质量, 编码数据, SSIM)；最高质量也达不到阈值时返回最高质量的结果（SSIM 低于阈值，调用方据此跳过）
+    """
+    best = None
+    lo, hi = min_quality, max_quality
+    while lo <= hi:
+        q = (lo + hi) // 2
+        data = encode(img, q)
+        with Image.open(io.BytesIO(data)) as decoded:
+            score = ssim(reference, luma(decoded, ssim_size))
+        if score >= threshold:
+            best = (q, data, score)
+            hi = q - 1
+        else:
+            lo = q + 1
+    if best is None:
+        data = encode(img, max_quality)
+        with Image.open(io.BytesIO(data)) as decoded:
+            best = (max_quality, data, ssim(reference, luma(decoded, ssim_size)))
+    return best
+
+
+def recompress_one(task):
+    """
+    子进程任务：task = (路径, 阈值, 最低质量, 最高质量, SSIM 计算尺寸, 最小节省比例, 是否试运行, 上次输出的 sha256)
+    """
+    path, threshold, min_quality, max_quality, ssim_size, min_savings, dry_run, done_sha = task
+    with open(path, "rb") as f:
+        original = f.read()
+    before = len(original)
+    sha = hashlib.sha256(original).hexdigest()
+    result = {"path": path, "before": before, "after": before, "quality": None, "ssim": None,
+              "written": False, "skipped": None, "sha256": sha}
+    if done_sha == sha:
+        result["skipped"] = "已重压过"
+        return result
+    try:
+        with Image.open(io.BytesIO(original)) as img:
+            if img.format != "JPEG":
+                result["skipped"] = f"格式为 {img.format}"
+                return result
+            baseline = not (img.info.get("progressive") or img.info.get("progression"))
+            rgb = ImageOps.exif_transpose(img).convert("RGB")
+        reference = luma(rgb, ssim_size)
+        quality, data, score = search_quality(rgb, reference, threshold, min_quality, max_quality, ssim_size)
+    except Exception as e:
+        result["skipped"] = f"{type(e).__name__}: {e}"
+        return result
+
+    result.update(quality=quality, ssim=round(score, 5))
+    if score < threshold:
+        result["skipped"] = "SSIM 不达标"
+        return result
+    # 基线 JPEG 转渐进式本身就有收益（逐步显示），不要求达到最小节省比例
+    if len(data) > (before if baseline else before * (1 - min_savings)):
+        result["skipped"] = "节省不足"
+        return result
+    result["after"] = len(data)
+    if not dry_run:
+        tmp = f"{path}.recompress-tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        result["written"] = True
+        result["sha256"] = hashlib.sha256(data).hexdigest()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按 SSIM 阈值二分搜索 JPEG 质量并重新压缩图片。")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="图片目录（默认 frontend/public/images/full）")
+    parser.add_argument("--threshold", type=float, default=0.99, help="最低 SSIM（默认 0.99）")
+    parser.add_argument("--ssim-size", type=int, default=SSIM_SIZE, help=f"计算 SSIM 的亮度图最大边长（默认 {SSIM_SIZE}）")
+    parser.add_argument("--min-quality", type=int, default=50, help="搜索的最低质量（默认 50）")
+    parser.add_argument("--max-quality", type=int, default=92, help="搜索的最高质量（默认 92）")
+    parser.add_argument("--min-savings", type=float, default=0.05, help="节省比例低于该值时保留原文件（默认 0.05）")
+    parser.add_argument("--dry-run", action="store_true", help="只计算可节省的字节数，不替换文件")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="重压记录（默认 scripts/.cache/recompress_manifest.json）")
+    parser.add_argument("--force", action="store_true", help="忽略重压记录，所有文件都重新搜索")
+    parser.add_argument("--workers", type=int, help="进程数（默认 CPU 核数）")
+    parser.add_argument("--report", help="把逐文件结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    if not 1 <= args.min_quality <= args.max_quality <= 100:
+        raise SystemExit("质量范围需满足 1 <= --min-quality <= --max-quality <= 100")
+
+    image_dir = os.path.abspath(args.dir)
+    paths = sorted(
+        os.path.join(image_dir, n) for n in os.listdir(image_dir)
+        if n.lower().endswith((".jpg", ".jpeg"))
+    )
+    manifest = {} if args.force else _load_json(args.manifest, {})
+    start = time.perf_counter()
+    tasks = [
+        (p, args.threshold, args.min_quality, args.max_quality, args.ssim_size, args.min_savings, args.dry_run,
+         manifest.get(os.path.basename(p)))
+        for p in paths
+    ]
+    results = parallel_map(recompress_one, tasks, args.workers)
+    if not args.dry_run:
+        for r in results:
+            if r["written"]:
+                manifest[os.path.basename(r["path"])] = r["sha256"]
+        _save_json(args.manifest, dict(sorted(manifest.items())))
+    elapsed = time.perf_counter() - start
+
+    before = sum(r["before"] for r in results)
+    after = sum(r["after"] for r in results)
+    improved = [r for r in results if r["after"] < r["before"]]
+    print(f"[recompress_images] files={len(results)} improved={len(improved)} "
+          f"skipped={sum(1 for r in results if r['skipped'])} bytes_before={before} bytes_after={after} "
+          f"saved={before - after} ({(before - after) / before if before else 0:.1%}) "
+          f"dry_run={args.dry_run} seconds={elapsed:.2f}")
+    for r in sorted(improved, key=lambda r: r["after"] - r["before"]):
+        print(f"- {os.path.basename(r['path'])}: {r['before']} -> {r['after']} "
+              f"(-{r['before'] - r['after']}) q={r['quality']} ssim={r['ssim']}")
+
+    if args.report:
+        for r in results:
+            r["path"] = os.path.relpath(r["path"], REPO_ROOT).replace(os.sep, "/")
+        _save_json(args.report, {"threshold": args.threshold, "totalBefore": before, "totalAfter": after,
+                                 "files": results})
+        print(f"[recompress_images] report={os.path.abspath(args.report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import argparse
+import glob
+import hashlib
 import json
 import os
 from typing import Any, Dict, List, Optional, Tuple
@@ -9,6 +11,7 @@ SOURCES_PATH = os.path.join(ROOT, "frontend", "public", "data", "sources.json")
 EVENTS_PATH = os.path.join(ROOT, "frontend", "public", "data", "events.json")
 PERSONS_PATH = os.path.join(ROOT, "frontend", "public", "data", "persons.json")
 DEFAULT_MAPPINGS_PATH = os.path.join(os.path.dirname(__file__), "mappings_template.json")
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(__file__), "apply_mappings_state.json")
 
 
 def _norm(v: Any) -> str:
@@ -30,23 +33,6 @@ def _save_json(path: str, data: Any) -> None:
         f.write("\n")
 
 
-def _find_source_id(sources: List[Dict[str, Any]], title: str, publisher: str) -> Optional[int]:
-    t = _lower(title)
-    p = _lower(publisher)
-    for s in sources:
-        if _lower(s.get("title")) == t and (not p or _lower(s.get("publisher")) == p):
-            sid = s.get("id")
-            if isinstance(sid, int):
-                return sid
-    # 放宽：仅按 title 匹配
-    for s in sources:
-        if _lower(s.get("title")) == t:
-            sid = s.get("id")
-            if isinstance(sid, int):
-                return sid
-    return None
-
-
 def _ensure_list(obj: Dict[str, Any], key: str) -> List[Any]:
     v = obj.get(key)
     if isinstance(v, list):
@@ -55,155 +41,639 @@ def _ensure_list(obj: Dict[str, Any], key: str) -> List[Any]:
     return obj[key]
 
 
-def _append_unique_int(arr: List[Any], value: int) -> None:
-    if value not in arr:
-        arr.append(value)
-
-
-def _append_unique_citation(arr: List[Dict[str, Any]], cit: Dict[str, Any]) -> None:
+def _citation_key(cit: Dict[str, Any]) -> Tuple[Any, str, str, str]:
     # 去重：sourceId + page + chapter + line
-    key = (
+    return (
         cit.get("sourceId"),
         _norm(cit.get("page")),
         _norm(cit.get("chapter")),
         _norm(cit.get("line")),
     )
-    for e in arr:
-        ek = (
-            e.get("sourceId"),
-            _norm(e.get("page")),
-            _norm(e.get("chapter")),
-            _norm(e.get("line")),
-        )
-        if ek == key:
-            return
-    arr.append(cit)
-
-
-def _find_entity(
-    items: List[Dict[str, Any]],
-    entity_type: str,
-    entity_name: str,
-    entity_id: Optional[int],
-) -> Tuple[Optional[Dict[str, Any]], str]:
-    name = _lower(entity_name)
-    if entity_type == "event":
-        if isinstance(entity_id, int):
-            for it in items:
-                if it.get("id") == entity_id:
-                    return it, ""
-            return None, f"未找到事件 id={entity_id}（name={entity_name}）"
-        for it in items:
-            if _lower(it.get("title")) == name:
-                return it, ""
-        return None, f"未找到事件 title={entity_name}"
-    if entity_type == "person":
-        if isinstance(entity_id, int):
-            for it in items:
-                if it.get("id") == entity_id:
-                    return it, ""
-            return None, f"未找到人物 id={entity_id}（name={entity_name}）"
-        for it in items:
-            if _lower(it.get("name")) == name:
-                return it, ""
-            # 支持别名匹配（nameVariants）
+
+
+class EntityDedup:
+    """
+    单个事件/人物的去重索引：与 sources / citations 列表同步维护的集合
+    新增只在列表末尾追加，写出的顺序与逐条比较去重时完全一致
+    """
+
+    def __init__(self, target: Dict[str, Any]) -> None:
+        self.source_ids = _ensure_list(target, "sources")
+        self.source_id_set = set()
+        for v in self.source_ids:
+            try:
+                self.source_id_set.add(v)
+            except TypeError:
+                # 不可哈希的脏数据不可能与整数 sourceId 相等，忽略即可
+                pass
+        self.target = target
+        self.citation_keys = None
+
+    def _ensure_citations(self) -> None:
+        # citations 列表只在真正写入引用时才创建（与 sources 分开，保持“空 citations 不落盘”）
+        if self.citation_keys is None:
+            self.citations = _ensure_list(self.target, "citations")
+            self.citation_keys = {_citation_key(e) for e in self.citations if isinstance(e, dict)}
+
+    def add_source_id(self, value: int) -> bool:
+        """返回是否新增"""
+        if value in self.source_id_set:
+            return False
+        self.source_id_set.add(value)
+        self.source_ids.append(value)
+        return True
+
+    def remove_source_id(self, value: int) -> bool:
+        if value not in self.source_id_set:
+            return False
+        self.source_id_set.discard(value)
+        self.source_ids.remove(value)
+        return True
+
+    def add_citation(self, cit: Dict[str, Any]) -> bool:
+        """返回是否新增"""
+        self._ensure_citations()
+        key = _citation_key(cit)
+        if key in self.citation_keys:
+            return False
+        self.citation_keys.add(key)
+        self.citations.append(cit)
+        return True
+
+    def _citation_pos(self, key: Tuple[Any, str, str, str]) -> Optional[int]:
+        self._ensure_citations()
+        if key not in self.citation_keys:
+            return None
+        for pos, e in enumerate(self.citations):
+            if isinstance(e, dict) and _citation_key(e) == key:
+                return pos
+        return None
+
+    def remove_citation(self, key: Tuple[Any, str, str, str]) -> bool:
+        pos = self._citation_pos(key)
+        if pos is None:
+            return False
+        del self.citations[pos]
+        self.citation_keys.discard(key)
+        return True
+
+    def replace_citation(self, key: Tuple[Any, str, str, str], cit: Dict[str, Any]) -> bool:
+        """原位置替换为新引用（保持列表顺序）；新引用的键已存在时只删除旧引用。返回新引用是否写在原位置"""
+        pos = self._citation_pos(key)
+        if pos is None:
+            return False
+        new_key = _citation_key(cit)
+        if new_key != key and new_key in self.citation_keys:
+            del self.citations[pos]
+            self.citation_keys.discard(key)
+            return False
+        self.citations[pos] = cit
+        self.citation_keys.discard(key)
+        self.citation_keys.add(new_key)
+        return True
+
+
+class MappingIndex:
+    """
+    sources / events / persons 的查找索引：一次构建，所有映射行复用（避免每行线性扫描全部数据）
+    匹配语义与逐条扫描一致：同一个键有多条记录时取列表中最靠前的一条
+    """
+
+    def __init__(
+        self,
+        sources: List[Dict[str, Any]],
+        events: List[Dict[str, Any]],
+        persons: List[Dict[str, Any]],
+    ) -> None:
+        # sources：(title, publisher) 与 title 两级索引，只收录整数 id
+        self.source_by_title_publisher: Dict[Tuple[str, str], int] = {}
+        self.source_by_title: Dict[str, int] = {}
+        for s in sources:
+            sid = s.get("id")
+            if not isinstance(sid, int):
+                continue
+            t = _lower(s.get("title"))
+            self.source_by_title_publisher.setdefault((t, _lower(s.get("publisher"))), sid)
+            self.source_by_title.setdefault(t, sid)
+
+        self.event_by_id: Dict[Any, Dict[str, Any]] = {}
+        self.event_by_title: Dict[str, Dict[str, Any]] = {}
+        for it in events:
+            self.event_by_id.setdefault(it.get("id"), it)
+            self.event_by_title.setdefault(_lower(it.get("title")), it)
+
+        # persons：名字与别名（nameVariants）分别记录列表位置，查找时取两者中靠前的一条
+        self.persons = persons
+        self.person_by_id: Dict[Any, Dict[str, Any]] = {}
+        self.person_name_pos: Dict[str, int] = {}
+        self.person_alias_pos: Dict[str, int] = {}
+        for pos, it in enumerate(persons):
+            self.person_by_id.setdefault(it.get("id"), it)
+            self.person_name_pos.setdefault(_lower(it.get("name")), pos)
             variants = it.get("nameVariants")
-            if isinstance(variants, list) and any(_lower(v) == name for v in variants):
-                return it, ""
-        return None, f"未找到人物 name={entity_name}"
-    return None, f"未知 entityType={entity_type}"
+            if isinstance(variants, list):
+                for v in variants:
+                    self.person_alias_pos.setdefault(_lower(v), pos)
+
+        # 每个被写入的实体一份去重索引，首次写入时按现有列表构建
+        self._dedup: Dict[int, EntityDedup] = {}
+
+    def entity_by_id(self, entity_type: str, entity_id: Any) -> Optional[Dict[str, Any]]:
+        if entity_type == "event":
+            return self.event_by_id.get(entity_id)
+        if entity_type == "person":
+            return self.person_by_id.get(entity_id)
+        return None
+
+    def dedup(self, target: Dict[str, Any]) -> EntityDedup:
+        d = self._dedup.get(id(target))
+        if d is None or d.target is not target:
+            d = self._dedup[id(target)] = EntityDedup(target)
+        return d
+
+    def find_source_id(self, title: str, publisher: str) -> Optional[int]:
+        t = _lower(title)
+        p = _lower(publisher)
+        if p:
+            sid = self.source_by_title_publisher.get((t, p))
+            if sid is not None:
+                return sid
+        # 放宽：仅按 title 匹配
+        return self.source_by_title.get(t)
+
+    def find_entity(
+        self,
+        entity_type: str,
+        entity_name: str,
+        entity_id: Optional[int],
+    ) -> Tuple[Optional[Dict[str, Any]], str]:
+        name = _lower(entity_name)
+        if entity_type == "event":
+            if isinstance(entity_id, int):
+                it = self.event_by_id.get(entity_id)
+                return (it, "") if it else (None, f"未找到事件 id={entity_id}（name={entity_name}）")
+            it = self.event_by_title.get(name)
+            return (it, "") if it else (None, f"未找到事件 title={entity_name}")
+        if entity_type == "person":
+            if isinstance(entity_id, int):
+                it = self.person_by_id.get(entity_id)
+                return (it, "") if it else (None, f"未找到人物 id={entity_id}（name={entity_name}）")
+            # 支持别名匹配（nameVariants）
+            positions = [
+                pos for pos in (self.person_name_pos.get(name), self.person_alias_pos.get(name))
+                if pos is not None
+            ]
+            if positions:
+                return self.persons[min(positions)], ""
+            return None, f"未找到人物 name={entity_name}"
+        return None, f"未知 entityType={entity_type}"
+
+
+def resolve_row(
+    m: Dict[str, Any],
+    index: MappingIndex,
+    write_empty_citations: bool = False,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], str]:
+    """
+    解析一行映射（不修改数据），返回 (目标实体, 效果, 警告)
+    效果：{"entityType", "entityId", "sourceId", "citation"}；citation 为 None 表示只维护 sources
+    """
+    entity_type = _norm(m.get("entityType"))
+    entity_name = _norm(m.get("entityName"))
+    entity_id = m.get("entityId")
+    entity_id = int(entity_id) if isinstance(entity_id, int) else None
+    source_title = _norm(m.get("sourceTitle"))
+    publisher = _norm(m.get("publisher"))
+
+    if not entity_type or not entity_name or not source_title:
+        return None, None, f"跳过无效映射：{m}"
+
+    source_id = index.find_source_id(source_title, publisher)
+    if source_id is None:
+        return None, None, f"未找到教材 source：title={source_title} publisher={publisher}"
+
+    target, err = index.find_entity(entity_type, entity_name, entity_id)
+    if not target:
+        return None, None, err
+
+    page = _norm(m.get("page"))
+    line = _norm(m.get("line"))
+    chapter = _norm(m.get("chapter"))
+    note = _norm(m.get("note"))
+
+    cit = None
+    # 默认：如果 citation 元信息全为空，就不写 citations（避免骨架文件把数据污染成一堆空引用）
+    if page or line or chapter or note or write_empty_citations:
+        cit = {
+            "sourceId": source_id,
+            "page": page or None,
+            "line": line or None,
+            "chapter": chapter or None,
+            "note": note or None,
+            "verified": bool(m.get("verified", False)),
+        }
+        # remove None fields to keep JSON tidy
+        cit = {k: v for k, v in cit.items() if v is not None}
+    effect = {"entityType": entity_type, "entityId": target.get("id"), "sourceId": source_id, "citation": cit}
+    return target, effect, ""
+
+
+def apply_effect(target: Dict[str, Any], effect: Dict[str, Any], index: MappingIndex) -> Tuple[bool, bool]:
+    """写入一行映射的效果，返回 (sourceId 是否新增, citation 是否新增)"""
+    # backward compatible：同时维护 sources 数组（sourceId 列表）
+    dedup = index.dedup(target)
+    source_created = dedup.add_source_id(effect["sourceId"])
+    citation_created = dedup.add_citation(effect["citation"]) if effect["citation"] else False
+    return source_created, citation_created
+
+
+def apply_mappings(
+    mappings: List[Dict[str, Any]],
+    index: MappingIndex,
+    write_empty_citations: bool = False,
+) -> Dict[str, Any]:
+    """把映射行写入 index 中的 events/persons（原地修改），返回统计与警告"""
+    warnings: List[str] = []
+    applied = 0
+    citations_added = 0
+    citations_skipped_empty = 0
+
+    for m in mappings:
+        target, effect, err = resolve_row(m, index, write_empty_citations)
+        if not target:
+            warnings.append(err)
+            continue
+        apply_effect(target, effect, index)
+        if effect["citation"]:
+            citations_added += 1
+        else:
+            citations_skipped_empty += 1
+        applied += 1
+
+    return {
+        "applied": applied,
+        "citations_added": citations_added,
+        "citations_skipped_empty": citations_skipped_empty,
+        "warnings": warnings,
+    }
+
+
+# ---------------------------------------------------------------------------
+# 增量应用：按映射文件记录上次应用的内容哈希与每行产生的效果
+#
+# 状态文件（默认 scripts/textbooks/apply_mappings_state.json）：
+#   {"version", "writeEmptyCitations", "dataSha256": {"sources", "events", "persons"},
+#    "files": {"<相对路径>": {"sha256", "touched": {"event": [id], "person": [id]},
+#                             "rows": {"<行哈希>": {entityType, entityId, sourceId, citation, sourceCreated, citationCreated}}}}}
+# - 文件哈希未变：整个文件跳过；有行解析失败（找不到教材/事件/人物）的文件不记录哈希，下次仍会重新处理
+# - 文件有变化：只应用新增/修改的行；删除或修改掉的行撤回它当初新增的 citation / sourceId
+#   （仍被其他行引用的不撤回；同一实体同一教材的修改在原位置替换，不重复追加）
+# - 状态中有、但磁盘上已不存在的映射文件：视为整个文件被删除，撤回它的全部记录；
+#   文件仍在、只是本次没有传入 --mappings 的保持不动（--prune-unlisted 时才一并撤回）
+# - 脚本新增的引用被手工改过（内容与状态记录不一致）时不撤回、不覆盖，改为保留并提示，之后不再由脚本管理
+# - sources/events/persons 在工具之外被改动（哈希与状态不符）或 --full 时，所有行重新应用（幂等）
+# ---------------------------------------------------------------------------
+
+STATE_VERSION = 1
+ROW_FIELDS = ["entityType", "entityName", "sourceTitle", "publisher", "page", "line", "chapter", "note"]
+
+
+def _sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return _sha256_bytes(f.read())
+
+
+def _data_sha256() -> Dict[str, str]:
+    # sources 也要记录：教材被删后再补回时，之前找不到教材的行需要重新应用
+    return {
+        "sources": _file_sha256(SOURCES_PATH),
+        "events": _file_sha256(EVENTS_PATH),
+        "persons": _file_sha256(PERSONS_PATH),
+    }
+
+
+def row_key(m: Dict[str, Any]) -> str:
+    """映射行的内容哈希（只含影响应用结果的字段）"""
+    fields: Dict[str, Any] = {k: _norm(m.get(k)) for k in ROW_FIELDS}
+    entity_id = m.get("entityId")
+    fields["entityId"] = entity_id if isinstance(entity_id, int) else None
+    fields["verified"] = bool(m.get("verified", False))
+    return hashlib.sha1(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _claims(record: Dict[str, Any]) -> List[Tuple[Any, ...]]:
+    """一条记录占用的 (实体, sourceId) 与 (实体, citation 键)"""
+    entity = (record["entityType"], record["entityId"])
+    out = [(*entity, "source", record["sourceId"])]
+    if record.get("citation"):
+        out.append((*entity, "citation", _citation_key(record["citation"])))
+    return out
+
+
+def _touched(rows: Dict[str, Dict[str, Any]]) -> Dict[str, List[Any]]:
+    touched: Dict[str, set] = {}
+    for r in rows.values():
+        touched.setdefault(r["entityType"], set()).add(r["entityId"])
+    return {k: sorted(v, key=str) for k, v in sorted(touched.items())}
+
+
+def apply_incremental(
+    mapping_files: List[Tuple[str, str]],
+    index: MappingIndex,
+    state: Dict[str, Any],
+    write_empty_citations: bool = False,
+    full: bool = False,
+    prune_unlisted: bool = False,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], bool]:
+    """
+    mapping_files 为 [(状态键, 文件路径)]，状态键是相对仓库根目录的路径；
+    返回 (各文件统计, 新状态的 files 部分, 数据是否有改动)
+    """
+    state_files: Dict[str, Any] = dict(state.get("files") or {})
+    results: List[Dict[str, Any]] = []
+    # 本次需要处理的文件：(结果, 保留的旧记录, 待应用的新行, 被删除的旧记录)
+    work = []
+    # --full：先撤回本工具新增的全部条目再按顺序重新应用，结果与从头应用一次相同（不保留历史造成的顺序差异）
+    requeued = set()
+
+    for key, path in mapping_files:
+        with open(path, "rb") as f:
+            raw = f.read()
+        sha = _sha256_bytes(raw)
+        prev = state_files.get(key) or {}
+        result = {"mappings": path, "status": "changed", "rows": 0, "applied": 0, "unchanged": 0,
+                  "updated": 0, "retracted": 0, "citations_skipped_empty": 0, "warnings": [], "edited": []}
+        results.append(result)
+        if not full and prev.get("sha256") == sha:
+            result["status"] = "unchanged"
+            result["rows"] = result["unchanged"] = len(prev.get("rows") or {})
+            continue
+
+        mappings: List[Dict[str, Any]] = json.loads(raw.decode("utf-8"))
+        result["rows"] = len(mappings)
+        old_rows: Dict[str, Dict[str, Any]] = prev.get("rows") or {}
+        kept: Dict[str, Dict[str, Any]] = {}
+        pending: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+        seen = set()
+        for m in mappings:
+            k = row_key(m)
+            if k in seen:
+                continue
+            seen.add(k)
+            if k in old_rows and not full:
+                kept[k] = old_rows[k]
+                continue
+            target, effect, err = resolve_row(m, index, write_empty_citations)
+            if not target:
+                result["warnings"].append(err)
+                continue
+            pending.append((k, target, effect))
+        removed = [r for k, r in old_rows.items() if k not in seen]
+        if full:
+            # 仍在文件中的行也先撤回，稍后重新应用（不计入 retracted）
+            again = [r for k, r in old_rows.items() if k in seen]
+            requeued.update(id(r) for r in again)
+            removed.extend(again)
+        result["unchanged"] = len(kept)
+        work.append((key, sha, result, kept, pending, removed))
+
+    # 不在本次列表中、且已从磁盘删除的文件（或 --prune-unlisted）：整个撤回并从状态中移除
+    listed = {key for key, _ in mapping_files}
+    for key, entry in list(state_files.items()):
+        if key in listed:
+            continue
+        path = os.path.join(ROOT, key)
+        if os.path.exists(path) and not prune_unlisted:
+            continue
+        result = {"mappings": path, "status": "removed", "rows": 0, "applied": 0, "unchanged": 0,
+                  "updated": 0, "retracted": 0, "citations_skipped_empty": 0, "warnings": [], "edited": []}
+        results.append(result)
+        work.append((key, None, result, {}, [], list((entry.get("rows") or {}).values())))
+
+    # 仍然有效的全部占用：未变化文件的记录 + 保留的行 + 待应用的新行（--full 时新行在撤回之后才写入，不算占用）
+    claimed = set()
+    changed_keys = {w[0] for w in work}
+    for key, entry in state_files.items():
+        if key not in changed_keys:
+            for r in (entry.get("rows") or {}).values():
+                claimed.update(_claims(r))
+    for _, _, _, kept, pending, _ in work:
+        for r in kept.values():
+            claimed.update(_claims(r))
+        if not full:
+            for _, _, effect in pending:
+                claimed.update(_claims(effect))
+
+    # 被撤回但仍被占用的条目：由工具新增的“所有权”转交给占用它的记录，之后那条记录被删时才能撤回
+    inherit = set()
+    changed = False
+    for key, sha, result, kept, pending, removed in work:
+        replaced = set()
+        for rec in removed:
+            target = index.entity_by_id(rec["entityType"], rec["entityId"])
+            if target is None:
+                continue
+            dedup = index.dedup(target)
+            cit = rec.get("citation")
+            edited = False
+            if cit and rec.get("citationCreated"):
+                ck = (rec["entityType"], rec["entityId"], "citation", _citation_key(cit))
+                pos = dedup._citation_pos(_citation_key(cit))
+                if pos is not None and dedup.citations[pos] != cit:
+                    # 手工改过：引用及其 sourceId 都保留原样并放弃所有权（之后的行只会追加/跳过，不会覆盖或撤回它）
+                    edited = True
+                    result["edited"].append(
+                        f"{rec['entityType']} id={rec['entityId']} sourceId={rec['sourceId']} "
+                        f"page={cit.get('page', '')} chapter={cit.get('chapter', '')}"
+                    )
+                elif ck in claimed:
+                    inherit.add(ck)
+                else:
+                    # 同一文件中同一实体、同一教材的新行：原位置更新
+                    for i, (_, t, effect) in enumerate([] if full else pending):
+                        if (i not in replaced and t is target and effect["citation"]
+                                and effect["sourceId"] == rec["sourceId"]
+                                and (rec["entityType"], rec["entityId"], "citation", _citation_key(effect["citation"])) not in inherit):
+                            if dedup.replace_citation(_citation_key(cit), effect["citation"]):
+                                replaced.add(i)
+                                inherit.add((rec["entityType"], rec["entityId"], "citation", _citation_key(effect["citation"])))
+                                result["updated"] += 1
+                                changed = True
+                            break
+                    else:
+                        if dedup.remove_citation(_citation_key(cit)):
+                            if id(rec) not in requeued:
+                                result["retracted"] += 1
+                            changed = True
+            if rec.get("sourceCreated") and not edited:
+                sk = (rec["entityType"], rec["entityId"], "source", rec["sourceId"])
+                if sk in claimed:
+                    inherit.add(sk)
+                elif dedup.remove_source_id(rec["sourceId"]):
+                    changed = True
+
+    for key, sha, result, kept, pending, removed in work:
+        if result["status"] == "removed":
+            del state_files[key]
+            continue
+        rows = dict(kept)
+        for k, target, effect in pending:
+            claims = _claims(effect)
+            source_created, citation_created = apply_effect(target, effect, index)
+            # 已存在且归本工具所有的引用（例如只改了备注）：原位置更新内容
+            if effect["citation"] and not citation_created and claims[-1] in inherit:
+                dedup = index.dedup(target)
+                pos = dedup._citation_pos(_citation_key(effect["citation"]))
+                if pos is not None and dedup.citations[pos] != effect["citation"]:
+                    dedup.replace_citation(_citation_key(effect["citation"]), effect["citation"])
+                    result["updated"] += 1
+                    changed = True
+            source_created = source_created or claims[0] in inherit
+            citation_created = citation_created or (len(claims) > 1 and claims[1] in inherit)
+            inherit.difference_update(claims)
+            changed = changed or source_created or citation_created
+            rows[k] = dict(effect, sourceCreated=source_created, citationCreated=citation_created)
+            result["applied"] += 1
+            if not effect["citation"]:
+                result["citations_skipped_empty"] += 1
+        # 有未解析的行时不记录哈希：补上缺失的教材/事件/人物后，即使映射文件没改也会重试这些行
+        state_files[key] = {"sha256": None if result["warnings"] else sha, "touched": _touched(rows), "rows": rows}
+
+    # 剩余的所有权转交给保留下来的旧记录
+    if inherit:
+        for entry in state_files.values():
+            for r in (entry.get("rows") or {}).values():
+                claims = _claims(r)
+                if claims[0] in inherit:
+                    r["sourceCreated"] = True
+                if len(claims) > 1 and claims[1] in inherit:
+                    r["citationCreated"] = True
+
+    return results, state_files, changed
+
+
+def expand_mapping_paths(patterns: List[str]) -> List[str]:
+    """展开 --mappings 参数：支持多个文件与通配符（Windows 命令行不会替我们展开 *），去重并保持顺序"""
+    paths: List[str] = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise SystemExit(f"通配符没有匹配到映射文件：{pattern}")
+        else:
+            matches = [pattern]
+        for m in matches:
+            path = os.path.abspath(m)
+            if path not in paths:
+                paths.append(path)
+    return paths
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="将教材条目映射写入 events/persons 的 citations，并保持 sources 兼容。")
-    parser.add_argument("--mappings", default=DEFAULT_MAPPINGS_PATH, help="映射文件路径（默认：mappings_template.json）")
+    parser.add_argument(
+        "--mappings",
+        nargs="+",
+        default=[DEFAULT_MAPPINGS_PATH],
+        help="映射文件路径，可传多个或通配符（例如 scripts/textbooks/mappings_*.json；默认：mappings_template.json）",
+    )
     parser.add_argument("--dry-run", action="store_true", help="仅打印将要应用的条目数，不写入 JSON")
     parser.add_argument(
         "--write-empty-citations",
         action="store_true",
         help="即使 chapter/page/line/note 全为空，也写入 citations（默认：跳过空 citations，只维护 sources）",
     )
+    parser.add_argument("--report", help="把各映射文件的统计与警告写入 JSON 报告")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="增量应用状态文件（默认：scripts/textbooks/apply_mappings_state.json）")
+    parser.add_argument("--full", action="store_true", help="忽略文件哈希，重新应用所有行（例如补上之前找不到的人物/事件）")
+    parser.add_argument(
+        "--prune-unlisted",
+        action="store_true",
+        help="同时撤回状态中有、但本次未传入 --mappings 的映射文件（默认只撤回磁盘上已删除的文件）",
+    )
     args = parser.parse_args()
 
-    mappings_path = os.path.abspath(args.mappings)
-    for p in [SOURCES_PATH, EVENTS_PATH, PERSONS_PATH, mappings_path]:
+    mappings_paths = expand_mapping_paths(args.mappings)
+    for p in [SOURCES_PATH, EVENTS_PATH, PERSONS_PATH, *mappings_paths]:
         if not os.path.exists(p):
             raise SystemExit(f"文件不存在：{p}")
 
+    state_path = os.path.abspath(args.state)
+    state: Dict[str, Any] = _load_json(state_path) if os.path.exists(state_path) else {}
+    if state and state.get("version") != STATE_VERSION:
+        raise SystemExit(f"状态文件版本不兼容：{state_path}（删除后用 --full 重建）")
+
+    data_sha = _data_sha256()
+    full = args.full
+    if state and not full:
+        if state.get("dataSha256") != data_sha:
+            print("[apply_mappings] sources/events/persons 在上次应用后被改动，本次重新应用所有行")
+            full = True
+        elif bool(state.get("writeEmptyCitations")) != bool(args.write_empty_citations):
+            print("[apply_mappings] --write-empty-citations 与上次不同，本次重新应用所有行")
+            full = True
+
+    # 数据只加载一次，所有映射文件共用同一份索引；按文件顺序依次应用，最后统一写回
     sources: List[Dict[str, Any]] = _load_json(SOURCES_PATH)
     events: List[Dict[str, Any]] = _load_json(EVENTS_PATH)
     persons: List[Dict[str, Any]] = _load_json(PERSONS_PATH)
-    mappings: List[Dict[str, Any]] = _load_json(mappings_path)
-
-    warnings: List[str] = []
-    applied = 0
-    citations_added = 0
-    citations_skipped_empty = 0
+    index = MappingIndex(sources, events, persons)
 
-    for m in mappings:
-        entity_type = _norm(m.get("entityType"))
-        entity_name = _norm(m.get("entityName"))
-        entity_id = m.get("entityId")
-        entity_id = int(entity_id) if isinstance(entity_id, int) else None
-        source_title = _norm(m.get("sourceTitle"))
-        publisher = _norm(m.get("publisher"))
-
-        if not entity_type or not entity_name or not source_title:
-            warnings.append(f"跳过无效映射：{m}")
-            continue
-
-        source_id = _find_source_id(sources, source_title, publisher)
-        if source_id is None:
-            warnings.append(f"未找到教材 source：title={source_title} publisher={publisher}")
-            continue
-
-        target_list = events if entity_type == "event" else persons if entity_type == "person" else []
-        target, err = _find_entity(target_list, entity_type, entity_name, entity_id)
-        if not target:
-            warnings.append(err)
-            continue
-
-        # backward compatible：同时维护 sources 数组（sourceId 列表）
-        src_ids = _ensure_list(target, "sources")
-        _append_unique_int(src_ids, source_id)
-
-        page = _norm(m.get("page"))
-        line = _norm(m.get("line"))
-        chapter = _norm(m.get("chapter"))
-        note = _norm(m.get("note"))
-
-        # 默认：如果 citation 元信息全为空，就不写 citations（避免骨架文件把数据污染成一堆空引用）
-        if (not page and not line and not chapter and not note) and not args.write_empty_citations:
-            citations_skipped_empty += 1
-        else:
-            citations = _ensure_list(target, "citations")
-            cit = {
-                "sourceId": source_id,
-                "page": page or None,
-                "line": line or None,
-                "chapter": chapter or None,
-                "note": note or None,
-                "verified": bool(m.get("verified", False)),
-            }
-            # remove None fields to keep JSON tidy
-            cit = {k: v for k, v in cit.items() if v is not None}
-            _append_unique_citation(citations, cit)
-            citations_added += 1
-        applied += 1
+    mapping_files = [(os.path.relpath(p, ROOT).replace(os.sep, "/"), p) for p in mappings_paths]
+    results, state_files, changed = apply_incremental(
+        mapping_files, index, state, write_empty_citations=args.write_empty_citations, full=full,
+        prune_unlisted=args.prune_unlisted,
+    )
 
-    if applied and not args.dry_run:
-        _save_json(EVENTS_PATH, events)
-        _save_json(PERSONS_PATH, persons)
+    applied = sum(r["applied"] for r in results)
+    warnings = sum(len(r["warnings"]) for r in results)
+    if not args.dry_run:
+        if changed:
+            _save_json(EVENTS_PATH, events)
+            _save_json(PERSONS_PATH, persons)
+            data_sha = _data_sha256()
+        _save_json(state_path, {
+            "version": STATE_VERSION,
+            "writeEmptyCitations": bool(args.write_empty_citations),
+            "dataSha256": data_sha,
+            "files": dict(sorted(state_files.items())),
+        })
 
     print(
-        f"[apply_mappings] applied={applied} citations_added={citations_added} "
-        f"citations_skipped_empty={citations_skipped_empty} warnings={len(warnings)} "
-        f"dry_run={bool(args.dry_run)} mappings={mappings_path}"
+        f"[apply_mappings] files={len(results)} skipped={sum(r['status'] == 'unchanged' for r in results)} "
+        f"applied={applied} updated={sum(r['updated'] for r in results)} "
+        f"retracted={sum(r['retracted'] for r in results)} "
+        f"citations_skipped_empty={sum(r['citations_skipped_empty'] for r in results)} warnings={warnings} "
+        f"full={full} dry_run={bool(args.dry_run)}"
     )
+    for r in results:
+        print(
+            f"- {os.path.basename(r['mappings'])}: {r['status']} rows={r['rows']} applied={r['applied']} "
+            f"unchanged={r['unchanged']} updated={r['updated']} retracted={r['retracted']} "
+            f"warnings={len(r['warnings'])}"
+        )
+    edited = [(r, e) for r in results for e in r["edited"]]
+    if edited:
+        print(f"手工修改过的引用（已保留，不再由脚本更新/撤回）: {len(edited)}")
+        for r, e in edited[:200]:
+            print("-", f"[{os.path.basename(r['mappings'])}] {e}")
     if warnings:
         print("Warnings:")
-        for w in warnings[:200]:
-            print("-", w)
+        shown = 0
+        for r in results:
+            for w in r["warnings"]:
+                if shown >= 200:
+                    break
+                print("-", f"[{os.path.basename(r['mappings'])}] {w}")
+                shown += 1
+
+    if args.report:
+        _save_json(os.path.abspath(args.report), {"dryRun": bool(args.dry_run), "files": results})
+        print(f"[apply_mappings] report={os.path.abspath(args.report)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+"""
+apply_mappings 性能基准：合成 N 条人物/事件/教材与 N 条映射，比较索引查找与旧版逐行线性扫描
+
+旧版每行映射都要扫描全部 sources（两遍）和全部 persons（含 nameVariants），整体 O(M × (S + P·V))，
+十万级数据无法跑完，因此旧版只在前 --legacy-sample 行上计时并线性外推，同时校验两者命中结果一致。
+另外单独测试“热点实体”：--hot-citations 条不同引用写入同一个人物时，旧版列表逐条比较去重与集合去重的耗时。
+
+运行方式（在仓库根目录）：
+  python scripts/textbooks/bench_apply_mappings.py
+  python scripts/textbooks/bench_apply_mappings.py --entities 100000 --mappings 100000 --legacy-sample 200
+"""
+
+import argparse
+import copy
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from apply_mappings import MappingIndex, _lower, _norm, apply_mappings
+
+
+
+def legacy_find_source_id(sources: List[Dict[str, Any]], title: str, publisher: str) -> Optional[int]:
+    """旧版实现（逐条扫描），仅用于对照"""
+    t = _lower(title)
+    p = _lower(publisher)
+    for s in sources:
+        if _lower(s.get("title")) == t and (not p or _lower(s.get("publisher")) == p):
+            sid = s.get("id")
+            if isinstance(sid, int):
+                return sid
+    for s in sources:
+        if _lower(s.get("title")) == t:
+            sid = s.get("id")
+            if isinstance(sid, int):
+                return sid
+    return None
+
+
+def legacy_find_entity(
+    items: List[Dict[str, Any]],
+    entity_type: str,
+    entity_name: str,
+    entity_id: Optional[int],
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """旧版实现（逐条扫描），仅用于对照"""
+    name = _lower(entity_name)
+    if entity_type == "event":
+        if isinstance(entity_id, int):
+            for it in items:
+                if it.get("id") == entity_id:
+                    return it, ""
+            return None, "not found"
+        for it in items:
+            if _lower(it.get("title")) == name:
+                return it, ""
+        return None, "not found"
+    if entity_type == "person":
+        if isinstance(entity_id, int):
+            for it in items:
+                if it.get("id") == entity_id:
+                    return it, ""
+            return None, "not found"
+        for it in items:
+            if _lower(it.get("name")) == name:
+                return it, ""
+            variants = it.get("nameVariants")
+            if isinstance(variants, list) and any(_lower(v) == name for v in variants):
+                return it, ""
+        return None, "not found"
+    return None, "unknown"
+
+
+def legacy_append_unique_citation(arr: List[Dict[str, Any]], cit: Dict[str, Any]) -> None:
+    """旧版实现（每次插入都重算全部已有引用的键），仅用于对照"""
+    key = (cit.get("sourceId"), _norm(cit.get("page")), _norm(cit.get("chapter")), _norm(cit.get("line")))
+    for e in arr:
+        if (e.get("sourceId"), _norm(e.get("page")), _norm(e.get("chapter")), _norm(e.get("line"))) == key:
+            return
+    arr.append(cit)
+
+
+def bench_hot_entity(n: int) -> Tuple[float, float, bool]:
+    """同一人物写入 n 条引用（约 1/4 为重复），返回 (旧版秒数, 新版秒数, 结果是否一致)"""
+    cits = [{"sourceId": 1 + k % 5, "page": str(k % (n * 3 // 4 or 1)), "chapter": "第1课"} for k in range(n)]
+
+    legacy_target: Dict[str, Any] = {"id": 1, "name": "热点人物"}
+    t0 = time.perf_counter()
+    arr = legacy_target.setdefault("citations", [])
+    for c in cits:
+        legacy_append_unique_citation(arr, dict(c))
+    t_legacy = time.perf_counter() - t0
+
+    target: Dict[str, Any] = {"id": 1, "name": "热点人物"}
+    index = MappingIndex([], [], [target])
+    t0 = time.perf_counter()
+    for c in cits:
+        index.dedup(target).add_citation(dict(c))
+    t_new = time.perf_counter() - t0
+    return t_legacy, t_new, legacy_target["citations"] == target["citations"]
+
+
+def make_dataset(n_entities: int, n_mappings: int, n_sources: int, seed: int):
+    rng = random.Random(seed)
+    sources = [
+        {"id": i, "title": f"历史 教材{i}", "publisher": "人民教育出版社" if i % 2 else "其他出版社"}
+        for i in range(1, n_sources + 1)
+    ]
+    persons = [
+        {"id": i, "name": f"人物{i}", "nameVariants": [f"字{i}", f"号{i}", f"别名{i % (n_entities // 3 or 1)}"]}
+        for i in range(1, n_entities + 1)
+    ]
+    events = [{"id": i, "title": f"事件{i}"} for i in range(1, n_entities + 1)]
+
+    mappings = []
+    for k in range(n_mappings):
+        src = rng.choice(sources)
+        i = rng.randint(1, n_entities + n_entities // 50)  # 约 2% 找不到
+        kind = rng.random()
+        if kind < 0.4:
+            row = {"entityType": "person", "entityName": rng.choice([f"人物{i}", f"字{i}", f"别名{i}"])}
+        elif kind < 0.5:
+            row = {"entityType": "person", "entityName": f"人物{i}", "entityId": i}
+        elif kind < 0.9:
+            row = {"entityType": "event", "entityName": f"事件{i}"}
+        else:
+            row = {"entityType": "event", "entityName": f"事件{i}", "entityId": i}
+        row.update({
+            "sourceTitle": src["title"],
+            "publisher": src["publisher"] if k % 3 else "",
+            "chapter": f"第{k % 30 + 1}课",
+            "page": str(k % 200 + 1),
+        })
+        mappings.append(row)
+    return sources, events, persons, mappings
+
+
+def lookups(find_source, find_entity, mappings):
+    """只做查找（不写入），返回每行的 (sourceId, 实体 id)"""
+    out = []
+    for m in mappings:
+        sid = find_source(m["sourceTitle"], m["publisher"])
+        it, _ = find_entity(m["entityType"], m["entityName"], m.get("entityId"))
+        out.append((sid, it.get("id") if it else None))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="apply_mappings 基准：索引查找 vs 旧版线性扫描。")
+    parser.add_argument("--entities", type=int, default=100000, help="合成人物/事件数量（各 N 条，默认 100000）")
+    parser.add_argument("--mappings", type=int, default=100000, help="合成映射行数（默认 100000）")
+    parser.add_argument("--sources", type=int, default=200, help="合成教材 source 数量（默认 200）")
+    parser.add_argument("--legacy-sample", type=int, default=100, help="旧版实现计时的行数（按比例外推，默认 100）")
+    parser.add_argument("--hot-citations", type=int, default=5000, help="热点实体测试写入的引用条数（默认 5000，0 表示跳过）")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--report", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    sources, events, persons, mappings = make_dataset(args.entities, args.mappings, args.sources, args.seed)
+
+    t0 = time.perf_counter()
+    index = MappingIndex(sources, events, persons)
+    t_build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    indexed = lookups(index.find_source_id, index.find_entity, mappings)
+    t_lookup = time.perf_counter() - t0
+
+    work_events, work_persons = copy.deepcopy(events), copy.deepcopy(persons)
+    t0 = time.perf_counter()
+    result = apply_mappings(mappings, MappingIndex(sources, work_events, work_persons))
+    t_apply = time.perf_counter() - t0
+
+    sample = mappings[:max(1, min(args.legacy_sample, len(mappings)))]
+    t0 = time.perf_counter()
+    legacy = lookups(
+        lambda t, p: legacy_find_source_id(sources, t, p),
+        lambda et, name, eid: legacy_find_entity(events if et == "event" else persons, et, name, eid),
+        sample,
+    )
+    t_legacy = time.perf_counter() - t0
+    legacy_est = t_legacy * len(mappings) / len(sample)
+    mismatches = sum(1 for a, b in zip(indexed, legacy) if a != b)
+
+    hot_legacy, hot_new, hot_same = bench_hot_entity(args.hot_citations) if args.hot_citations > 0 else (0.0, 0.0, True)
+    if not hot_same:
+        mismatches += 1
+
+    report = {
+        "entities": args.entities,
+        "mappings": len(mappings),
+        "sources": len(sources),
+        "indexBuildSeconds": round(t_build, 4),
+        "indexedLookupSeconds": round(t_lookup, 4),
+        "indexedApplySeconds": round(t_apply, 4),
+        "applied": result["applied"],
+        "warnings": len(result["warnings"]),
+        "legacySample": len(sample),
+        "legacySampleSeconds": round(t_legacy, 4),
+        "legacyEstimatedSeconds": round(legacy_est, 2),
+        "speedup": round(legacy_est / (t_build + t_lookup), 1) if t_build + t_lookup > 0 else None,
+        "sampleMismatches": mismatches,
+        "hotCitations": args.hot_citations,
+        "hotLegacySeconds": round(hot_legacy, 4),
+        "hotIndexedSeconds": round(hot_new, 4),
+    }
+
+    print(
+        f"[bench_apply_mappings] entities={args.entities} mappings={len(mappings)} "
+        f"build={report['indexBuildSeconds']}s lookup={report['indexedLookupSeconds']}s "
+        f"apply={report['indexedApplySeconds']}s legacy_est={report['legacyEstimatedSeconds']}s "
+        f"speedup={report['speedup']}x mismatches={mismatches}/{len(sample)}"
+    )
+    if args.hot_citations > 0:
+        print(f"- hot entity: citations={args.hot_citations} legacy={report['hotLegacySeconds']}s "
+              f"indexed={report['hotIndexedSeconds']}s identical={hot_same}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if mismatches:
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()
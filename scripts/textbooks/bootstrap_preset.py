@@ -1,70 +1,112 @@
 import argparse
+import json
 import os
-import subprocess
-import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from export_mappings_csv import export_csv
+from generate_mappings_skeleton import PRESETS, SkeletonIndex, build_skeleton, load_index, resolve_preset, write_skeleton
 
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 TB_DIR = os.path.join(ROOT, "scripts", "textbooks")
 
-GEN = os.path.join(TB_DIR, "generate_mappings_skeleton.py")
-EXPORT = os.path.join(TB_DIR, "export_mappings_csv.py")
+
+def _load_json(path: str) -> Any:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def bootstrap(
+    preset: str,
+    out_dir: str,
+    index: Optional[SkeletonIndex] = None,
+    publisher: str = "人民教育出版社",
+    include_persons: bool = True,
+    include_active_persons: bool = False,
+    csv_only: bool = False,
+    force: bool = False,
+) -> Dict[str, Any]:
+    """
+    生成一个预设的 mappings 骨架 + CSV（进程内调用，不再起子进程）
+    index 为共用的事件/人物/朝代索引；csv_only 时不需要
+    已有的 mappings JSON / CSV 可能已经手工填写过：除非 force，否则都不覆盖（只补导出缺失的 CSV）
+    """
+    mappings_json = os.path.join(out_dir, f"mappings_{preset}.json")
+    mappings_csv = os.path.join(out_dir, f"mappings_{preset}.csv")
+    kept = not csv_only and not force and os.path.exists(mappings_json)
+
+    if not csv_only and not kept:
+        # 1) generate skeleton
+        source_title, year_min, year_max = resolve_preset(preset)
+        rows, n_events, n_persons = build_skeleton(
+            index or load_index(), source_title, publisher, year_min, year_max,
+            include_persons=include_persons, include_active_persons=include_active_persons,
+        )
+        write_skeleton(mappings_json, rows)
+    else:
+        if not os.path.exists(mappings_json):
+            raise SystemExit(f"--csv-only 需要已有 mappings 文件：{mappings_json}")
+        rows = _load_json(mappings_json)
+        n_events = sum(1 for r in rows if r.get("entityType") == "event")
+        n_persons = sum(1 for r in rows if r.get("entityType") == "person")
+
+    # 2) export csv (excel bom)
+    if not (kept and os.path.exists(mappings_csv)):
+        export_csv(rows, mappings_csv, excel_bom=True)
+
+    return {"preset": preset, "mappings": mappings_json, "csv": mappings_csv, "events": n_events, "persons": n_persons,
+            "kept": kept}
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="一键：生成 mappings 骨架 + 导出 CSV（Excel 友好）。")
-    parser.add_argument("--preset", required=True, help="教材预设（例如：grade7_up）")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--preset", choices=sorted(PRESETS.keys()), help="教材预设（例如：grade7_up）")
+    target.add_argument("--all-presets", action="store_true", help="一次生成全部预设（数据只加载一次）")
     parser.add_argument("--out-dir", default=TB_DIR, help="输出目录（默认：scripts/textbooks）")
     parser.add_argument("--csv-only", action="store_true", help="仅导出 CSV（不生成/覆盖 mappings JSON）")
+    parser.add_argument("--force", action="store_true", help="覆盖已有的 mappings JSON/CSV（默认保留已有文件）")
     parser.add_argument("--include-persons", action="store_true", default=True, help="包含相关人物（默认开启）")
     parser.add_argument("--no-include-persons", action="store_false", dest="include_persons", help="不包含人物")
+    parser.add_argument("--include-active-persons", action="store_true", help="额外包含活跃期与预设年份范围相交的人物")
     parser.add_argument("--publisher", default="人民教育出版社", help="出版社（默认：人民教育出版社）")
+    parser.add_argument("--workers", type=int, default=4, help="--all-presets 时并行写文件的线程数（默认 4）")
     args = parser.parse_args()
 
     out_dir = os.path.abspath(args.out_dir)
     os.makedirs(out_dir, exist_ok=True)
 
-    mappings_json = os.path.join(out_dir, f"mappings_{args.preset}.json")
-    mappings_csv = os.path.join(out_dir, f"mappings_{args.preset}.csv")
-
-    if not args.csv_only:
-        # 1) generate skeleton
-        cmd1 = [
-            sys.executable,
-            GEN,
-            "--preset",
-            args.preset,
-            "--out",
-            mappings_json,
-            "--publisher",
-            args.publisher,
-        ]
-        if args.include_persons:
-            cmd1.append("--include-persons")
-        subprocess.check_call(cmd1, cwd=ROOT)
-    else:
-        if not os.path.exists(mappings_json):
-            raise SystemExit(f"--csv-only 需要已有 mappings 文件：{mappings_json}")
+    presets = sorted(PRESETS.keys()) if args.all_presets else [args.preset]
+    # events/persons/dynasties 只加载一次，各预设共用同一份索引
+    index = None if args.csv_only else load_index()
 
-    # 2) export csv (excel bom)
-    cmd2 = [
-        sys.executable,
-        EXPORT,
-        "--in",
-        mappings_json,
-        "--out",
-        mappings_csv,
-        "--excel-bom",
-    ]
+    def run(preset: str) -> Dict[str, Any]:
+        return bootstrap(
+            preset,
+            out_dir,
+            index=index,
+            publisher=args.publisher,
+            include_persons=args.include_persons,
+            include_active_persons=args.include_active_persons,
+            csv_only=args.csv_only,
+            force=args.force,
+        )
 
-    subprocess.check_call(cmd2, cwd=ROOT)
+    if len(presets) > 1 and args.workers > 1:
+        # 主要开销是 JSON/CSV 写盘，用线程并行即可
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results: List[Dict[str, Any]] = list(pool.map(run, presets))
+    else:
+        results = [run(p) for p in presets]
 
-    print("[bootstrap_preset] done")
-    print("-", f"mappings: {mappings_json}")
-    print("-", f"csv: {mappings_csv}")
+    print(f"[bootstrap_preset] done presets={len(results)} kept={sum(r['kept'] for r in results)}")
+    for r in results:
+        if len(results) > 1:
+            print("-", f"{r['preset']}: events={r['events']} persons={r['persons']}")
+        print("-", f"mappings: {r['mappings']}{'（已存在，未覆盖 JSON/CSV；--force 重新生成）' if r['kept'] else ''}")
+        print("-", f"csv: {r['csv']}")
 
 
 if __name__ == "__main__":
     main()
-
-
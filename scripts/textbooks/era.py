@@ -0,0 +1,145 @@
+"""
+教材脚本共用的“时代分段”建议（suggestedChapter / note 占位 / chapter 自动填充）
+
+给 Excel 一个“粗分段建议”，便于快速填 chapter（不代表教材真实章节名）。
+优先用年份区间（有序边界表 + 二分查找），其次用朝代名兜底（关键字自动机一次扫描，取规则表中最靠前的命中）。
+"""
+
+import bisect
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# 年份分期：YEAR_BOUNDARIES[i] 是 YEAR_ERAS[i + 1] 的起始年（含）
+YEAR_BOUNDARIES = [-1046, -770, -475, -221, 220, 589, 960, 1279, 1368, 1644, 1840, 1949]
+YEAR_ERAS = [
+    "上古（夏商周以前）",
+    "西周",
+    "春秋",
+    "战国",
+    "秦汉",
+    "魏晋南北朝",
+    "隋唐",
+    "宋",
+    "元",
+    "明",
+    "清前期",
+    "近代（1840-1949）",
+    "现代（1949-）",
+]
+
+# 朝代兜底：按顺序匹配，朝代名包含任一关键字即命中；都不命中时原样返回朝代名
+DYNASTY_RULES: List[Tuple[Tuple[str, ...], str]] = [
+    (("夏", "商"), "上古（夏商）"),
+    (("周",), "西周/东周"),
+    (("春秋",), "春秋"),
+    (("战国",), "战国"),
+    (("秦",), "秦"),
+    (("汉",), "汉"),
+    (("三国", "晋", "南北朝"), "魏晋南北朝"),
+    (("隋", "唐"), "隋唐"),
+    (("宋",), "宋"),
+    (("元",), "元"),
+    (("明",), "明"),
+    (("清",), "清"),
+]
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick 关键字自动机：一次扫描文本，返回命中的最小规则序号
+    （与按规则顺序逐条 `kw in text` 判断的结果相同）
+    """
+
+    def __init__(self, rules: List[Tuple[Tuple[str, ...], str]]) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.best: List[Optional[int]] = [None]
+        for rule_idx, (keywords, _) in enumerate(rules):
+            for kw in keywords:
+                node = 0
+                for ch in kw:
+                    nxt = self.goto[node].get(ch)
+                    if nxt is None:
+                        nxt = len(self.goto)
+                        self.goto[node][ch] = nxt
+                        self.goto.append({})
+                        self.best.append(None)
+                    node = nxt
+                if self.best[node] is None or rule_idx < self.best[node]:
+                    self.best[node] = rule_idx
+
+        # BFS 建失败指针，并把失败链上的命中合并进 best（取最小规则序号）
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                inherited = self.best[self.fail[nxt]]
+                if inherited is not None and (self.best[nxt] is None or inherited < self.best[nxt]):
+                    self.best[nxt] = inherited
+                queue.append(nxt)
+
+    def first_rule(self, text: str) -> Optional[int]:
+        node = 0
+        found: Optional[int] = None
+        for ch in text:
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            hit = self.best[node]
+            if hit is not None and (found is None or hit < found):
+                found = hit
+                if found == 0:
+                    break
+        return found
+
+
+_DYNASTY_AUTOMATON = KeywordAutomaton(DYNASTY_RULES)
+
+
+def _parse_year(hint_year: Any) -> Optional[int]:
+    try:
+        return int(hint_year)
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _classify(year: Optional[int], dynasty: str) -> str:
+    # 年份优先：大致按常见历史分期
+    if year is not None:
+        return YEAR_ERAS[bisect.bisect_right(YEAR_BOUNDARIES, year)]
+    # 朝代兜底
+    if dynasty:
+        rule = _DYNASTY_AUTOMATON.first_rule(dynasty)
+        return DYNASTY_RULES[rule][1] if rule is not None else dynasty
+    return ""
+
+
+def suggest_era(hint_year: Any, hint_dynasty: Any) -> str:
+    """单条：按 hintYear / hintDynasty 给出时代分段建议（结果按 (年份, 朝代名) 缓存）"""
+    return _classify(_parse_year(hint_year), str(hint_dynasty or "").strip())
+
+
+def suggest_eras(items: Iterable[Dict[str, Any]]) -> List[str]:
+    """批量：对每条 mappings 行（读取 hintYear / hintDynasty）给出建议，相同输入只分类一次"""
+    cache: Dict[Tuple[Any, ...], str] = {}
+    out: List[str] = []
+    for it in items:
+        year, dynasty = it.get("hintYear"), it.get("hintDynasty")
+        # 键带上类型：避免 1 / 1.0 / True 作为朝代名时被当成同一个键
+        key = (type(year), year, type(dynasty), dynasty)
+        try:
+            era = cache.get(key)
+        except TypeError:  # 不可哈希的脏数据：直接计算
+            out.append(suggest_era(year, dynasty))
+            continue
+        if era is None:
+            era = cache[key] = suggest_era(year, dynasty)
+        out.append(era)
+    return out
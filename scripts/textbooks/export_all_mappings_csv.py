@@ -4,80 +4,14 @@ import json
 import os
 from typing import Any, Dict, List
 
+from era import suggest_eras
+
 
 def _load_json(path: str) -> Any:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def _suggest_era(hint_year: Any, hint_dynasty: Any) -> str:
-    """
-    复制 export_mappings_csv.py 的粗分段建议逻辑，避免导出脚本间行为不一致。
-    """
-    try:
-        y = int(hint_year)
-    except Exception:
-        y = None
-
-    d = str(hint_dynasty or "").strip()
-
-    if y is not None:
-        if y < -1046:
-            return "上古（夏商周以前）"
-        if -1046 <= y < -770:
-            return "西周"
-        if -770 <= y < -475:
-            return "春秋"
-        if -475 <= y < -221:
-            return "战国"
-        if -221 <= y < 220:
-            return "秦汉"
-        if 220 <= y < 589:
-            return "魏晋南北朝"
-        if 589 <= y < 960:
-            return "隋唐"
-        if 960 <= y < 1279:
-            return "宋"
-        if 1279 <= y < 1368:
-            return "元"
-        if 1368 <= y < 1644:
-            return "明"
-        if 1644 <= y < 1840:
-            return "清前期"
-        if 1840 <= y < 1949:
-            return "近代（1840-1949）"
-        if 1949 <= y:
-            return "现代（1949-）"
-
-    if d:
-        if "夏" in d or "商" in d:
-            return "上古（夏商）"
-        if "周" in d:
-            return "西周/东周"
-        if "春秋" in d:
-            return "春秋"
-        if "战国" in d:
-            return "战国"
-        if "秦" in d:
-            return "秦"
-        if "汉" in d:
-            return "汉"
-        if "三国" in d or "晋" in d or "南北朝" in d:
-            return "魏晋南北朝"
-        if "隋" in d or "唐" in d:
-            return "隋唐"
-        if "宋" in d:
-            return "宋"
-        if "元" in d:
-            return "元"
-        if "明" in d:
-            return "明"
-        if "清" in d:
-            return "清"
-        return d
-    return ""
-
-
 def _export_one(mappings_json: str, out_csv: str, excel_bom: bool) -> int:
     items: List[Dict[str, Any]] = _load_json(mappings_json)
 
@@ -102,9 +36,9 @@ def _export_one(mappings_json: str, out_csv: str, excel_bom: bool) -> int:
     with open(os.path.abspath(out_csv), "w", newline="", encoding=encoding) as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
-        for it in items:
+        for it, era in zip(items, suggest_eras(items)):
             row = {k: it.get(k, "") for k in fieldnames}
-            row["suggestedChapter"] = _suggest_era(it.get("hintYear"), it.get("hintDynasty"))
+            row["suggestedChapter"] = era
             w.writerow(row)
 
     return len(items)
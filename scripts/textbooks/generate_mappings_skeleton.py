@@ -1,7 +1,8 @@
 import argparse
+import bisect
 import json
 import os
-from typing import Any, Dict, List, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
@@ -25,118 +26,234 @@ def _as_int(v: Any) -> int:
     return int(v)
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="从现有 events/persons 生成教材 mappings 骨架（用于填页码/章节）。")
-    # 预设：教材书目 + 默认时间范围（可自行覆盖）
-    presets = {
-        "grade7_up": {
-            "sourceTitle": "义务教育教科书·历史 七年级 上册（统编版）",
-            "yearMin": -3000,
-            "yearMax": -221,
-        },
-        "grade7_down": {
-            "sourceTitle": "义务教育教科书·历史 七年级 下册（统编版）",
-            "yearMin": -221,
-            "yearMax": 589,
-        },
-        "grade8_up": {
-            "sourceTitle": "义务教育教科书·历史 八年级 上册（统编版）",
-            "yearMin": 589,
-            "yearMax": 1279,
-        },
-        "grade8_down": {
-            "sourceTitle": "义务教育教科书·历史 八年级 下册（统编版）",
-            "yearMin": 1279,
-            "yearMax": 1912,
-        },
-        "grade9_up": {
-            "sourceTitle": "义务教育教科书·历史 九年级 上册（统编版）",
-            "yearMin": 1840,
-            "yearMax": 1949,
-        },
-        "grade9_down": {
-            "sourceTitle": "义务教育教科书·历史 九年级 下册（统编版）",
-            "yearMin": 1949,
-            "yearMax": 2100,
-        },
-        "hs_outline_up": {
-            "sourceTitle": "普通高中教科书·历史 必修·中外历史纲要（上）（统编版）",
-            "yearMin": -3000,
-            "yearMax": 1840,
-        },
-        "hs_outline_down": {
-            "sourceTitle": "普通高中教科书·历史 必修·中外历史纲要（下）（统编版）",
-            "yearMin": 1840,
-            "yearMax": 2100,
-        },
-    }
-    parser.add_argument("--preset", choices=sorted(presets.keys()), help="内置教材预设（避免 Windows/PowerShell 引号转义问题）")
-    parser.add_argument("--source-title", help="教材 source 的 title（需与 sources.json 一致）")
-    parser.add_argument("--publisher", default="人民教育出版社", help="出版社（可选，用于帮助 apply_mappings 定位 sourceId）")
-    parser.add_argument("--out", required=True, help="输出 mappings JSON 文件路径")
-    parser.add_argument("--year-min", type=int, help="筛选事件年份下限（含）。若使用 preset 且未传入，则采用 preset 默认值")
-    parser.add_argument("--year-max", type=int, help="筛选事件年份上限（含）。若使用 preset 且未传入，则采用 preset 默认值")
-    parser.add_argument("--include-persons", action="store_true", help="同时生成相关人物条目（来自事件 persons 引用）")
-    args = parser.parse_args()
+# 人物“活跃期”：出生后 ACTIVE_FROM_AGE 年起到去世；只有一端年份时按 DEFAULT_LIFESPAN 估算另一端
+ACTIVE_FROM_AGE = 15
+DEFAULT_LIFESPAN = 60
 
-    source_title = args.source_title
-    if args.preset:
-        source_title = presets[args.preset]["sourceTitle"]
-    if not source_title:
-        raise SystemExit("必须提供 --source-title 或 --preset")
 
-    year_min = args.year_min
-    year_max = args.year_max
-    if args.preset:
+class IntervalTree:
+    """
+    静态区间树（中心点划分）：查询与 [lo, hi] 相交的全部区间，O(log n + k)
+    每个节点保存跨过中心点的区间（按起点升序、按终点降序各一份），其余区间分到左右子树
+    """
+
+    def __init__(self, intervals: List[Tuple[int, int, Any]]) -> None:
+        self.root = self._build(intervals)
+
+    @classmethod
+    def _build(cls, intervals: List[Tuple[int, int, Any]]) -> Optional[Dict[str, Any]]:
+        if not intervals:
+            return None
+        points = sorted(p for lo, hi, _ in intervals for p in (lo, hi))
+        center = points[len(points) // 2]
+        left = [iv for iv in intervals if iv[1] < center]
+        right = [iv for iv in intervals if iv[0] > center]
+        here = [iv for iv in intervals if iv[0] <= center <= iv[1]]
+        return {
+            "center": center,
+            "by_start": sorted(here, key=lambda iv: iv[0]),
+            "by_end": sorted(here, key=lambda iv: -iv[1]),
+            "left": cls._build(left),
+            "right": cls._build(right),
+        }
+
+    def overlapping(self, lo: int, hi: int) -> List[Any]:
+        """返回与闭区间 [lo, hi] 相交的区间所带的值"""
+        out: List[Any] = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            center = node["center"]
+            if hi < center:
+                # 节点上的区间都跨过 center（> hi），只需起点 <= hi
+                for iv in node["by_start"]:
+                    if iv[0] > hi:
+                        break
+                    out.append(iv[2])
+                stack.append(node["left"])
+            elif lo > center:
+                for iv in node["by_end"]:
+                    if iv[1] < lo:
+                        break
+                    out.append(iv[2])
+                stack.append(node["right"])
+            else:
+                out.extend(iv[2] for iv in node["by_start"])
+                stack.append(node["left"])
+                stack.append(node["right"])
+        return out
+
+
+def active_span(p: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """人物活跃期 (起, 止)；没有生卒年时返回 None"""
+    birth, death = p.get("birthYear"), p.get("deathYear")
+    birth = birth if isinstance(birth, int) else None
+    death = death if isinstance(death, int) else None
+    if birth is None and death is None:
+        return None
+    if birth is None:
+        birth = death - DEFAULT_LIFESPAN
+    if death is None:
+        death = birth + DEFAULT_LIFESPAN
+    start = min(birth + ACTIVE_FROM_AGE, death)
+    return start, max(start, death)
+
+
+# 预设：教材书目 + 默认时间范围（可自行覆盖）
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "grade7_up": {
+        "sourceTitle": "义务教育教科书·历史 七年级 上册（统编版）",
+        "yearMin": -3000,
+        "yearMax": -221,
+    },
+    "grade7_down": {
+        "sourceTitle": "义务教育教科书·历史 七年级 下册（统编版）",
+        "yearMin": -221,
+        "yearMax": 589,
+    },
+    "grade8_up": {
+        "sourceTitle": "义务教育教科书·历史 八年级 上册（统编版）",
+        "yearMin": 589,
+        "yearMax": 1279,
+    },
+    "grade8_down": {
+        "sourceTitle": "义务教育教科书·历史 八年级 下册（统编版）",
+        "yearMin": 1279,
+        "yearMax": 1912,
+    },
+    "grade9_up": {
+        "sourceTitle": "义务教育教科书·历史 九年级 上册（统编版）",
+        "yearMin": 1840,
+        "yearMax": 1949,
+    },
+    "grade9_down": {
+        "sourceTitle": "义务教育教科书·历史 九年级 下册（统编版）",
+        "yearMin": 1949,
+        "yearMax": 2100,
+    },
+    "hs_outline_up": {
+        "sourceTitle": "普通高中教科书·历史 必修·中外历史纲要（上）（统编版）",
+        "yearMin": -3000,
+        "yearMax": 1840,
+    },
+    "hs_outline_down": {
+        "sourceTitle": "普通高中教科书·历史 必修·中外历史纲要（下）（统编版）",
+        "yearMin": 1840,
+        "yearMax": 2100,
+    },
+}
+
+
+class SkeletonIndex:
+    """
+    生成骨架所需的数据与索引：事件（只保留整数年份，按 年份、id 排序，二分查找年份范围）、
+    人物 id 索引、人物活跃期区间树、朝代名索引；一次构建，可供多个预设共用
+    """
+
+    def __init__(
+        self,
+        events: List[Dict[str, Any]],
+        persons: List[Dict[str, Any]],
+        dynasties: List[Dict[str, Any]],
+    ) -> None:
+        self.events = sorted(
+            (e for e in events if isinstance(e.get("eventYear"), int)),
+            key=lambda x: (_as_int(x.get("eventYear", 0)), _as_int(x.get("id", 0))),
+        )
+        self.event_years = [e["eventYear"] for e in self.events]
+        self.person_by_id = {p.get("id"): p for p in persons if isinstance(p.get("id"), int)}
+        self.dynasty_name_by_id = {d.get("id"): d.get("name") for d in dynasties if isinstance(d.get("id"), int)}
+        spans = []
+        for pid, p in self.person_by_id.items():
+            span = active_span(p)
+            if span:
+                spans.append((span[0], span[1], pid))
+        self.active_tree = IntervalTree(spans)
+
+    def events_in_range(self, year_min: int, year_max: int) -> List[Dict[str, Any]]:
+        lo = bisect.bisect_left(self.event_years, year_min)
+        hi = bisect.bisect_right(self.event_years, year_max)
+        return self.events[lo:hi]
+
+    def active_person_ids(self, year_min: int, year_max: int) -> Set[int]:
+        """活跃期与 [year_min, year_max] 相交的人物 id"""
+        return set(self.active_tree.overlapping(year_min, year_max))
+
+
+def load_index() -> SkeletonIndex:
+    events: List[Dict[str, Any]] = _load_json(EVENTS_PATH)
+    persons: List[Dict[str, Any]] = _load_json(PERSONS_PATH)
+    dynasties: List[Dict[str, Any]] = _load_json(DYNasties_PATH) if os.path.exists(DYNasties_PATH) else []
+    return SkeletonIndex(events, persons, dynasties)
+
+
+def resolve_preset(
+    preset: Optional[str],
+    source_title: Optional[str] = None,
+    year_min: Optional[int] = None,
+    year_max: Optional[int] = None,
+) -> Tuple[str, int, int]:
+    """按预设补全 source_title 与年份范围（显式传入的值优先），返回 (source_title, year_min, year_max)"""
+    if preset:
+        source_title = PRESETS[preset]["sourceTitle"]
         if year_min is None:
-            year_min = presets[args.preset]["yearMin"]
+            year_min = PRESETS[preset]["yearMin"]
         if year_max is None:
-            year_max = presets[args.preset]["yearMax"]
+            year_max = PRESETS[preset]["yearMax"]
+    if not source_title:
+        raise SystemExit("必须提供 --source-title 或 --preset")
     if year_min is None:
         year_min = -3000
     if year_max is None:
         year_max = 2100
+    return source_title, year_min, year_max
 
-    events: List[Dict[str, Any]] = _load_json(EVENTS_PATH)
-    persons: List[Dict[str, Any]] = _load_json(PERSONS_PATH)
-    dynasties: List[Dict[str, Any]] = _load_json(DYNasties_PATH) if os.path.exists(DYNasties_PATH) else []
-    dynasty_name_by_id = {d.get("id"): d.get("name") for d in dynasties if isinstance(d.get("id"), int)}
 
+def build_skeleton(
+    index: SkeletonIndex,
+    source_title: str,
+    publisher: str,
+    year_min: int,
+    year_max: int,
+    include_persons: bool = False,
+    include_active_persons: bool = False,
+) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    返回 (mappings 行, 事件数, 人物数)
+    include_active_persons：人物除了来自事件 persons 引用，还包括活跃期与年份范围相交的人物（隐含 include_persons）
+    """
     # 过滤事件：按 eventYear
-    picked_events: List[Dict[str, Any]] = []
+    picked_events = index.events_in_range(year_min, year_max)
     person_ids: Set[int] = set()
-    for e in events:
-        y = e.get("eventYear")
-        if not isinstance(y, int):
-            continue
-        if y < year_min or y > year_max:
-            continue
-        picked_events.append(e)
+    for e in picked_events:
         for pid in e.get("persons") or []:
             if isinstance(pid, int):
                 person_ids.add(pid)
 
-    picked_events.sort(key=lambda x: (_as_int(x.get("eventYear", 0)), _as_int(x.get("id", 0))))
+    if include_active_persons:
+        include_persons = True
+        person_ids |= index.active_person_ids(year_min, year_max)
 
-    person_by_id = {p.get("id"): p for p in persons if isinstance(p.get("id"), int)}
     picked_persons: List[Tuple[int, Dict[str, Any]]] = []
-    if args.include_persons:
+    if include_persons:
         for pid in sorted(person_ids):
-            p = person_by_id.get(pid)
+            p = index.person_by_id.get(pid)
             if p:
                 picked_persons.append((pid, p))
 
     out: List[Dict[str, Any]] = []
 
     for e in picked_events:
-        dname = dynasty_name_by_id.get(e.get("dynastyId"))
+        dname = index.dynasty_name_by_id.get(e.get("dynastyId"))
         out.append(
             {
                 "entityType": "event",
                 "entityId": e.get("id"),
                 "entityName": e.get("title", ""),
                 "sourceTitle": source_title,
-                "publisher": args.publisher,
+                "publisher": publisher,
                 "chapter": "",
                 "page": "",
                 "line": "",
@@ -147,35 +264,65 @@ def main() -> None:
             }
         )
 
-    if args.include_persons:
-        for pid, p in picked_persons:
-            dname = dynasty_name_by_id.get(p.get("dynastyId"))
-            out.append(
-                {
-                    "entityType": "person",
-                    "entityId": pid,
-                    "entityName": p.get("name", ""),
-                    "sourceTitle": source_title,
-                    "publisher": args.publisher,
-                    "chapter": "",
-                    "page": "",
-                    "line": "",
-                    "note": "",
-                    "hintDynasty": dname or "",
-                    "verified": False,
-                }
-            )
-
-    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
-    _save_json(args.out, out)
+    for pid, p in picked_persons:
+        dname = index.dynasty_name_by_id.get(p.get("dynastyId"))
+        out.append(
+            {
+                "entityType": "person",
+                "entityId": pid,
+                "entityName": p.get("name", ""),
+                "sourceTitle": source_title,
+                "publisher": publisher,
+                "chapter": "",
+                "page": "",
+                "line": "",
+                "note": "",
+                "hintDynasty": dname or "",
+                "verified": False,
+            }
+        )
+
+    return out, len(picked_events), len(picked_persons)
+
+
+def write_skeleton(out_path: str, rows: List[Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    _save_json(out_path, rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="从现有 events/persons 生成教材 mappings 骨架（用于填页码/章节）。")
+    parser.add_argument("--preset", choices=sorted(PRESETS.keys()), help="内置教材预设（避免 Windows/PowerShell 引号转义问题）")
+    parser.add_argument("--source-title", help="教材 source 的 title（需与 sources.json 一致）")
+    parser.add_argument("--publisher", default="人民教育出版社", help="出版社（可选，用于帮助 apply_mappings 定位 sourceId）")
+    parser.add_argument("--out", required=True, help="输出 mappings JSON 文件路径")
+    parser.add_argument("--year-min", type=int, help="筛选事件年份下限（含）。若使用 preset 且未传入，则采用 preset 默认值")
+    parser.add_argument("--year-max", type=int, help="筛选事件年份上限（含）。若使用 preset 且未传入，则采用 preset 默认值")
+    parser.add_argument("--include-persons", action="store_true", help="同时生成相关人物条目（来自事件 persons 引用）")
+    parser.add_argument(
+        "--include-active-persons",
+        action="store_true",
+        help="人物条目额外包括活跃期（出生后 15 年至去世）与年份范围相交的人物，即使没有出现在事件 persons 中",
+    )
+    args = parser.parse_args()
+
+    source_title, year_min, year_max = resolve_preset(args.preset, args.source_title, args.year_min, args.year_max)
+    rows, n_events, n_persons = build_skeleton(
+        load_index(),
+        source_title,
+        args.publisher,
+        year_min,
+        year_max,
+        include_persons=args.include_persons,
+        include_active_persons=args.include_active_persons,
+    )
+    write_skeleton(args.out, rows)
     print(
         f"[generate_mappings_skeleton] out={os.path.abspath(args.out)} "
-        f"events={len(picked_events)} persons={len(picked_persons)} "
+        f"events={n_events} persons={n_persons} "
         f"year=[{year_min},{year_max}] preset={args.preset or ''}"
     )
 
 
 if __name__ == "__main__":
     main()
-
-
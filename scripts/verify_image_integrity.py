@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片完整性校验
+对图片执行 Pillow verify() 与完整解码（进程池并行），发现截断/损坏的 JPEG，
+并维护校验清单（路径、大小、修改时间、SHA-256、尺寸；默认 scripts/.cache/，不入库）。
+再次运行时只重新校验大小或修改时间与清单不一致的文件；存在损坏文件时退出码为 2。
+
+运行方式（在仓库根目录）：
+  python scripts/verify_image_integrity.py
+  python scripts/verify_image_integrity.py --dir full --dir thumbs --full
+"""
+
+import argparse
+import json
+import os
+import time
+
+from PIL import Image
+
+from image_analysis import parallel_map
+from image_feature_cache import IMAGE_EXTS, file_sha256
+
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMAGES_ROOT = os.path.join(REPO_ROOT, "frontend", "public", "images")
+DEFAULT_MANIFEST = os.path.join(REPO_ROOT, "scripts", ".cache", "image_integrity_manifest.json")
+DEFAULT_DIRS = ["full", "thumbs"]
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def verify_image(path):
+    """
+    校验单个文件（在子进程中执行）：
+    1. verify() 检查文件结构（不解码像素）
+    2. 重新打开并 load() 完整解码，截断的 JPEG 会在这里报错
+    """
+    st = os.stat(path)
+    entry = {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": file_sha256(path),
+        "width": None,
+        "height": None,
+        "format": None,
+        "ok": False,
+        "error": None,
+    }
+    try:
+        with Image.open(path) as img:
+            img.verify()
+        # verify() 之后图片对象不可再用，需要重新打开
+        with Image.open(path) as img:
+            entry["width"], entry["height"] = img.size
+            entry["format"] = img.format
+            img.load()
+        entry["ok"] = True
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return entry
+
+
+def scan(dirs):
+    """返回 {相对 images 根目录的路径: (绝对路径, size, mtime_ns)}"""
+    out = {}
+    for d in dirs:
+        for dirpath, _, filenames in os.walk(os.path.join(IMAGES_ROOT, d)):
+            for n in filenames:
+                if not n.lower().endswith(IMAGE_EXTS):
+                    continue
+                path = os.path.join(dirpath, n)
+                st = os.stat(path)
+                rel = os.path.relpath(path, IMAGES_ROOT).replace(os.sep, "/")
+                out[rel] = (path, st.st_size, st.st_mtime_ns)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="并行校验图片完整性并维护 SHA-256 清单。")
+    parser.add_argument("--dir", action="append", help="images 下的子目录，可重复（默认 full 与 thumbs）")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST, help="校验清单路径（默认 scripts/.cache/image_integrity_manifest.json）")
+    parser.add_argument("--full", action="store_true", help="忽略清单，重新校验全部文件")
+    parser.add_argument("--workers", type=int, help="校验进程数（默认 CPU 核数）")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    files = scan(args.dir or DEFAULT_DIRS)
+    manifest = {} if args.full else _load_json(args.manifest, {}).get("files", {})
+
+    todo = []
+    for rel, (path, size, mtime_ns) in files.items():
+        prev = manifest.get(rel)
+        if prev and prev.get("size") == size and prev.get("mtime_ns") == mtime_ns:
+            continue
+        todo.append(rel)
+
+    for rel, entry in zip(todo, parallel_map(verify_image, [files[rel][0] for rel in todo], args.workers)):
+        manifest[rel] = entry
+
+    # 清单只保留本次扫描范围内仍存在的文件
+    manifest = {rel: manifest[rel] for rel in sorted(files)}
+    _save_json(args.manifest, {"root": "frontend/public/images", "files": manifest})
+
+    corrupt = [(rel, e["error"]) for rel, e in manifest.items() if not e["ok"]]
+    elapsed = time.perf_counter() - start
+    print(f"[verify_image_integrity] files={len(files)} verified={len(todo)} skipped={len(files) - len(todo)} "
+          f"corrupt={len(corrupt)} seconds={elapsed:.3f}")
+    print(f"- manifest: {os.path.abspath(args.manifest)}")
+    for rel, error in corrupt:
+        print(f"- corrupt: {rel} ({error})")
+    if corrupt:
+        raise SystemExit(2)
+
+
+if __name__ == "__main__":
+    main()